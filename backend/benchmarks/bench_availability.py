@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Benchmark: availability lookup for one chat turn (14 days ahead)
+
+Seeds a throwaway clinic database with --bookings appointments spread over
+the next two weeks, then compares:
+
+  per slot    one SELECT COUNT(*) per (day, half-hour slot) - the old
+              AvailabilityService loop (with the real date/time columns;
+              the original queried non-existent columns and failed on
+              every slot)
+  set based   AvailabilityService.get_available_dates: one range query,
+              free slots computed in memory
+
+Usage (from backend/):
+    python benchmarks/bench_availability.py
+    python benchmarks/bench_availability.py --bookings 2000 --repeat 50
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.availability_service import AvailabilityService
+from testing.clinic_db import clinic_db
+from utils.db_utils import execute_query, transaction
+
+
+def per_slot_available_dates(doctor_id, days_ahead=14):
+    """The pre-change algorithm: a COUNT query for every candidate slot"""
+    available_dates = []
+    today = date.today()
+    for i in range(1, days_ahead + 1):
+        check_date = today + timedelta(days=i)
+        if check_date.weekday() >= 5:
+            continue
+        slots = []
+        for time_str in AvailabilityService._slot_times():
+            result = execute_query(
+                """SELECT COUNT(*) as count FROM appointments
+                   WHERE doctor_id = ? AND date = ? AND time = ? AND status != 'cancelled'""",
+                (doctor_id, check_date.isoformat(), time_str),
+            )
+            if result[0]["count"] == 0:
+                slots.append(time_str)
+        if slots:
+            available_dates.append({
+                "date": check_date.strftime("%Y-%m-%d"),
+                "day_of_week": check_date.strftime("%A"),
+                "slots": slots,
+            })
+    return available_dates
+
+
+def seed(bookings: int) -> None:
+    rng = random.Random(7)
+    times = AvailabilityService._slot_times()
+    rows = [
+        (rng.choice((1, 2)), (date.today() + timedelta(days=rng.randint(1, 14))).isoformat(),
+         rng.choice(times), rng.choice(("confirmed", "pending", "cancelled")))
+        for _ in range(bookings)
+    ]
+    with transaction() as tx:
+        tx.executemany(
+            "INSERT INTO appointments (service_id, customer_id, doctor_id, date, time, status) "
+            "VALUES (1, 1, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with clinic_db() as pool:
+        seed(args.bookings)
+        expected = AvailabilityService.get_available_dates(doctor_id=1)
+        assert per_slot_available_dates(1) == expected, "paths disagree"
+
+        print(f"{args.bookings} bookings over 14 days, {args.repeat} lookups per path\n")
+        print(f"{'path':12s} {'queries':>8s} {'ms/lookup':>10s}")
+        for label, fn in [
+            ("per slot", per_slot_available_dates),
+            ("set based", lambda doctor_id: AvailabilityService.get_available_dates(doctor_id=doctor_id)),
+        ]:
+            before = pool.stats()["checkouts"]
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                fn(1)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            queries = (pool.stats()["checkouts"] - before) / args.repeat
+            print(f"{label:12s} {queries:8.0f} {elapsed * 1000:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
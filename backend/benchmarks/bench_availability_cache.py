@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Benchmark: availability reads with and without the availability cache
+
+A throwaway clinic database with --doctors doctors and --bookings existing
+appointments over the next 14 days, then --turns simulated chat turns:
+each asks for a random doctor's (or the whole clinic's) availability over
+14 days, and one in --book-every books a random free slot (which
+invalidates that doctor/date).
+
+Reported per path: SQLite checkouts, ms per turn and, with the cache,
+its hit rate.
+
+Usage (from backend/):
+    python benchmarks/bench_availability_cache.py
+    python benchmarks/bench_availability_cache.py --turns 5000 --book-every 10
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.appointment_service import AppointmentService
+from services.availability_cache import AvailabilityCache, get_availability_cache, set_availability_cache
+from services.availability_service import AvailabilityService
+from testing.clinic_db import clinic_db
+from utils.db_utils import transaction
+
+
+def seed(doctors: int, bookings: int) -> int:
+    rng = random.Random(5)
+    times = AvailabilityService._slot_times()
+    with transaction() as tx:
+        tx.executemany(
+            "INSERT INTO doctors (name, specialization) VALUES (?, 'General')",
+            [(f"Dr. Bench {i}",) for i in range(doctors)],
+        )
+        doctor_ids = [row["id"] for row in tx.query("SELECT id FROM doctors")]
+        tx.executemany(
+            "INSERT INTO appointments (service_id, customer_id, doctor_id, date, time, status) "
+            "VALUES (1, 1, ?, ?, ?, 'confirmed')",
+            [(rng.choice(doctor_ids), (date.today() + timedelta(days=rng.randint(1, 14))).isoformat(),
+              rng.choice(times)) for _ in range(bookings)],
+        )
+        return tx.insert("INSERT INTO customers (name, phone) VALUES ('Bench', '5550000')")
+
+
+def run(turns: int, book_every: int, customer_id: int, pool):
+    rng = random.Random(9)
+    doctor_ids = [doctor["id"] for doctor in AppointmentService.get_all_doctors()]
+    before = pool.stats()["checkouts"]
+    start = time.perf_counter()
+    for turn in range(turns):
+        doctor_id = rng.choice(doctor_ids + [None])
+        dates = AvailabilityService.get_available_dates(doctor_id=doctor_id, days_ahead=14)
+        if turn % book_every == 0 and dates and doctor_id:
+            entry = rng.choice(dates)
+            AppointmentService.book_appointment(
+                1, customer_id, doctor_id, entry["date"], rng.choice(entry["slots"])
+            )
+    elapsed = time.perf_counter() - start
+    return pool.stats()["checkouts"] - before, elapsed / turns * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--book-every", type=int, default=20)
+    args = parser.parse_args()
+
+    previous = get_availability_cache()
+    print(f"{args.turns} turns, a booking every {args.book_every}, "
+          f"{args.doctors} extra doctors, {args.bookings} seeded bookings\n")
+    print(f"{'path':10s} {'checkouts':>10s} {'ms/turn':>8s} {'hit rate':>9s}")
+    try:
+        for label, cache in [("no cache", None), ("cache", AvailabilityCache())]:
+            set_availability_cache(cache)
+            with clinic_db() as pool:
+                customer_id = seed(args.doctors, args.bookings)
+                checkouts, ms = run(args.turns, args.book_every, customer_id, pool)
+            hit_rate = f"{cache.stats()['hit_rate']:9.1%}" if cache else f"{'-':>9s}"
+            print(f"{label:10s} {checkouts:10d} {ms:8.3f} {hit_rate}")
+    finally:
+        set_availability_cache(previous)
+
+
+if __name__ == "__main__":
+    main()
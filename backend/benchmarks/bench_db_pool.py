@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark: clinic database queries per second, connection per query vs pool
+
+Builds a throwaway copy of the clinic schema (create_tables.sql) and runs
+booking-turn-shaped query mixes against it:
+
+  per query   sqlite3.connect() + close for every execute_query/execute_update
+              (how utils/db_utils worked before pooling)
+  pooled      utils.db_utils as it is now (persistent connections, WAL,
+              synchronous=NORMAL, cache_size, mmap_size, busy_timeout)
+
+Usage (from backend/):
+    python benchmarks/bench_db_pool.py
+    python benchmarks/bench_db_pool.py --threads 8 --turns 500
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from testing.clinic_db import make_clinic_db
+from utils import db_utils
+from utils.db_utils import ConnectionPool, set_connection_pool
+
+
+def booking_turn(n: int) -> None:
+    """~10 statements, like a booking turn (lookups, availability, insert)"""
+    q, u = db_utils.execute_query, db_utils.execute_update
+    q("SELECT * FROM services WHERE LOWER(name) = ?", ("cleaning",))
+    q("SELECT * FROM doctors WHERE name LIKE ?", ("%Li%",))
+    q("SELECT * FROM services WHERE name LIKE ?", ("%Cleaning%",))
+    q("SELECT id FROM customers WHERE phone = ?", ("1234567890",))
+    for time_str in ("09:00", "10:00", "11:00"):
+        q("SELECT COUNT(*) AS count FROM appointments WHERE doctor_id = ? AND date = ? AND time = ? "
+          "AND status != 'cancelled'", (2, "2026-01-06", time_str))
+    q("SELECT * FROM time_slots WHERE doctor_id = ? AND date = ?", (2, "2026-01-06"))
+    u("INSERT INTO appointments (service_id, customer_id, doctor_id, date, time, status) "
+      "VALUES (?, ?, ?, ?, ?, 'pending')", (1, 1, 2, "2026-02-01", f"{n % 24:02d}:00"))
+    q("SELECT id FROM appointments ORDER BY id DESC LIMIT 1")
+
+
+@contextmanager
+def per_query_connection(db_path: str):
+    """The pre-pool get_db_connection: a fresh connection every time"""
+    @contextmanager
+    def get_db_connection():
+        conn = None
+        try:
+            conn = sqlite3.connect(db_path)
+            conn.row_factory = sqlite3.Row
+            yield conn
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn:
+                conn.rollback()
+            raise db_utils.DatabaseError(f"Database error: {str(e)}")
+        finally:
+            if conn:
+                conn.close()
+
+    with mock.patch.object(db_utils, "get_db_connection", get_db_connection):
+        yield
+
+
+def run(threads: int, turns: int) -> float:
+    def worker(offset):
+        for n in range(turns):
+            booking_turn(offset + n)
+
+    workers = [threading.Thread(target=worker, args=(t * turns,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return threads * turns * 10 / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads × {args.turns} booking turns (10 statements each)\n")
+    print(f"{'mode':12s} {'queries/s':>10s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_clinic_db(Path(tmp) / "per_query.db")
+        with per_query_connection(db_path):
+            print(f"{'per query':12s} {run(args.threads, args.turns):10.0f}")
+
+        pool = ConnectionPool(db_path=make_clinic_db(Path(tmp) / "pooled.db"))
+        set_connection_pool(pool)
+        try:
+            print(f"{'pooled':12s} {run(args.threads, args.turns):10.0f}")
+            print(f"\npool stats: {pool.stats()}")
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
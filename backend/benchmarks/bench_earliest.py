@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Benchmark: clinic-wide "earliest available" for a patient with no doctor
+preference
+
+A throwaway clinic with --doctors doctors whose calendars are --fill
+booked over a --days horizon (the near term fuller than later weeks).
+Finding the first --limit (doctor, date, time) options for a 60-minute
+service:
+
+  full scan    load every booking in the horizon, list every doctor's
+               fitting start times, sort, take the first k
+  heap merge   AvailabilityService.get_earliest_available: per-doctor
+               start streams merged lazily with a heap, bookings loaded a
+               window at a time, stopping once k options are found
+               (availability cache disabled, then warm)
+
+Usage (from backend/):
+    python benchmarks/bench_earliest.py
+    python benchmarks/bench_earliest.py --doctors 100 --days 180 --fill 0.9
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.availability_cache import AvailabilityCache, get_availability_cache, set_availability_cache
+from services.availability_service import AvailabilityService
+from services.slot_index import SlotIndex
+from testing.clinic_db import clinic_db
+from utils.db_utils import transaction
+
+DURATION = 60
+
+
+def seed(doctors: int, days: int, fill: float) -> None:
+    rng = random.Random(3)
+    times = AvailabilityService._slot_times()
+    with transaction() as tx:
+        tx.executemany(
+            "INSERT INTO doctors (name, specialization) VALUES (?, 'General')",
+            [(f"Dr. Bench {i}",) for i in range(doctors)],
+        )
+        doctor_ids = [row["id"] for row in tx.query("SELECT id FROM doctors")]
+        rows = []
+        for d in range(1, days + 1):
+            day = (date.today() + timedelta(days=d)).isoformat()
+            # Fully booked near term, then thinning out
+            p = 1.0 if d <= 7 else fill if d <= 21 else fill / 2
+            rows.extend(
+                (doctor_id, day, time_str)
+                for doctor_id in doctor_ids for time_str in times if rng.random() < p
+            )
+        tx.executemany(
+            "INSERT INTO appointments (service_id, customer_id, doctor_id, date, time, status) "
+            "VALUES (1, 1, ?, ?, ?, 'confirmed')",
+            rows,
+        )
+
+
+def full_scan(limit: int, days: int):
+    """Everything for every doctor over the horizon, then sort"""
+    today = date.today()
+    check_dates = [
+        today + timedelta(days=i) for i in range(1, days + 1) if (today + timedelta(days=i)).weekday() < 5
+    ]
+    index = SlotIndex.load(AvailabilityService.grid(), check_dates[0], check_dates[-1])
+    doctor_ids = sorted(d for d in index._busy if d is not None)
+    options = sorted(
+        (day, slot, doctor_id)
+        for doctor_id in doctor_ids
+        for day, slot in index.iter_starts(doctor_id, DURATION, days=check_dates)
+    )
+    return [(doctor_id, day.isoformat(), index.grid.label(slot)) for day, slot, doctor_id in options[:limit]]
+
+
+def heap_merge(limit: int, days: int):
+    return [
+        (o["doctor_id"], o["date"], o["time"])
+        for o in AvailabilityService.get_earliest_available(DURATION, limit, days)
+    ]
+
+
+def timed(fn, repeat, pool):
+    before = pool.stats()["checkouts"]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    return elapsed, (pool.stats()["checkouts"] - before) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--fill", type=float, default=0.8)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    previous = get_availability_cache()
+    try:
+        with clinic_db() as pool:
+            seed(args.doctors, args.days, args.fill)
+            print(f"{args.doctors} extra doctors, {args.days}-day horizon, "
+                  f"first {args.limit} options for a {DURATION}-minute service\n")
+            print(f"{'path':22s} {'ms/query':>9s} {'queries':>8s}")
+
+            set_availability_cache(None)
+            expected = full_scan(args.limit, args.days)
+            for label, fn in [
+                ("full scan", lambda: full_scan(args.limit, args.days)),
+                ("heap merge (no cache)", lambda: heap_merge(args.limit, args.days)),
+            ]:
+                ms, queries, result = timed(fn, args.repeat, pool)
+                assert result == expected, label
+                print(f"{label:22s} {ms:9.2f} {queries:8.1f}")
+
+            set_availability_cache(AvailabilityCache())
+            heap_merge(args.limit, args.days)
+            ms, queries, result = timed(lambda: heap_merge(args.limit, args.days), args.repeat, pool)
+            assert result == expected
+            print(f"{'heap merge (warm)':22s} {ms:9.2f} {queries:8.1f}")
+            print(f"\nfirst option: {expected[0]}")
+    finally:
+        set_availability_cache(previous)
+
+
+if __name__ == "__main__":
+    main()
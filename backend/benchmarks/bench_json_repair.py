@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: single-pass repair_json vs the previous multi-pass cleaner
+
+Runs both over the fuzz corpus of malformed model outputs and reports time
+per output and how many outputs each recovers to the original object.
+
+Usage (from backend/):
+    python benchmarks/bench_json_repair.py
+    python benchmarks/bench_json_repair.py --count 2000 --repeat 5
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from testing.json_corpus import malformed_outputs
+from utils.json_repair import repair_json
+
+
+def legacy_clean_json(text: str) -> str:
+    """The multi-pass cleaner LlamaService used before repair_json"""
+    text = text.strip()
+    json_start = text.find('{')
+    if json_start == -1:
+        json_start = text.find('[')
+    if json_start != -1:
+        text = text[json_start:]
+    json_end = max(text.rfind('}'), text.rfind(']'))
+    if json_end != -1:
+        text = text[:json_end + 1]
+
+    cleaned_lines = []
+    for line in text.split('\n'):
+        if line.find('//') != -1:
+            in_string = False
+            escape_next = False
+            for i, char in enumerate(line):
+                if escape_next:
+                    escape_next = False
+                    continue
+                if char == '\\':
+                    escape_next = True
+                    continue
+                if char == '"':
+                    in_string = not in_string
+                if char == '/' and i + 1 < len(line) and line[i + 1] == '/' and not in_string:
+                    line = line[:i]
+                    break
+        cleaned_lines.append(line)
+    text = '\n'.join(cleaned_lines)
+
+    while '/*' in text and '*/' in text:
+        start = text.find('/*')
+        end = text.find('*/', start)
+        if end != -1:
+            text = text[:start] + text[end + 2:]
+        else:
+            break
+
+    text = text.replace(',\n}', '\n}')
+    text = text.replace(',\n]', '\n]')
+    text = text.replace(', }', '}')
+    text = text.replace(', ]', ']')
+    return text.strip()
+
+
+def legacy_parse(text: str):
+    """legacy_clean_json + the brace-counting retry from _parse_model_output"""
+    output = legacy_clean_json(text)
+    try:
+        return json.loads(output)
+    except json.JSONDecodeError:
+        missing = output.count('{') - output.count('}')
+        if missing > 0:
+            return json.loads(output + '}' * missing)
+        raise
+
+
+def new_parse(text: str):
+    return json.loads(repair_json(text))
+
+
+def run(parse, corpus: list, repeat: int) -> str:
+    recovered = 0
+    for text, expected in corpus:
+        try:
+            recovered += parse(text) == expected
+        except json.JSONDecodeError:
+            pass
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text, _ in corpus:
+            try:
+                parse(text)
+            except json.JSONDecodeError:
+                pass
+    per_op_us = (time.perf_counter() - start) / (repeat * len(corpus)) * 1e6
+    return f"{per_op_us:8.2f} µs/output  recovered={recovered}/{len(corpus)}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = list(malformed_outputs(count=args.count, seed=1))
+    decoder = json.JSONDecoder()
+
+    def is_valid(text: str) -> bool:
+        try:
+            decoder.raw_decode(text, text.find("{"))
+            return True
+        except ValueError:
+            return False
+
+    subsets = [
+        ("all", corpus),
+        ("valid JSON", [s for s in corpus if is_valid(s[0])]),
+        ("damaged", [s for s in corpus if not is_valid(s[0])]),
+    ]
+    for subset_name, subset in subsets:
+        print(f"[{subset_name}: {len(subset)} outputs]")
+        print(f"  legacy       {run(legacy_parse, subset, args.repeat)}")
+        print(f"  repair_json  {run(new_parse, subset, args.repeat)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Benchmark: per-turn NLU latency, buffered vs streaming with early stop
+
+The fake model emits the NLU JSON followed by a chatty explanation (as the
+3B model often does), one ~4-char chunk per simulated token. Buffered mode
+waits for all of it; streaming mode cancels the generation as soon as the
+top-level JSON object closes.
+
+Usage (from backend/):
+    python benchmarks/bench_nlu_streaming.py
+    python benchmarks/bench_nlu_streaming.py --turns 20 --token-ms 10 --trailing-words 120
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.llama_service import LlamaService
+from services.llm_transport import OllamaHTTPTransport, set_transport
+from services.nlu_cache import set_nlu_cache
+from testing.fake_ollama import DEFAULT_NLU_OUTPUT, FakeOllamaServer
+
+# Too open-ended for the fast path, so every turn reaches the model
+MESSAGE = "Could someone look at my sore gum sometime"
+
+
+def run_turns(streaming: bool, turns: int) -> list:
+    LlamaService.STREAMING = streaming
+    latencies = []
+    for i in range(turns):
+        start = time.perf_counter()
+        LlamaService.parse_user_input(f"{MESSAGE} {i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{name:<10} turns={len(latencies):<4} "
+          f"mean={statistics.mean(latencies):8.2f} ms  "
+          f"p50={statistics.median(latencies):8.2f} ms  "
+          f"p95={p95:8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--token-ms", type=float, default=2, help="Delay per streamed chunk")
+    parser.add_argument("--trailing-words", type=int, default=60, help="Explanation after the JSON")
+    args = parser.parse_args()
+
+    chatty = DEFAULT_NLU_OUTPUT + "\n\nExplanation: " + " ".join(["because"] * args.trailing_words)
+    set_nlu_cache(None)
+
+    with FakeOllamaServer(responder=lambda prompt: chatty, token_latency=args.token_ms / 1000) as server:
+        transport = OllamaHTTPTransport(base_url=server.url)
+        set_transport(transport)
+        report("buffered", run_turns(False, args.turns))
+        chunks_before = server.streamed_chunks
+        report("streaming", run_turns(True, args.turns))
+        transport.close()
+        print(f"Chunks generated per streaming turn: "
+              f"{(server.streamed_chunks - chunks_before) / args.turns:.1f} "
+              f"(full output: {len(chatty) // FakeOllamaServer.STREAM_CHUNK_CHARS + 1})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Benchmark: per-turn NLU latency, `ollama run` subprocess vs pooled HTTP
+
+By default both transports hit local stand-ins (fake Ollama server / fake CLI),
+so the numbers isolate transport overhead: process spawn vs a reused
+keep-alive connection. Pass --real to benchmark against a running Ollama.
+
+Usage (from backend/):
+    python benchmarks/bench_nlu_transport.py
+    python benchmarks/bench_nlu_transport.py --turns 20 --real
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.llama_service import LlamaService
+from services.llm_transport import (
+    NLUTransport, OllamaHTTPTransport, SubprocessTransport, set_transport
+)
+from testing import fake_ollama
+from testing.fake_ollama import FakeOllamaServer
+
+MESSAGES = [
+    "Book a cleaning with Dr. Wang tomorrow at 2 PM",
+    "Dr. Li",
+    "cleaning",
+    "next Wednesday",
+    "My phone is 5551234567",
+]
+
+
+def run_turns(transport: NLUTransport, turns: int) -> list:
+    set_transport(transport)
+    latencies = []
+    for i in range(turns):
+        start = time.perf_counter()
+        LlamaService.parse_user_input(MESSAGES[i % len(MESSAGES)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{name:<12} turns={len(latencies):<4} "
+          f"mean={statistics.mean(latencies):8.2f} ms  "
+          f"p50={statistics.median(latencies):8.2f} ms  "
+          f"p95={p95:8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--real", action="store_true", help="Use a real Ollama install")
+    args = parser.parse_args()
+
+    if args.real:
+        subprocess_transport = SubprocessTransport()
+        http_transport = OllamaHTTPTransport()
+        http_transport.preload()
+        report("subprocess", run_turns(subprocess_transport, args.turns))
+        report("http", run_turns(http_transport, args.turns))
+        http_transport.close()
+        return
+
+    with FakeOllamaServer() as server:
+        subprocess_transport = SubprocessTransport(
+            command=[sys.executable, fake_ollama.__file__, "run"]
+        )
+        http_transport = OllamaHTTPTransport(base_url=server.url)
+        report("subprocess", run_turns(subprocess_transport, args.turns))
+        report("http", run_turns(http_transport, args.turns))
+        http_transport.close()
+        print(f"HTTP connections opened: {server.connections}")
+
+
+if __name__ == "__main__":
+    main()
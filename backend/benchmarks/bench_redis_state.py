@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark: Redis state store round trips and per-turn latency
+
+Runs concurrent chat turns against RedisStateStore on a local fake Redis
+that charges --rtt milliseconds per round trip. Compared per turn:
+
+  legacy      get_or_create (GET) → merge_entities_with_state as it was
+              (GET + SETEX) → save (SETEX)                    = 4 round trips
+  merge op    store.merge_entities (server-side script)        = 1 round trip
+  unit of work  MGET state+version → compare-and-set script    = 2 round trips
+
+Usage (from backend/):
+    python benchmarks/bench_redis_state.py
+    python benchmarks/bench_redis_state.py --rtt 1.0 --threads 16
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.dialogue_service import DialogueState, _merge_entities
+from services.state_store import RedisStateStore
+from testing.fake_redis import FakeRedis
+
+TURNS = [
+    {"service": "Cleaning"},
+    {"doctor": "Dr. Wang", "service": None},
+    {"date": "2026-03-14"},
+    {"time": "14:00"},
+    {"customer_name": "Maria Lopez"},
+]
+
+
+def legacy_turn(store: RedisStateStore, conversation_id: str, entities: dict) -> None:
+    state_dict = store.get(conversation_id)
+    state = DialogueState.from_dict(state_dict) if state_dict else DialogueState(conversation_id)
+    # merge_entities_with_state before this change: its own read-merge-write
+    inner = store.get(conversation_id)
+    merged_state = DialogueState.from_dict(inner) if inner else DialogueState(conversation_id)
+    merged_state.collected_entities = _merge_entities(merged_state.collected_entities, entities)
+    store.redis.setex(store._key(conversation_id), store.ttl_seconds, store.codec.encode(merged_state.to_dict()))
+    state.collected_entities = merged_state.collected_entities
+    state.intent = "appointment"
+    store.redis.setex(store._key(conversation_id), store.ttl_seconds, store.codec.encode(state.to_dict()))
+
+
+def merge_turn(store: RedisStateStore, conversation_id: str, entities: dict) -> None:
+    store.merge_entities(conversation_id, entities, DialogueState(conversation_id).to_dict())
+
+
+def uow_turn(store: RedisStateStore, conversation_id: str, entities: dict) -> None:
+    state_dict, version = store.get_versioned(conversation_id)
+    state = DialogueState.from_dict(state_dict) if state_dict else DialogueState(conversation_id)
+    state.collected_entities = _merge_entities(state.collected_entities, entities)
+    state.intent = "appointment"
+    store.compare_and_set(conversation_id, state.to_dict(), version)
+
+
+def run(turn, rtt_ms: float, threads: int, conversations: int) -> dict:
+    redis = FakeRedis(latency=rtt_ms / 1000)
+    store = RedisStateStore(redis)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(n):
+        local = []
+        for c in range(conversations):
+            conversation_id = f"conv_{n}_{c}"
+            for entities in TURNS:
+                start = time.perf_counter()
+                turn(store, conversation_id, entities)
+                local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    latencies.sort()
+    return {
+        "round_trips_per_turn": redis.round_trips / len(latencies),
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt", type=float, default=0.5, help="Round trip time in ms")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--conversations", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"RTT {args.rtt} ms, {args.threads} threads × {args.conversations} conversations × {len(TURNS)} turns\n")
+    print(f"{'pattern':14s} {'trips/turn':>10s} {'p50 ms':>8s} {'p99 ms':>8s}")
+    for label, turn in [("legacy", legacy_turn), ("merge op", merge_turn), ("unit of work", uow_turn)]:
+        r = run(turn, args.rtt, args.threads, args.conversations)
+        print(f"{label:14s} {r['round_trips_per_turn']:10.1f} {r['p50']:8.2f} {r['p99']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
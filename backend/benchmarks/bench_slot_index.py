@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+"""
+Benchmark: slot bitmap index vs "HH:MM" string lists
+
+A clinic with --doctors doctors over a --days horizon (half-hour grid,
+09:00-18:00), about --fill of all slots booked. Compared:
+
+  strings   per (doctor, day): set of booked "HH:MM", free slots built as a
+            list of strings (how availability worked before the index)
+  bitmap    services.slot_index.SlotIndex: one int mask per (doctor, day)
+
+Measured: memory to hold every doctor's free slots, build time, and four
+queries - one doctor's free slots for a day, "any doctor free" for a day,
+the earliest run of 3 free slots (90-minute service) for every doctor
+over the whole horizon, and every start time where a 60-minute service
+fits, for every doctor and day of the horizon.
+
+Usage (from backend/):
+    python benchmarks/bench_slot_index.py
+    python benchmarks/bench_slot_index.py --doctors 200 --days 180
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.availability_service import AvailabilityService
+from services.slot_index import SlotIndex
+
+RUN = 3  # slots in a 90-minute appointment
+
+
+def make_bookings(doctors: int, days: int, fill: float, start: date):
+    rng = random.Random(11)
+    times = AvailabilityService._slot_times()
+    return [
+        (doctor_id, (start + timedelta(days=d)).isoformat(), time_str)
+        for doctor_id in range(1, doctors + 1)
+        for d in range(days)
+        for time_str in times
+        if rng.random() < fill
+    ]
+
+
+def build_strings(bookings, doctors, days, start):
+    times = AvailabilityService._slot_times()
+    booked = {}
+    for doctor_id, day, time_str in bookings:
+        booked.setdefault((doctor_id, day), set()).add(time_str)
+    free = {}
+    for doctor_id in range(1, doctors + 1):
+        for d in range(days):
+            day = (start + timedelta(days=d)).isoformat()
+            taken = booked.get((doctor_id, day), ())
+            free[(doctor_id, day)] = [t for t in times if t not in taken]
+    return free
+
+
+def build_bitmap(bookings, days, start):
+    index = SlotIndex(AvailabilityService.grid(), start, days)
+    index.add_bookings(bookings)
+    return index
+
+
+def strings_first_runs(free, doctors, days, start):
+    times = AvailabilityService._slot_times()
+    position = {t: i for i, t in enumerate(times)}
+    found = {}
+    for doctor_id in range(1, doctors + 1):
+        for d in range(days):
+            day = (start + timedelta(days=d)).isoformat()
+            slots = [position[t] for t in free[(doctor_id, day)]]
+            hit = next((s for i, s in enumerate(slots)
+                        if i + RUN <= len(slots) and slots[i + RUN - 1] == s + RUN - 1), None)
+            if hit is not None:
+                found[doctor_id] = (day, times[hit])
+                break
+    return found
+
+
+def bitmap_first_runs(index, doctors):
+    grid = index.grid
+    found = {}
+    for doctor_id in range(1, doctors + 1):
+        hit = index.earliest(doctor_id, RUN * grid.width)
+        if hit is not None:
+            found[doctor_id] = (hit[0].isoformat(), grid.label(hit[1]))
+    return found
+
+
+def strings_all_starts(free, doctors, days, start, minutes):
+    times = AvailabilityService._slot_times()
+    position = {t: i for i, t in enumerate(times)}
+    length = AvailabilityService.grid().slots_for(minutes)
+    found = {}
+    for doctor_id in range(1, doctors + 1):
+        for d in range(days):
+            day = (start + timedelta(days=d)).isoformat()
+            open_slots = {position[t] for t in free[(doctor_id, day)]}
+            found[(doctor_id, day)] = [
+                times[s] for s in sorted(open_slots)
+                if all(s + k in open_slots for k in range(length))
+            ]
+    return found
+
+
+def bitmap_all_starts(index, doctors, minutes):
+    grid = index.grid
+    return {
+        (doctor_id, day.isoformat()): grid.times(index.starts(doctor_id, day, minutes))
+        for doctor_id in range(1, doctors + 1)
+        for day in index.dates()
+    }
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def measure_memory(fn):
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--fill", type=float, default=0.6)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    start = date.today() + timedelta(days=1)
+    bookings = make_bookings(args.doctors, args.days, args.fill, start)
+    day = start.isoformat()
+    doctor_ids = range(1, args.doctors + 1)
+    print(f"{args.doctors} doctors × {args.days} days × {AvailabilityService.grid().size} slots, "
+          f"{len(bookings)} bookings\n")
+
+    free, strings_bytes = measure_memory(lambda: build_strings(bookings, args.doctors, args.days, start))
+    index, bitmap_bytes = measure_memory(lambda: build_bitmap(bookings, args.days, start))
+    strings_build, _ = timed(lambda: build_strings(bookings, args.doctors, args.days, start), 3)
+    bitmap_build, _ = timed(lambda: build_bitmap(bookings, args.days, start), 3)
+
+    times = AvailabilityService._slot_times()
+    queries = {
+        "one doctor-day free slots": (
+            lambda: free[(1, day)],
+            lambda: index.free(1, day),
+        ),
+        "any doctor free (day)": (
+            lambda: [t for t in times if any(t in free[(d, day)] for d in doctor_ids)],
+            lambda: index.any_free(doctor_ids, day),
+        ),
+        f"first {RUN}-slot run, all doctors": (
+            lambda: strings_first_runs(free, args.doctors, args.days, start),
+            lambda: bitmap_first_runs(index, args.doctors),
+        ),
+        "60-min starts, all doctor-days": (
+            lambda: strings_all_starts(free, args.doctors, args.days, start, 60),
+            lambda: bitmap_all_starts(index, args.doctors, 60),
+        ),
+    }
+
+    print(f"{'':34s} {'strings':>12s} {'bitmap':>12s}")
+    print(f"{'memory (KB)':34s} {strings_bytes / 1024:12.1f} {bitmap_bytes / 1024:12.1f}"
+          f"   (bitmaps alone: {index.memory_bytes() / 1024:.1f} KB)")
+    print(f"{'build (ms)':34s} {strings_build:12.2f} {bitmap_build:12.2f}")
+    grid = index.grid
+    for label, (strings_fn, bitmap_fn) in queries.items():
+        strings_ms, strings_result = timed(strings_fn, args.repeat)
+        bitmap_ms, bitmap_result = timed(bitmap_fn, args.repeat)
+        if isinstance(bitmap_result, int):
+            assert grid.times(bitmap_result) == list(strings_result), label
+        else:
+            assert bitmap_result == strings_result, label
+        print(f"{label + ' (ms)':34s} {strings_ms:12.4f} {bitmap_ms:12.4f}")
+
+
+if __name__ == "__main__":
+    main()
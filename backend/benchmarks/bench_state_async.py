@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Benchmark: event-loop stalls from state store I/O
+
+Runs concurrent chat turns (load → change → commit) on one event loop
+while a heartbeat task wakes every millisecond and records how late it
+was. Compared per store:
+
+  sync in loop   store.get_versioned / compare_and_set called straight from
+                 the coroutine (a blocking call stalls every other request)
+  async          DialogueUnitOfWork.aload / acommit on the async interface
+
+Stores: SQLite (group commit) and Redis (fake, --rtt ms per round trip,
+native async client).
+
+Usage (from backend/):
+    python benchmarks/bench_state_async.py
+    python benchmarks/bench_state_async.py --rtt 1.0 --concurrency 64
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.dialogue_service import DialogueState, DialogueUnitOfWork
+from services.state_store import RedisStateStore, SQLiteStateStore, set_state_store
+from testing.fake_redis import FakeRedis
+
+TICK = 0.001
+
+
+async def sync_turn(store, conversation_id: str, n: int) -> None:
+    state_dict, version = store.get_versioned(conversation_id)
+    state = DialogueState.from_dict(state_dict) if state_dict else DialogueState(conversation_id)
+    state.collected_entities["time"] = f"{n % 24:02d}:00"
+    store.compare_and_set(conversation_id, state.to_dict(), version)
+
+
+async def async_turn(store, conversation_id: str, n: int) -> None:
+    uow = DialogueUnitOfWork(conversation_id)
+    state = await uow.aload()
+    state.collected_entities["time"] = f"{n % 24:02d}:00"
+    await uow.acommit()
+
+
+async def heartbeat(lags: list, stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(TICK)
+        lags.append((loop.time() - start - TICK) * 1000)
+
+
+async def run(turn, store, concurrency: int, turns: int) -> dict:
+    lags: list = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+
+    async def client(c):
+        for n in range(turns):
+            await turn(store, f"conv_{c}", n)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+
+    lags.sort()
+    return {
+        "turns_per_sec": concurrency * turns / elapsed,
+        "lag_p99": lags[int(len(lags) * 0.99) - 1] if lags else 0.0,
+        "lag_max": lags[-1] if lags else 0.0,
+    }
+
+
+def make_sqlite(tmp: Path, label: str):
+    return SQLiteStateStore(db_path=tmp / f"{label}.db", ttl_seconds=3600, sweep_interval=3600)
+
+
+def make_redis(rtt_ms: float):
+    redis = FakeRedis(latency=rtt_ms / 1000)
+    return RedisStateStore(redis, async_client=redis.async_client())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt", type=float, default=0.5, help="Redis round trip time in ms")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} concurrent conversations × {args.turns} turns, heartbeat every {TICK * 1000:.0f} ms\n")
+    print(f"{'store':8s} {'mode':14s} {'turns/s':>9s} {'lag p99 ms':>11s} {'lag max ms':>11s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for store_label, factory in [
+            ("sqlite", lambda label: make_sqlite(Path(tmp), label)),
+            ("redis", lambda label: make_redis(args.rtt)),
+        ]:
+            for mode, turn in [("sync in loop", sync_turn), ("async", async_turn)]:
+                store = factory(f"{store_label}_{mode.replace(' ', '_')}")
+                set_state_store(store)
+                try:
+                    r = asyncio.run(run(turn, store, args.concurrency, args.turns))
+                finally:
+                    store.close()
+                print(f"{store_label:8s} {mode:14s} {r['turns_per_sec']:9.0f} "
+                      f"{r['lag_p99']:11.2f} {r['lag_max']:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Benchmark: dialogue state serialization, JSON vs compact codec
+
+Measures the full store round trip of a typical mid-booking state:
+DialogueState → to_dict → encode, and decode → from_dict → DialogueState.
+Also compares the original format (ISO created_at parsed with
+fromisoformat on every load) and the per-object memory of the slotted
+DialogueState.
+
+Usage (from backend/):
+    python benchmarks/bench_state_codec.py
+    python benchmarks/bench_state_codec.py --iterations 200000
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.dialogue_service import DialogueState
+from utils.state_codec import CompactCodec, JSONCodec, decode_state
+
+
+def sample_state() -> DialogueState:
+    state = DialogueState("conv_1760781234.123456")
+    state.intent = "appointment"
+    state.slot_to_fill = "customer_phone"
+    state.collected_entities = {
+        "service": "Cleaning", "doctor": "Dr. Wang", "date": "2026-03-14",
+        "time": "14:00", "customer_name": "Maria Lopez",
+    }
+    return state
+
+
+def legacy_encode(state: DialogueState) -> str:
+    """The original format: ISO created_at, JSON text"""
+    return json.dumps({**state.to_dict(), "created_at": state.created_at.isoformat()})
+
+
+def legacy_decode(data: str) -> DialogueState:
+    d = json.loads(data)
+    state = DialogueState(d["conversation_id"])
+    state.intent = d.get("intent")
+    state.collected_entities = d.get("collected_entities", {})
+    state.user_message_count = d.get("user_message_count", 0)
+    state.slot_to_fill = d.get("slot_to_fill")
+    state.created_at = datetime.fromisoformat(d["created_at"])
+    return state
+
+
+def per_call_us(fn, arg, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def object_bytes(count: int) -> float:
+    """Average traced allocation per DialogueState (object + entities dict)"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    states = [sample_state() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del states
+    return total / count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+    n = args.iterations
+    state = sample_state()
+
+    rows = [("legacy JSON (ISO date)", legacy_encode, legacy_decode)]
+    for codec in (JSONCodec(), CompactCodec()):
+        rows.append((
+            f"{codec.name} codec",
+            lambda s, c=codec: c.encode(s.to_dict()),
+            lambda d: DialogueState.from_dict(decode_state(d)),
+        ))
+
+    print(f"{n} iterations, state with 5 entities\n")
+    print(f"{'format':24s} {'bytes':>6s} {'encode µs':>10s} {'decode µs':>10s}")
+    for label, encode, decode in rows:
+        data = encode(state)
+        size = len(data.encode() if isinstance(data, str) else data)
+        print(f"{label:24s} {size:6d} {per_call_us(encode, state, n):10.2f} {per_call_us(decode, data, n):10.2f}")
+
+    print(f"\nDialogueState in memory: ~{object_bytes(10000):.0f} bytes/state (slotted, incl. entities)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Benchmark: dialogue state store throughput under concurrent turns
+
+Each worker thread simulates chat turns (one versioned read + one
+compare-and-set save per turn, as DialogueUnitOfWork does) against:
+  - InMemoryStateStore (single-process baseline)
+  - naive SQLite: new connection + commit per call (rollback journal)
+  - SQLiteStateStore with max_batch=1 (WAL, no group commit)
+  - SQLiteStateStore with group commit
+  - TieredStateStore (L1) over SQLite: write-through, trusted L1, write-behind
+
+Usage (from backend/):
+    python benchmarks/bench_state_store.py
+    python benchmarks/bench_state_store.py --threads 16 --turns 200
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.state_store import InMemoryStateStore, SQLiteStateStore, StateStore, TieredStateStore
+
+STATE = {
+    "intent": "appointment",
+    "entities": {"service": "Cleaning", "doctor": "Dr. Wang", "date": "2026-03-14", "time": "14:00"},
+    "slot_to_fill": "customer_name",
+}
+
+
+class NaiveSQLiteStore(StateStore):
+    """Connection per call, default journal, commit per write"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS states (id TEXT PRIMARY KEY, state TEXT)")
+
+    def get(self, conversation_id):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            row = conn.execute("SELECT state FROM states WHERE id = ?", (conversation_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, conversation_id, state):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            conn.execute("INSERT OR REPLACE INTO states VALUES (?, ?)", (conversation_id, json.dumps(state)))
+
+    def get_versioned(self, conversation_id):
+        return self.get(conversation_id), 0
+
+    def compare_and_set(self, conversation_id, state, expected_version):
+        self.save(conversation_id, state)  # no versioning
+        return True
+
+    def delete(self, conversation_id):
+        pass
+
+    def exists(self, conversation_id):
+        return self.get(conversation_id) is not None
+
+    def clear_all(self):
+        pass
+
+
+def run(store: StateStore, threads: int, turns: int) -> float:
+    """Turns per second across all threads"""
+    def worker(n):
+        for i in range(turns):
+            conversation_id = f"conv_{n}_{i % 10}"
+            _, version = store.get_versioned(conversation_id)
+            store.compare_and_set(conversation_id, STATE, version)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return threads * turns / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    stores = [
+        ("in-memory", InMemoryStateStore()),
+        ("naive sqlite", NaiveSQLiteStore(str(tmp / "naive.db"))),
+        ("sqlite WAL, max_batch=1", SQLiteStateStore(str(tmp / "single.db"), max_batch=1)),
+        ("sqlite WAL, group commit", SQLiteStateStore(str(tmp / "group.db"))),
+        ("L1 + sqlite, probe", TieredStateStore(SQLiteStateStore(str(tmp / "l1.db")))),
+        ("L1 + sqlite, trusted 5s", TieredStateStore(SQLiteStateStore(str(tmp / "l1t.db")), trust_seconds=5)),
+        ("L1 + sqlite, write-behind", TieredStateStore(
+            SQLiteStateStore(str(tmp / "l1wb.db")), write_mode="behind", trust_seconds=5
+        )),
+    ]
+
+    print(f"{args.threads} threads × {args.turns} turns (versioned get + compare-and-set)\n")
+    for label, store in stores:
+        rate = run(store, args.threads, args.turns)
+        extra = ""
+        if isinstance(store, TieredStateStore):
+            store.flush()
+            stats = store.stats()
+            extra = (f"   L1 hit ratio {stats['l1_hit_ratio']:.0%}, "
+                     f"L2 round trips saved {stats['l2_round_trips_saved']}")
+        elif isinstance(store, SQLiteStateStore):
+            extra = f"   avg writes/commit {store.stats()['avg_writes_per_commit']:.1f}"
+        print(f"{label:26s} {rate:9.0f} turns/s{extra}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -27,3 +27,87 @@ CORS_ORIGINS = [
 
 # Environment
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+
+# LLM / NLU configuration
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3.2:3b")
+# Transport used to reach the model: "http" (pooled keep-alive client) or "subprocess" (`ollama run`)
+LLM_TRANSPORT = os.getenv("LLM_TRANSPORT", "http").lower()
+# Fall back to `ollama run` when the model server cannot be reached over HTTP
+LLM_SUBPROCESS_FALLBACK = os.getenv("LLM_SUBPROCESS_FALLBACK", "True").lower() == "true"
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "8"))
+LLM_PRELOAD_ON_STARTUP = os.getenv("LLM_PRELOAD_ON_STARTUP", "True").lower() == "true"
+
+# Rule-based NLU fast path (skips the LLM when confident)
+NLU_FAST_PATH_ENABLED = os.getenv("NLU_FAST_PATH_ENABLED", "True").lower() == "true"
+NLU_FAST_PATH_THRESHOLD = float(os.getenv("NLU_FAST_PATH_THRESHOLD", "0.85"))
+
+# NLU result cache (keyed on normalized message + today's date)
+NLU_CACHE_ENABLED = os.getenv("NLU_CACHE_ENABLED", "True").lower() == "true"
+NLU_CACHE_MAX_ENTRIES = int(os.getenv("NLU_CACHE_MAX_ENTRIES", "10000"))
+NLU_CACHE_TTL_SECONDS = float(os.getenv("NLU_CACHE_TTL_SECONDS", "86400"))
+# Optional on-disk tier (SQLite file) so a warm cache survives restarts; empty = memory only
+NLU_CACHE_DISK_PATH = os.getenv("NLU_CACHE_DISK_PATH", "")
+
+# LLM concurrency limits for the async chat pipeline
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+# Callers allowed to wait for a slot; beyond this they get 503 + Retry-After
+LLM_MAX_QUEUE_DEPTH = int(os.getenv("LLM_MAX_QUEUE_DEPTH", "32"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+LLM_RETRY_AFTER_SECONDS = int(os.getenv("LLM_RETRY_AFTER_SECONDS", "2"))
+
+# Stream model output and stop as soon as the NLU JSON object closes
+NLU_STREAMING_ENABLED = os.getenv("NLU_STREAMING_ENABLED", "False").lower() == "true"
+
+# Parse answers to the slot the planner just asked for without the LLM
+NLU_SLOT_SHORT_CIRCUIT_ENABLED = os.getenv("NLU_SLOT_SHORT_CIRCUIT_ENABLED", "True").lower() == "true"
+
+# Dialogue state store: "memory" (single process) or "sqlite" (persistent, shared)
+STATE_STORE = os.getenv("STATE_STORE", "memory").lower()
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", str(DB_DIR / "dialogue_state.db"))
+# Conversations idle longer than this expire
+STATE_TTL_SECONDS = float(os.getenv("STATE_TTL_SECONDS", "86400"))
+STATE_SWEEP_INTERVAL_SECONDS = float(os.getenv("STATE_SWEEP_INTERVAL_SECONDS", "60"))
+# In-memory store bounds (LRU eviction beyond these; idle TTL = STATE_TTL_SECONDS)
+STATE_MEMORY_MAX_ENTRIES = int(os.getenv("STATE_MEMORY_MAX_ENTRIES", "10000"))
+STATE_MEMORY_MAX_BYTES = int(os.getenv("STATE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+STATE_MEMORY_SHARDS = int(os.getenv("STATE_MEMORY_SHARDS", "16"))
+# Versioned saves: re-apply a turn on top of a concurrent write at most this many times
+STATE_CAS_MAX_RETRIES = int(os.getenv("STATE_CAS_MAX_RETRIES", "3"))
+# Run chat turns of the same conversation one at a time (in-process lock)
+CHAT_SERIALIZE_TURNS = os.getenv("CHAT_SERIALIZE_TURNS", "True").lower() == "true"
+# Serialization for SQLite/Redis state stores: "json" (readable) or "compact" (binary, smaller)
+STATE_CODEC = os.getenv("STATE_CODEC", "json").lower()
+# In-process L1 cache over the persistent state store (STATE_STORE=sqlite)
+STATE_L1_ENABLED = os.getenv("STATE_L1_ENABLED", "False").lower() == "true"
+STATE_L1_MAX_ENTRIES = int(os.getenv("STATE_L1_MAX_ENTRIES", "1024"))
+STATE_L1_WRITE_MODE = os.getenv("STATE_L1_WRITE_MODE", "through").lower()  # through | behind
+# L1 hits younger than this skip the L2 version probe (0 = always probe)
+STATE_L1_TRUST_SECONDS = float(os.getenv("STATE_L1_TRUST_SECONDS", "0"))
+# Threads for blocking state store calls made from async code
+STATE_STORE_EXECUTOR_WORKERS = int(os.getenv("STATE_STORE_EXECUTOR_WORKERS", "8"))
+
+# Clinic database connections (utils/db_utils): pooled, long-lived, tuned pragmas
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+# How long a query waits for a free connection before failing
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "5"))
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL").upper()
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL").upper()
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+# Page cache per connection, in KiB
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Prepared statements kept per connection
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+
+# Clinic database schema migrations (numbered .sql files, applied in order)
+MIGRATIONS_DIR = BACKEND_DIR / "migrations"
+DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "True").lower() == "true"
+
+# Availability cache: busy bitmaps per (doctor, date), invalidated by booking writes
+AVAILABILITY_CACHE_ENABLED = os.getenv("AVAILABILITY_CACHE_ENABLED", "True").lower() == "true"
+# Safety net for writes the cache can't see (other processes, manual SQL)
+AVAILABILITY_CACHE_TTL_SECONDS = float(os.getenv("AVAILABILITY_CACHE_TTL_SECONDS", "300"))
+AVAILABILITY_CACHE_MAX_ENTRIES = int(os.getenv("AVAILABILITY_CACHE_MAX_ENTRIES", "20000"))
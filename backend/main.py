@@ -1,12 +1,15 @@
 """
 Main FastAPI application
 """
+import sqlite3
 import sys
 from pathlib import Path
 
 # Add backend directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -15,20 +18,53 @@ from routes.services import router as services_router
 from routes.doctors import router as doctors_router
 from routes.customers import router as customers_router
 from routes.chat import router as chat_router
+from routes.availability import router as availability_router
+from services.llm_transport import get_transport
+from services.state_store import get_state_store
+from utils.db_utils import close_connection_pool
+from utils.migrations import MigrationError, apply_migrations
 from config.settings import (
     API_TITLE,
     API_VERSION,
     API_DESCRIPTION,
     CORS_ORIGINS,
-    DEBUG
+    DEBUG,
+    LLM_PRELOAD_ON_STARTUP,
+    DB_MIGRATE_ON_STARTUP
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks"""
+    if DB_MIGRATE_ON_STARTUP:
+        try:
+            applied = apply_migrations()
+            if applied:
+                print(f"Applied database migrations: {applied}")
+        except (MigrationError, sqlite3.Error) as e:
+            print(f"Warning: database migration failed: {e}")
+    transport = get_transport()
+    if LLM_PRELOAD_ON_STARTUP:
+        # Load the model once so the first chat turn doesn't pay for it
+        try:
+            transport.preload()
+        except RuntimeError as e:
+            print(f"Warning: LLM preload failed ({transport.name}): {e}")
+    yield
+    transport.close()
+    await transport.aclose()
+    get_state_store().close()
+    close_connection_pool()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=API_TITLE,
     version=API_VERSION,
     description=API_DESCRIPTION,
-    debug=DEBUG
+    debug=DEBUG,
+    lifespan=lifespan
 )
 
 # Configure CORS middleware
@@ -52,6 +88,7 @@ def health_check():
 app.include_router(services_router, prefix="/api/services")
 app.include_router(doctors_router, prefix="/api/doctors")
 app.include_router(customers_router, prefix="/api/customers")
+app.include_router(availability_router, prefix="/api/availability")
 app.include_router(chat_router, prefix="/api")
 
 
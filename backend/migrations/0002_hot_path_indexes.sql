@@ -0,0 +1,33 @@
+-- ===========================
+-- 0002: Indexes for the hot lookups (see HOT_QUERIES in utils/migrations.py)
+-- ===========================
+
+-- Availability: booked (non-cancelled) appointments per doctor/date/time.
+-- Partial: cancelled rows never block a slot, so they stay out of the index
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_slot
+    ON appointments(doctor_id, date, time)
+    WHERE status != 'cancelled';
+
+-- Availability across all doctors
+CREATE INDEX IF NOT EXISTS idx_appointments_slot
+    ON appointments(date, time)
+    WHERE status != 'cancelled';
+
+-- A customer's appointments (history, cancel/modify by customer)
+CREATE INDEX IF NOT EXISTS idx_appointments_customer
+    ON appointments(customer_id, date);
+
+-- Customer lookup by name (phone already has the UNIQUE index)
+CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name);
+
+-- Doctor lookup on the title-stripped, lower-cased name.
+-- The expression must match AppointmentService.find_doctor_by_name exactly
+CREATE INDEX IF NOT EXISTS idx_doctors_name_normalized
+    ON doctors(LOWER(TRIM(REPLACE(REPLACE(REPLACE(name, 'Dr.', ''), 'Dr ', ''), 'Doctor ', ''))));
+
+-- Exact, case-insensitive service lookup
+CREATE INDEX IF NOT EXISTS idx_services_name_lower ON services(LOWER(name));
+
+-- Published slots per doctor and day
+CREATE INDEX IF NOT EXISTS idx_time_slots_doctor_date
+    ON time_slots(doctor_id, date, time);
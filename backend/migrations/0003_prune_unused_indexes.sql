@@ -0,0 +1,17 @@
+-- ===========================
+-- 0003: Keep only indexes a live query uses (see HOT_QUERIES in utils/migrations.py)
+-- ===========================
+
+-- Nothing reads appointments by customer, and time_slots isn't queried:
+-- availability comes from the slot grid and the booked appointments
+DROP INDEX IF EXISTS idx_appointments_customer;
+DROP INDEX IF EXISTS idx_time_slots_doctor_date;
+
+-- Availability is read per date range (SlotIndex.load), never per
+-- (date, time). The clinic-wide range query gets a covering index instead,
+-- so loading a range never touches the table rows (status is listed only
+-- so SQLite can re-check the partial-index condition from the index alone)
+DROP INDEX IF EXISTS idx_appointments_slot;
+CREATE INDEX IF NOT EXISTS idx_appointments_date_range
+    ON appointments(date, doctor_id, time, service_id, status)
+    WHERE status != 'cancelled';
@@ -0,0 +1,70 @@
+"""
+Availability API routes
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from schemas.chat import DoctorAppointmentTime, TimeSlotInfo
+from services.availability_service import AvailabilityService
+from utils.db_utils import DatabaseError, get_by_id
+from utils.exceptions import handle_not_found
+
+router = APIRouter(tags=["availability"])
+
+
+def _resolve_duration(service_id: Optional[int], duration_minutes: Optional[int]) -> Optional[int]:
+    """Explicit duration wins; otherwise the service's (404 if unknown)"""
+    if service_id is not None and duration_minutes is None:
+        duration_minutes = AvailabilityService.service_duration(service_id)
+        if duration_minutes is None:
+            handle_not_found("Service")
+    return duration_minutes
+
+
+@router.get("/", response_model=list[TimeSlotInfo])
+def get_availability(
+    doctor_id: Optional[int] = None,
+    service_id: Optional[int] = None,
+    duration_minutes: Optional[int] = Query(None, ge=1, le=600),
+    days_ahead: int = Query(14, ge=1, le=180)
+):
+    """
+    Open start times per date
+
+    With service_id (or an explicit duration_minutes, which wins) only
+    start times where the whole appointment fits are listed.
+    """
+    if doctor_id is not None and not get_by_id("doctors", doctor_id):
+        handle_not_found("Doctor")
+    try:
+        return AvailabilityService.get_available_dates(
+            doctor_id=doctor_id,
+            days_ahead=days_ahead,
+            duration_minutes=_resolve_duration(service_id, duration_minutes)
+        )
+    except DatabaseError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/earliest", response_model=list[DoctorAppointmentTime])
+def get_earliest_availability(
+    service_id: Optional[int] = None,
+    duration_minutes: Optional[int] = Query(None, ge=1, le=600),
+    limit: int = Query(3, ge=1, le=50),
+    days_ahead: int = Query(60, ge=1, le=365)
+):
+    """
+    Earliest (doctor, date, time) options across every doctor
+
+    For patients with no doctor preference; stops searching once `limit`
+    options are found.
+    """
+    try:
+        return AvailabilityService.get_earliest_available(
+            duration_minutes=_resolve_duration(service_id, duration_minutes),
+            limit=limit,
+            days_ahead=days_ahead
+        )
+    except DatabaseError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -26,28 +26,36 @@ Key Differences from OLD code:
 ✅ Each layer has single responsibility
 ✅ No contradictory protocols in prompts
 """
+import asyncio
 from fastapi import APIRouter, HTTPException, status
 from typing import Optional, Dict, Any
 from datetime import datetime
 from services.llama_service import LlamaService
+from services.llm_limiter import LLMOverloadedError
 from services.planner_service import PlannerService
+from services.slot_parser import parse_slot_answer
 from services.appointment_service import AppointmentService
 from services.availability_service import AvailabilityService
-from services.dialogue_service import (
-    get_or_create_dialogue_state, save_dialogue_state, 
-    merge_entities_with_state
-)
+from services.dialogue_service import DialogueUnitOfWork, conversation_turn
+from utils.db_utils import DatabaseError
 from utils.doctor_validator import normalize_and_validate_doctor
+from utils.metrics import collect_metrics
+from config.settings import NLU_SLOT_SHORT_CIRCUIT_ENABLED, CHAT_SERIALIZE_TURNS
 from schemas.chat import ChatRequest, ChatResponse, AIEntity, AppointmentAvailability
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
 @router.post("/message", response_model=ChatResponse)
-def send_message(message: ChatRequest):
+async def send_message(message: ChatRequest):
     """
     Send a chat message - Clean Architecture Pipeline
     
+    Fully async: the model call waits on the event loop (bounded by the LLM
+    limiter) and blocking DB/store work runs in worker threads, so a burst
+    of chat traffic cannot starve /health or the CRUD endpoints.
+    When the LLM queue is full the caller gets 503 + Retry-After.
+    
     Pipeline:
     1️⃣ NLU: Extract what user said (intent + entities)
     2️⃣ Planner: Decide next action (ask for slot or execute)
@@ -65,145 +73,208 @@ def send_message(message: ChatRequest):
         # Setup
         conversation_id = message.conversation_id or f"conv_{datetime.now().timestamp()}"
         
-        # ═══════════════════════════════════════════════════════
-        # 1️⃣ NLU LAYER: Extract intent and entities
-        # ═══════════════════════════════════════════════════════
-        nlu_result = LlamaService.parse_user_input(message.content)
-        
-        # ═══════════════════════════════════════════════════════
-        # 2️⃣ DIALOGUE STATE: Merge with conversation history
-        # ═══════════════════════════════════════════════════════
-        # NOTE: merge_entities_with_state() now AUTOMATICALLY saves to state
-        # This ensures multi-turn context is preserved
-        dialogue_state = get_or_create_dialogue_state(conversation_id)
-        merged_entities = merge_entities_with_state(
-            nlu_result.entities,
-            conversation_id
+        # Turns of one conversation run one at a time (double-send, retries);
+        # different conversations still run in parallel
+        if CHAT_SERIALIZE_TURNS:
+            async with conversation_turn(conversation_id):
+                return await _process_turn(message, conversation_id)
+        return await _process_turn(message, conversation_id)
+    
+    except LLMOverloadedError as e:
+        # Backpressure: fail fast instead of piling up behind the model
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
         )
-        
-        # ═══════════════════════════════════════════════════════
-        # 3️⃣ VALIDATION: Check doctor validity
-        # ═══════════════════════════════════════════════════════
-        if merged_entities.get("doctor"):
-            validation = normalize_and_validate_doctor(merged_entities["doctor"])
-            if not validation.valid:
-                # Invalid doctor mention - respond with error
-                dialogue_state.intent = nlu_result.intent
-                dialogue_state.collected_entities = merged_entities
-                save_dialogue_state(dialogue_state)
-                
-                return ChatResponse(
-                    message_id=f"msg_{datetime.now().timestamp()}",
-                    user_id=message.user_id,
-                    conversation_id=conversation_id,
-                    bot_response=validation.message,
-                    timestamp=datetime.now().isoformat(),
-                    action_result={"action": "validation", "success": False, "message": validation.message}
-                )
-            merged_entities["doctor"] = validation.doctor
-        
-        # ═══════════════════════════════════════════════════════
-        # 4️⃣ SAVE INTENT TO STATE (Critical for multi-turn)
-        # ═══════════════════════════════════════════════════════
-        # Intent is the "main thread" - must persist across turns
-        dialogue_state.intent = nlu_result.intent
-        save_dialogue_state(dialogue_state)
-        
-        # ═══════════════════════════════════════════════════════
-        # 5️⃣ PLANNER: Decide what to do next
-        # ═══════════════════════════════════════════════════════
-        planner_decision = PlannerService.plan_next_action(
-            intent=nlu_result.intent,
-            collected_entities=merged_entities
+    
+    except Exception as e:
+        return ChatResponse(
+            message_id=f"msg_{datetime.now().timestamp()}",
+            user_message=message.content,
+            conversation_id=message.conversation_id or "unknown",
+            bot_response=f"I encountered an error processing your request: {str(e)}",
+            timestamp=datetime.now().isoformat(),
+            intent="other",
+            confidence=0.0,
+            entities={},
+            action_result={"action": "error", "success": False, "message": str(e)}
         )
-        
-        # ═══════════════════════════════════════════════════════
-        # 6️⃣ EXECUTE or PLAN
-        # ═══════════════════════════════════════════════════════
-        action_result = None
-        
-        if planner_decision.action == "ask_for_slot":
-            # Not ready yet - ask for the slot
-            action_result = {
-                "action": "ask_for_slot",
-                "slot": planner_decision.slot_to_fill,
-                "success": False,
-                "message": planner_decision.message
-            }
-            bot_response = planner_decision.message
-        
-        elif planner_decision.action == "execute_booking":
-            # Ready to execute - do the business logic
-            action_result = _execute_business_logic(
+
+
+async def _process_turn(message: ChatRequest, conversation_id: str) -> ChatResponse:
+    """Run one chat turn: NLU → state merge → validation → planner → action"""
+    # One load now, one (or no) save at the end of the turn
+    uow = DialogueUnitOfWork(conversation_id)
+    dialogue_state = await uow.aload()
+    
+    # ═══════════════════════════════════════════════════════
+    # 1️⃣ NLU LAYER: Extract intent and entities
+    # ═══════════════════════════════════════════════════════
+    # Answer to the slot we just asked for? Parse it without the model
+    nlu_result = None
+    if NLU_SLOT_SHORT_CIRCUIT_ENABLED:
+        nlu_result = parse_slot_answer(
+            dialogue_state.slot_to_fill, message.content, dialogue_state.intent
+        )
+    if nlu_result is None:
+        nlu_result = await LlamaService.aparse_user_input(message.content)
+    
+    # ═══════════════════════════════════════════════════════
+    # 2️⃣ DIALOGUE STATE: Merge with conversation history
+    # ═══════════════════════════════════════════════════════
+    # Merged in memory; persisted by the single commit below
+    merged_entities = uow.merge_entities(nlu_result.entities)
+    
+    # ═══════════════════════════════════════════════════════
+    # 3️⃣ VALIDATION: Check doctor validity
+    # ═══════════════════════════════════════════════════════
+    if merged_entities.get("doctor"):
+        validation = normalize_and_validate_doctor(merged_entities["doctor"])
+        if not validation.valid:
+            # Invalid doctor mention - respond with error
+            dialogue_state.intent = nlu_result.intent
+            await uow.acommit()
+            
+            return ChatResponse(
+                message_id=f"msg_{datetime.now().timestamp()}",
+                user_message=message.content,
+                conversation_id=conversation_id,
+                bot_response=validation.message,
+                timestamp=datetime.now().isoformat(),
                 intent=nlu_result.intent,
+                confidence=nlu_result.confidence,
                 entities=merged_entities,
-                user_id=message.user_id
+                action_result={"action": "validation", "success": False, "message": validation.message}
             )
-            bot_response = _generate_response_from_action(action_result)
-        
-        elif planner_decision.action == "provide_info":
-            # Information query
-            action_result = {
-                "action": "provide_info",
-                "success": True,
-                "message": "Information provided"
-            }
-            bot_response = planner_decision.message
-        
-        else:
-            # Unknown action
-            bot_response = planner_decision.message
-            action_result = {
-                "action": planner_decision.action,
-                "success": False,
-                "message": planner_decision.message
-            }
-        
-        # ═══════════════════════════════════════════════════════
-        # 7️⃣ AVAILABILITY (optional - for appointment booking)
-        # ═══════════════════════════════════════════════════════
-        availability = None
-        if nlu_result.intent == "appointment" and planner_decision.slot_to_fill == "time":
-            doctor_id = None
-            if merged_entities.get("doctor"):
-                doctor = AppointmentService.find_doctor_by_name(merged_entities["doctor"])
-                if doctor:
-                    doctor_id = doctor.get('id')
-            
-            available_dates = AvailabilityService.get_available_dates(
-                doctor_id=doctor_id,
-                days_ahead=14
+        merged_entities["doctor"] = validation.doctor
+    
+    # ═══════════════════════════════════════════════════════
+    # 4️⃣ PLANNER: Decide what to do next
+    # ═══════════════════════════════════════════════════════
+    planner_decision = PlannerService.plan_next_action(
+        intent=nlu_result.intent,
+        collected_entities=merged_entities
+    )
+    
+    # ═══════════════════════════════════════════════════════
+    # 5️⃣ SAVE INTENT + PENDING SLOT TO STATE (Critical for multi-turn)
+    # ═══════════════════════════════════════════════════════
+    # Intent is the "main thread" - must persist across turns
+    dialogue_state.intent = nlu_result.intent
+    dialogue_state.slot_to_fill = (
+        planner_decision.slot_to_fill if planner_decision.action == "ask_for_slot" else None
+    )
+    await uow.acommit()
+    
+    # ═══════════════════════════════════════════════════════
+    # 6️⃣ EXECUTE or PLAN
+    # ═══════════════════════════════════════════════════════
+    action_result = None
+    
+    if planner_decision.action == "ask_for_slot":
+        # Not ready yet - ask for the slot
+        action_result = {
+            "action": "ask_for_slot",
+            "slot": planner_decision.slot_to_fill,
+            "success": False,
+            "message": planner_decision.message
+        }
+        bot_response = planner_decision.message
+    
+    elif planner_decision.action == "execute_booking":
+        # Ready to execute - do the business logic
+        action_result = await asyncio.to_thread(
+            _execute_business_logic,
+            intent=nlu_result.intent,
+            entities=merged_entities,
+            user_id=message.user_id
+        )
+        bot_response = _generate_response_from_action(action_result)
+    
+    elif planner_decision.action == "provide_info":
+        # Information query
+        action_result = {
+            "action": "provide_info",
+            "success": True,
+            "message": "Information provided"
+        }
+        bot_response = planner_decision.message
+    
+    else:
+        # Unknown action
+        bot_response = planner_decision.message
+        action_result = {
+            "action": planner_decision.action,
+            "success": False,
+            "message": planner_decision.message
+        }
+    
+    # ═══════════════════════════════════════════════════════
+    # 7️⃣ AVAILABILITY (optional - for appointment booking)
+    # ═══════════════════════════════════════════════════════
+    availability = None
+    if nlu_result.intent == "appointment" and planner_decision.slot_to_fill == "time":
+        try:
+            available_dates = await asyncio.to_thread(
+                _lookup_availability,
+                merged_entities.get("doctor"),
+                merged_entities.get("service"),
+                merged_entities.get("part_of_day")
             )
-            
+        except DatabaseError as e:
+            # Offer nothing rather than guess: the turn still asks for a time
+            print(f"Error loading availability: {e}")
+        else:
             availability = AppointmentAvailability(
                 available_dates=available_dates,
                 last_updated=datetime.now().isoformat()
             )
-        
-        # ═══════════════════════════════════════════════════════
-        # 8️⃣ RETURN RESPONSE
-        # ═══════════════════════════════════════════════════════
-        # 8️⃣ RETURN RESPONSE
-        # ═══════════════════════════════════════════════════════
-        return ChatResponse(
-            message_id=f"msg_{datetime.now().timestamp()}",
-            user_id=message.user_id,
-            conversation_id=conversation_id,
-            bot_response=bot_response,
-            timestamp=datetime.now().isoformat(),
-            action_result=action_result,
-            availability=availability
-        )
     
-    except Exception as e:
-        return ChatResponse(
-            message_id=f"msg_{datetime.now().timestamp()}",
-            user_id=message.user_id,
-            conversation_id=message.conversation_id or "unknown",
-            bot_response=f"I encountered an error processing your request: {str(e)}",
-            timestamp=datetime.now().isoformat(),
-            action_result={"action": "error", "success": False, "message": str(e)}
-        )
+    # ═══════════════════════════════════════════════════════
+    # 8️⃣ RETURN RESPONSE
+    # ═══════════════════════════════════════════════════════
+    return ChatResponse(
+        message_id=f"msg_{datetime.now().timestamp()}",
+        user_message=message.content,
+        conversation_id=conversation_id,
+        bot_response=bot_response,
+        timestamp=datetime.now().isoformat(),
+        intent=nlu_result.intent,
+        confidence=nlu_result.confidence,
+        entities=merged_entities,
+        action_result=action_result,
+        availability=availability
+    )
+
+
+def _lookup_availability(
+    doctor_name: Optional[str],
+    service_name: Optional[str] = None,
+    part_of_day: Optional[str] = None
+) -> list:
+    """
+    Resolve the doctor and service (if any) and list start times that fit,
+    narrowed to the part of day the user asked for (blocking DB work)
+    """
+    doctor_id = None
+    if doctor_name:
+        doctor = AppointmentService.find_doctor_by_name(doctor_name)
+        if doctor:
+            doctor_id = doctor.get('id')
+    
+    duration_minutes = None
+    if service_name:
+        service = AppointmentService.find_service_by_name(service_name)
+        if service:
+            duration_minutes = service.get('duration_minutes')
+    
+    return AvailabilityService.get_available_dates(
+        doctor_id=doctor_id,
+        days_ahead=14,
+        duration_minutes=duration_minutes,
+        part_of_day=part_of_day
+    )
 
 
 def _execute_business_logic(
@@ -381,6 +452,12 @@ def delete_conversation(conversation_id: str):
     }
 
 
+@router.get("/metrics")
+def chat_metrics():
+    """Pipeline counters (NLU fast path, caches, stores)"""
+    return collect_metrics()
+
+
 @router.get("/health")
 def chat_health():
     """Check chat service health"""
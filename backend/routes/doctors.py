@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException, status
 from schemas import DoctorSchema
 from utils.db_utils import execute_query, execute_update, get_by_id, DatabaseError
 from utils.exceptions import handle_not_found, handle_invalid_input
+from services.rule_nlu import reload_rule_nlu
 
 router = APIRouter(tags=["doctors"])
 
@@ -37,6 +38,7 @@ def create_doctor(doctor: DoctorSchema):
             VALUES (?, ?, ?, ?)
         """
         execute_update(query, (doctor.name, doctor.specialization, doctor.phone, doctor.email))
+        reload_rule_nlu()
         return doctor
     except DatabaseError as e:
         handle_invalid_input(f"Failed to create doctor: {str(e)}")
@@ -55,6 +57,7 @@ def update_doctor(doctor_id: int, doctor: DoctorSchema):
             WHERE id=?
         """
         execute_update(query, (doctor.name, doctor.specialization, doctor.phone, doctor.email, doctor_id))
+        reload_rule_nlu()
         return get_by_id("doctors", doctor_id)
     except DatabaseError as e:
         handle_invalid_input(f"Failed to update doctor: {str(e)}")
@@ -69,5 +72,6 @@ def delete_doctor(doctor_id: int):
     try:
         query = "DELETE FROM doctors WHERE id=?"
         execute_update(query, (doctor_id,))
+        reload_rule_nlu()
     except DatabaseError as e:
         handle_invalid_input(f"Failed to delete doctor: {str(e)}")
@@ -5,6 +5,8 @@ from fastapi import APIRouter, HTTPException, status
 from schemas import ServiceSchema
 from utils.db_utils import execute_query, execute_update, get_by_id, DatabaseError
 from utils.exceptions import handle_not_found, handle_invalid_input
+from services.rule_nlu import reload_rule_nlu
+from services.availability_cache import clear_availability
 
 router = APIRouter(tags=["services"])
 
@@ -37,6 +39,7 @@ def create_service(service: ServiceSchema):
             VALUES (?, ?, ?, ?, ?)
         """
         execute_update(query, (service.name, service.description, service.duration_minutes, service.price, service.doctor_id))
+        reload_rule_nlu()
         return service
     except DatabaseError as e:
         handle_invalid_input(f"Failed to create service: {str(e)}")
@@ -55,6 +58,8 @@ def update_service(service_id: int, service: ServiceSchema):
             WHERE id=?
         """
         execute_update(query, (service.name, service.description, service.duration_minutes, service.price, service.doctor_id, service_id))
+        reload_rule_nlu()
+        clear_availability()  # booked slots span the service's duration
         return get_by_id("services", service_id)
     except DatabaseError as e:
         handle_invalid_input(f"Failed to update service: {str(e)}")
@@ -69,5 +74,7 @@ def delete_service(service_id: int):
     try:
         query = "DELETE FROM services WHERE id=?"
         execute_update(query, (service_id,))
+        reload_rule_nlu()
+        clear_availability()
     except DatabaseError as e:
         handle_invalid_input(f"Failed to delete service: {str(e)}")
@@ -26,6 +26,9 @@ class AIEntity(BaseModel):
     customer_name: Optional[str] = Field(None, description="Customer name")
     customer_phone: Optional[str] = Field(None, description="Phone number")
     customer_email: Optional[str] = Field(None, description="Email address")
+    part_of_day: Optional[str] = Field(
+        None, description="morning/afternoon/evening/tonight - narrows offered times, never a time itself"
+    )
     
     @validator('date')
     def validate_date(cls, v):
@@ -149,6 +152,13 @@ class AvailableAppointmentTime(BaseModel):
     time: str = Field(..., description="Time in HH:MM format")
 
 
+class DoctorAppointmentTime(AvailableAppointmentTime):
+    """Available appointment time with the doctor who is free then"""
+    doctor_id: int = Field(..., description="Doctor ID")
+    doctor_name: Optional[str] = Field(None, description="Doctor name")
+    day_of_week: Optional[str] = Field(None, description="Day of week (e.g., Monday)")
+
+
 class AppointmentAvailability(BaseModel):
     """Appointment availability data for frontend calendar"""
     available_dates: List[TimeSlotInfo] = Field(
@@ -0,0 +1,26 @@
+"""
+NLU output schemas
+Shared by the LLM parser and the rule-based fast path
+"""
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+
+
+class LlamaEntity(BaseModel):
+    """Entities extracted by Llama"""
+    service: Optional[str] = None
+    doctor: Optional[str] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    customer_name: Optional[str] = None
+    customer_phone: Optional[str] = None
+    customer_email: Optional[str] = None
+    part_of_day: Optional[str] = None
+
+
+class LlamaResponse(BaseModel):
+    """Response from Llama NLU parser"""
+    intent: str
+    confidence: float
+    entities: Dict[str, Any]
+    raw_input: Optional[str] = None
@@ -4,7 +4,8 @@ Handles booking, cancellation, and modification without touching AI
 """
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
-from utils.db_utils import execute_query, execute_update, get_by_id, DatabaseError
+from utils.db_utils import execute_query, execute_update, get_by_id, transaction, DatabaseError
+from services.availability_cache import invalidate_availability
 
 
 class AppointmentService:
@@ -80,6 +81,12 @@ class AppointmentService:
             return None
         
         try:
+            # Exact (indexed) match first; substring match only if that misses
+            query = "SELECT * FROM services WHERE LOWER(name) = LOWER(?)"
+            results = execute_query(query, (service_name.strip(),))
+            if results:
+                return results[0]
+            
             query = "SELECT * FROM services WHERE LOWER(name) LIKE LOWER(?)"
             results = execute_query(query, (f"%{service_name}%",))
             return results[0] if results else None
@@ -124,56 +131,36 @@ class AppointmentService:
         Returns:
             Customer ID or None
         """
-        # Try to find by phone if provided
-        if phone:
-            customer = AppointmentService.find_customer_by_phone(phone)
-            if customer:
-                return customer.get('id')
-        
-        # Try to find by name if provided
-        if name:
-            query = "SELECT id FROM customers WHERE name = ? LIMIT 1"
-            result = execute_query(query, (name,))
-            if result:
-                return result[0]['id']
-        
         # Create new customer if we have AT LEAST name OR phone
         # (not requiring both - just need one identifier)
-        if name or phone:
-            try:
+        if not (name or phone):
+            return None
+        
+        try:
+            # Lookups and the insert share one transaction: one commit, and
+            # RETURNING hands back the new id without a second query
+            with transaction(immediate=True) as tx:
+                # Try to find by phone if provided
+                if phone:
+                    customer = tx.query_one("SELECT id FROM customers WHERE phone = ?", (phone,))
+                    if customer:
+                        return customer['id']
+                
+                # Try to find by name if provided
+                if name:
+                    customer = tx.query_one("SELECT id FROM customers WHERE name = ? LIMIT 1", (name,))
+                    if customer:
+                        return customer['id']
+                
                 query = """
                     INSERT INTO customers (name, phone, email)
                     VALUES (?, ?, ?)
+                    RETURNING id
                 """
-                execute_update(query, (name or "", phone or "", email or ""))
-                
-                # After insert, query for the newly created customer
-                # Try phone first (more unique), then name
-                if phone and phone.strip():  # Only if phone is not empty
-                    customer = AppointmentService.find_customer_by_phone(phone)
-                    if customer:
-                        return customer.get('id')
-                
-                # Fallback to name query
-                if name and name.strip():
-                    query = "SELECT id FROM customers WHERE name = ? LIMIT 1"
-                    result = execute_query(query, (name,))
-                    if result:
-                        return result[0]['id']
-                
-                # If we still can't find it, query by any matching name/phone
-                # This handles edge cases where the initial queries failed
-                if name:
-                    query = "SELECT id FROM customers WHERE name LIKE ? ORDER BY id DESC LIMIT 1"
-                    result = execute_query(query, (name.strip(),))
-                    if result:
-                        return result[0]['id']
-                        
-            except DatabaseError as e:
-                print(f"DEBUG: DatabaseError in find_or_create_customer: {e}")
-                return None
-        
-        return None
+                return tx.query_one(query, (name or "", phone or "", email or ""))['id']
+        except DatabaseError as e:
+            print(f"DEBUG: DatabaseError in find_or_create_customer: {e}")
+            return None
     
     @staticmethod
     def is_slot_available(
@@ -238,33 +225,30 @@ class AppointmentService:
                 "errors": ["slot_unavailable"]
             }
         
-        # Verify doctor and service exist
-        doctor = get_by_id("doctors", doctor_id)
-        service = get_by_id("services", service_id)
-        
-        if not doctor or not service:
-            return {
-                "success": False,
-                "message": "Invalid doctor or service",
-                "errors": ["invalid_doctor_or_service"]
-            }
-        
         try:
-            # Insert appointment
-            query = """
-                INSERT INTO appointments (service_id, customer_id, doctor_id, date, time, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """
-            execute_update(query, (service_id, customer_id, doctor_id, appointment_date, appointment_time, status))
-            
-            # Get the appointment ID (last inserted)
-            query = """
-                SELECT id FROM appointments
-                WHERE customer_id = ? AND doctor_id = ? AND date = ? AND time = ?
-                ORDER BY id DESC LIMIT 1
-            """
-            result = execute_query(query, (customer_id, doctor_id, appointment_date, appointment_time))
-            appointment_id = result[0].get('id') if result else None
+            with transaction(immediate=True) as tx:
+                # Verify doctor and service exist
+                doctor = tx.get_by_id("doctors", doctor_id)
+                service = tx.get_by_id("services", service_id)
+                
+                if not doctor or not service:
+                    return {
+                        "success": False,
+                        "message": "Invalid doctor or service",
+                        "errors": ["invalid_doctor_or_service"]
+                    }
+                
+                # Insert appointment (RETURNING gives the new id in the same statement)
+                query = """
+                    INSERT INTO appointments (service_id, customer_id, doctor_id, date, time, status)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    RETURNING id
+                """
+                appointment_id = tx.query_one(
+                    query, (service_id, customer_id, doctor_id, appointment_date, appointment_time, status)
+                )['id']
+            # After commit: a concurrent availability load can't re-cache the old day
+            invalidate_availability(doctor_id, appointment_date)
             
             return {
                 "success": True,
@@ -298,27 +282,29 @@ class AppointmentService:
                 "errors": ["appointment_id_required"]
             }
         
-        # Check if appointment exists
-        appointment = get_by_id("appointments", appointment_id)
-        if not appointment:
-            return {
-                "success": False,
-                "message": f"Appointment {appointment_id} not found",
-                "errors": ["appointment_not_found"]
-            }
-        
-        # Check if already cancelled
-        if appointment.get('status') == 'cancelled':
-            return {
-                "success": False,
-                "message": "Appointment already cancelled",
-                "errors": ["already_cancelled"]
-            }
-        
         try:
-            # Update status to cancelled
-            query = "UPDATE appointments SET status = ? WHERE id = ?"
-            execute_update(query, ("cancelled", appointment_id))
+            with transaction(immediate=True) as tx:
+                # Check if appointment exists
+                appointment = tx.get_by_id("appointments", appointment_id)
+                if not appointment:
+                    return {
+                        "success": False,
+                        "message": f"Appointment {appointment_id} not found",
+                        "errors": ["appointment_not_found"]
+                    }
+                
+                # Check if already cancelled
+                if appointment.get('status') == 'cancelled':
+                    return {
+                        "success": False,
+                        "message": "Appointment already cancelled",
+                        "errors": ["already_cancelled"]
+                    }
+                
+                # Update status to cancelled
+                query = "UPDATE appointments SET status = ? WHERE id = ?"
+                tx.execute(query, ("cancelled", appointment_id))
+            invalidate_availability(appointment.get('doctor_id'), appointment.get('date'))
             
             return {
                 "success": True,
@@ -388,6 +374,9 @@ class AppointmentService:
                 WHERE id = ?
             """
             execute_update(query, (date_to_use, time_to_use, doctor_to_use, appointment_id))
+            # Both the slot given up and the slot taken
+            invalidate_availability(appointment.get('doctor_id'), appointment.get('date'))
+            invalidate_availability(doctor_to_use, date_to_use)
             
             return {
                 "success": True,
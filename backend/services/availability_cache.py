@@ -0,0 +1,231 @@
+"""
+Availability Cache
+
+Busy bitmaps (see services/slot_index.py) cached per (doctor_id, date), so
+"which times are free?" turns are answered without touching SQLite.
+
+Availability only changes when an appointment is written, so the write
+paths in AppointmentService call invalidate(doctor_id, date) for every
+(doctor, date) they touch:
+
+  📅 book:    the booked doctor/date
+  ❌ cancel:  the cancelled appointment's doctor/date
+  ✏️ modify:  the old and the new doctor/date
+
+Busy masks also depend on service durations, so editing or deleting a
+service clears the whole cache (clear_availability).
+
+Key (None, date) holds the clinic-wide mask (anyone busy); any write on a
+date invalidates it too. The TTL is only a safety net for writes made
+outside this process.
+
+A load racing with a write can't cache what it read: entries for a date
+invalidated after the load started are returned but not stored.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import (
+    AVAILABILITY_CACHE_ENABLED,
+    AVAILABILITY_CACHE_MAX_ENTRIES,
+    AVAILABILITY_CACHE_TTL_SECONDS,
+)
+from services.slot_index import SlotGrid, SlotIndex
+from utils.metrics import Counters, register_metrics
+
+CacheKey = Tuple[Optional[int], str]
+
+
+class AvailabilityCache:
+    """
+    LRU + TTL cache of busy masks keyed by (doctor_id, "YYYY-MM-DD")
+
+    Args:
+        max_entries: Capacity; least recently used entries are evicted
+        ttl_seconds: Entries older than this are reloaded
+    """
+
+    def __init__(
+        self,
+        max_entries: int = AVAILABILITY_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = AVAILABILITY_CACHE_TTL_SECONDS
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._grid: Optional[SlotGrid] = None
+        # Invalidation sequence: global counter, last value per date (one
+        # small int per date ever written) and the value at the last clear()
+        self._seq = 0
+        self._invalidated: Dict[str, int] = {}
+        self._cleared_seq = 0
+        self.counters = Counters(
+            "hits", "misses", "loads", "invalidations", "expirations", "evictions", "stale_loads_dropped"
+        )
+
+    # ═══════════════════════════════════════════════════════
+    # Public API
+    # ═══════════════════════════════════════════════════════
+
+    def load_index(
+        self,
+        grid: SlotGrid,
+        doctor_id: Optional[int],
+        start_date: date,
+        end_date: date
+    ) -> SlotIndex:
+        """
+        SlotIndex for a doctor (or the clinic, doctor_id None) over a range
+
+        Cached days are filled in directly; the missing ones are loaded with
+        one range query spanning them.
+        """
+        return self._load(grid, [doctor_id], start_date, end_date, doctor_id)
+
+    def load_doctors(
+        self,
+        grid: SlotGrid,
+        doctor_ids,
+        start_date: date,
+        end_date: date
+    ) -> SlotIndex:
+        """
+        SlotIndex with a row for each of several doctors over a range
+
+        Shares entries with load_index(); days missing for any of the
+        doctors are loaded with one clinic-wide range query.
+        """
+        return self._load(grid, list(doctor_ids), start_date, end_date, None)
+
+    def invalidate(self, doctor_id: Optional[int], day) -> None:
+        """Forget a doctor's day and the clinic-wide view of that day"""
+        day = day.isoformat() if isinstance(day, date) else str(day)
+        with self._lock:
+            self._seq += 1
+            self._invalidated[day] = self._seq
+            self._entries.pop((None, day), None)
+            if doctor_id is not None:
+                self._entries.pop((doctor_id, day), None)
+        self.counters.incr("invalidations")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seq += 1
+            self._cleared_seq = self._seq
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        c = self.counters.snapshot()
+        lookups = c["hits"] + c["misses"]
+        return {
+            **c,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": c["hits"] / lookups if lookups else 0.0,
+        }
+
+    # ═══════════════════════════════════════════════════════
+    # Loading
+    # ═══════════════════════════════════════════════════════
+
+    def _load(self, grid, doctor_ids, start_date, end_date, query_doctor_id) -> SlotIndex:
+        """Fill rows for doctor_ids from the cache, querying the missing days once"""
+        index = SlotIndex(grid, start_date, (end_date - start_date).days + 1)
+        missing = []
+        hits = 0
+        now = time.monotonic()
+        with self._lock:
+            if grid is not self._grid:
+                self._entries.clear()  # masks are only meaningful on their grid
+                self._grid = grid
+            for day in index.dates():
+                masks = [self._lookup((doctor_id, day.isoformat()), now) for doctor_id in doctor_ids]
+                if None in masks:
+                    missing.append(day)
+                for doctor_id, mask in zip(doctor_ids, masks):
+                    if mask is not None:
+                        index.set_busy(doctor_id, day, mask)
+                        hits += 1
+            started = self._seq
+        self.counters.incr("hits", hits)
+        self.counters.incr("misses", index.days * len(doctor_ids) - hits)
+        if not missing:
+            return index
+
+        loaded = SlotIndex.load(grid, missing[0], missing[-1], query_doctor_id)
+        self.counters.incr("loads")
+        now = time.monotonic()
+        with self._lock:
+            for day in missing:
+                stale = max(self._invalidated.get(day.isoformat(), 0), self._cleared_seq) > started
+                if stale:
+                    self.counters.incr("stale_loads_dropped")
+                for doctor_id in doctor_ids:
+                    mask = loaded.busy(doctor_id, day)
+                    index.set_busy(doctor_id, day, mask)
+                    if not stale:
+                        self._store((doctor_id, day.isoformat()), now, mask)
+        return index
+
+    # ═══════════════════════════════════════════════════════
+    # Internals (caller holds the lock)
+    # ═══════════════════════════════════════════════════════
+
+    def _lookup(self, key: CacheKey, now: float) -> Optional[int]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        loaded_at, mask = item
+        if now - loaded_at > self.ttl_seconds:
+            del self._entries[key]
+            self.counters.incr("expirations")
+            return None
+        self._entries.move_to_end(key)
+        return mask
+
+    def _store(self, key: CacheKey, loaded_at: float, mask: int) -> None:
+        self._entries[key] = (loaded_at, mask)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters.incr("evictions")
+
+
+# Global cache instance (None when disabled)
+_availability_cache: Optional[AvailabilityCache] = (
+    AvailabilityCache() if AVAILABILITY_CACHE_ENABLED else None
+)
+
+
+def set_availability_cache(cache: Optional[AvailabilityCache]) -> None:
+    """Replace (or disable with None) the availability cache"""
+    global _availability_cache
+    _availability_cache = cache
+
+
+def get_availability_cache() -> Optional[AvailabilityCache]:
+    """Get current availability cache (None when disabled)"""
+    return _availability_cache
+
+
+def invalidate_availability(doctor_id: Optional[int], day) -> None:
+    """Call after any appointment write touching (doctor_id, day)"""
+    if _availability_cache is not None and day:
+        _availability_cache.invalidate(doctor_id, day)
+
+
+def clear_availability() -> None:
+    """Call after writes that change many days at once (e.g. a service's duration)"""
+    if _availability_cache is not None:
+        _availability_cache.clear()
+
+
+def _cache_stats() -> Dict[str, Any]:
+    return _availability_cache.stats() if _availability_cache is not None else {"enabled": False}
+
+
+register_metrics("availability_cache", _cache_stats)
@@ -2,9 +2,15 @@
 Availability management service
 Generates available dates and time slots for doctors
 """
-from datetime import datetime, timedelta, date
-from typing import List, Dict, Any, Optional
-from utils.db_utils import execute_query
+from datetime import timedelta, date
+from typing import List, Dict, Any, Optional, Tuple
+from services.appointment_service import AppointmentService
+from services.availability_cache import get_availability_cache
+from services.slot_index import SlotGrid, SlotIndex
+from utils.db_utils import get_by_id
+
+# (start hour, end hour, slot minutes) → grid
+_grids: Dict[Tuple[int, int, int], SlotGrid] = {}
 
 
 class AvailabilityService:
@@ -15,17 +21,38 @@ class AvailabilityService:
     BUSINESS_HOURS_END = 18
     SLOT_DURATION_MINUTES = 30  # 30-minute slots
     
+    # Earliest-available search loads bookings this many days at a time
+    EARLIEST_WINDOW_DAYS = 7
+    
+    # Start hours (from, to) a part-of-day hint narrows offered times to
+    PART_OF_DAY_HOURS = {
+        "morning": (9, 12),
+        "afternoon": (12, 17),
+        "evening": (17, 24),
+        "tonight": (17, 24),
+    }
+    
     @staticmethod
     def get_available_dates(
         doctor_id: Optional[int] = None,
-        days_ahead: int = 14
+        days_ahead: int = 14,
+        duration_minutes: Optional[int] = None,
+        part_of_day: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Get available dates for appointment booking
         
+        Bookings for the whole range are loaded with one indexed range query
+        into a slot bitmap index; "HH:MM" strings are only built here.
+        
         Args:
             doctor_id: Doctor ID (optional). If provided, check doctor's specific availability
             days_ahead: Number of days to look ahead (default 14 days)
+            duration_minutes: Length of the appointment (optional). Only start
+                times where the whole duration fits before closing and
+                overlaps no booking are returned; default one slot
+            part_of_day: morning/afternoon/evening/tonight (optional) - only
+                start times in that part of the day are offered
             
         Returns:
             List of dates with available time slots
@@ -38,33 +65,189 @@ class AvailabilityService:
                 ...
             ]
         """
-        available_dates = []
         today = date.today()
         
-        # Generate slots for next N days (skip weekends)
-        for i in range(1, days_ahead + 1):
-            check_date = today + timedelta(days=i)
-            
-            # Skip weekends (Monday=0, Sunday=6)
-            if check_date.weekday() >= 5:  # Saturday=5, Sunday=6
-                continue
-            
-            # Generate time slots for this date
-            slots = AvailabilityService._generate_time_slots(check_date, doctor_id)
+        # Next N days, skipping weekends (Monday=0, Sunday=6)
+        check_dates = [
+            today + timedelta(days=i)
+            for i in range(1, days_ahead + 1)
+            if (today + timedelta(days=i)).weekday() < 5
+        ]
+        if not check_dates:
+            return []
+        
+        index = AvailabilityService._load_index(doctor_id, check_dates[0], check_dates[-1])
+        window = AvailabilityService._part_of_day_mask(part_of_day)
+        
+        available_dates = []
+        for check_date in check_dates:
+            starts = index.starts(doctor_id, check_date, duration_minutes) & window
             
-            if slots:  # Only include dates with available slots
+            if starts:  # Only include dates with available slots
                 available_dates.append({
                     "date": check_date.strftime("%Y-%m-%d"),
                     "day_of_week": check_date.strftime("%A"),
-                    "slots": slots
+                    "slots": index.grid.times(starts)
                 })
         
         return available_dates
     
+    @staticmethod
+    def get_earliest_available(
+        duration_minutes: Optional[int] = None,
+        limit: int = 3,
+        days_ahead: int = 60,
+        doctor_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Earliest appointment options across all doctors (no preference)
+        
+        Each doctor's free start times are a lazy stream; a heap merge of
+        the streams yields options in (date, time, doctor) order. Bookings
+        are loaded EARLIEST_WINDOW_DAYS at a time and the search stops as
+        soon as `limit` options are found, so a clinic with space this
+        week never reads next month.
+        
+        Args:
+            duration_minutes: Appointment length (optional, default one slot)
+            limit: Number of options to return
+            days_ahead: Furthest day to search
+            doctor_ids: Restrict to these doctors (default: every doctor)
+            
+        Returns:
+            Options, earliest first
+            Example:
+            [
+                {
+                    "doctor_id": 2,
+                    "doctor_name": "Dr. Li",
+                    "date": "2026-01-12",
+                    "day_of_week": "Monday",
+                    "time": "09:00"
+                },
+                ...
+            ]
+        """
+        names = {doctor["id"]: doctor.get("name") for doctor in AppointmentService.get_all_doctors()}
+        ids = sorted(names) if doctor_ids is None else [d for d in doctor_ids if d in names]
+        if not ids or limit <= 0:
+            return []
+        
+        today = date.today()
+        options: List[Dict[str, Any]] = []
+        window_start = 1
+        while window_start <= days_ahead and len(options) < limit:
+            window_end = min(window_start + AvailabilityService.EARLIEST_WINDOW_DAYS - 1, days_ahead)
+            days = [
+                today + timedelta(days=i)
+                for i in range(window_start, window_end + 1)
+                if (today + timedelta(days=i)).weekday() < 5
+            ]
+            window_start = window_end + 1
+            if not days:
+                continue
+            
+            index = AvailabilityService._load_doctors_index(ids, days[0], days[-1])
+            for day, slot, doctor_id in index.earliest_across(
+                ids, limit - len(options), duration_minutes, days=days
+            ):
+                options.append({
+                    "doctor_id": doctor_id,
+                    "doctor_name": names[doctor_id],
+                    "date": day.strftime("%Y-%m-%d"),
+                    "day_of_week": day.strftime("%A"),
+                    "time": index.grid.label(slot)
+                })
+        
+        return options
+    
+    @staticmethod
+    def _part_of_day_mask(part_of_day: Optional[str]) -> int:
+        """Grid slots starting in a part of the day (every slot if unknown)"""
+        grid = AvailabilityService.grid()
+        hours = AvailabilityService.PART_OF_DAY_HOURS.get(part_of_day or "")
+        if hours is None:
+            return grid.full_mask
+        mask = 0
+        for slot in range(grid.size):
+            minute = grid.start_minute + slot * grid.width
+            if hours[0] * 60 <= minute < hours[1] * 60:
+                mask |= 1 << slot
+        return mask
+    
+    @staticmethod
+    def service_duration(service_id: Optional[int]) -> Optional[int]:
+        """duration_minutes of a service (None if unknown)"""
+        if not service_id:
+            return None
+        service = get_by_id("services", service_id)
+        return service.get("duration_minutes") if service else None
+    
+    @staticmethod
+    def grid() -> SlotGrid:
+        """Slot grid for the current business hours / slot width"""
+        key = (
+            AvailabilityService.BUSINESS_HOURS_START,
+            AvailabilityService.BUSINESS_HOURS_END,
+            AvailabilityService.SLOT_DURATION_MINUTES
+        )
+        grid = _grids.get(key)
+        if grid is None:
+            grid = _grids[key] = SlotGrid(key[0] * 60, key[1] * 60, key[2])
+        return grid
+    
+    @staticmethod
+    def _slot_times() -> List[str]:
+        """Start times (HH:MM) of every slot in a business day"""
+        grid = AvailabilityService.grid()
+        return grid.times(grid.full_mask)
+    
+    @staticmethod
+    def _load_index(
+        doctor_id: Optional[int],
+        start_date: date,
+        end_date: date
+    ) -> SlotIndex:
+        """
+        Busy bitmaps for a date range
+        
+        Served from the availability cache when enabled; otherwise (and for
+        cache misses) one indexed range query.
+        
+        Args:
+            doctor_id: Doctor ID (optional - without it, every doctor's
+                bookings are loaded and a time is taken if anyone is booked)
+            start_date: First date (inclusive)
+            end_date: Last date (inclusive)
+        
+        Raises:
+            DatabaseError: Bookings couldn't be read (e.g. no pooled
+                connection free). Never answered with an empty index -
+                that would offer every slot as free
+        """
+        cache = get_availability_cache()
+        if cache is not None:
+            return cache.load_index(AvailabilityService.grid(), doctor_id, start_date, end_date)
+        return SlotIndex.load(AvailabilityService.grid(), start_date, end_date, doctor_id)
+    
+    @staticmethod
+    def _load_doctors_index(
+        doctor_ids: List[int],
+        start_date: date,
+        end_date: date
+    ) -> SlotIndex:
+        """Busy bitmaps with one row per doctor (cached and raising like _load_index)"""
+        cache = get_availability_cache()
+        if cache is not None:
+            return cache.load_doctors(AvailabilityService.grid(), doctor_ids, start_date, end_date)
+        return SlotIndex.load(AvailabilityService.grid(), start_date, end_date)
+    
     @staticmethod
     def _generate_time_slots(
         check_date: date,
-        doctor_id: Optional[int] = None
+        doctor_id: Optional[int] = None,
+        index: Optional[SlotIndex] = None,
+        duration_minutes: Optional[int] = None
     ) -> List[str]:
         """
         Generate available time slots for a specific date
@@ -72,43 +255,23 @@ class AvailabilityService:
         Args:
             check_date: Date to check
             doctor_id: Doctor ID (optional)
+            index: Slot index covering check_date; loaded for just this
+                date when not given
+            duration_minutes: Appointment length (optional, default one slot)
             
         Returns:
-            List of available time slots in HH:MM format
+            List of available start times in HH:MM format
         """
-        slots = []
-        
-        # Generate slots from business start to end
-        current_time = datetime.combine(check_date, datetime.min.time()).replace(
-            hour=AvailabilityService.BUSINESS_HOURS_START,
-            minute=0
-        )
-        end_time = current_time.replace(
-            hour=AvailabilityService.BUSINESS_HOURS_END,
-            minute=0
-        )
-        
-        # Generate 30-minute slots
-        while current_time < end_time:
-            time_str = current_time.strftime("%H:%M")
-            
-            # Check if this slot is available (not booked)
-            if AvailabilityService._is_slot_available(
-                doctor_id,
-                check_date,
-                time_str
-            ):
-                slots.append(time_str)
-            
-            current_time += timedelta(minutes=AvailabilityService.SLOT_DURATION_MINUTES)
-        
-        return slots
+        if index is None:
+            index = AvailabilityService._load_index(doctor_id, check_date, check_date)
+        return index.grid.times(index.starts(doctor_id, check_date, duration_minutes))
     
     @staticmethod
     def _is_slot_available(
         doctor_id: Optional[int],
         check_date: date,
-        time_str: str
+        time_str: str,
+        duration_minutes: Optional[int] = None
     ) -> bool:
         """
         Check if a specific time slot is available
@@ -117,57 +280,38 @@ class AvailabilityService:
             doctor_id: Doctor ID (optional)
             check_date: Date to check
             time_str: Time in HH:MM format
+            duration_minutes: Appointment length (optional, default one slot)
             
         Returns:
-            True if slot is available, False otherwise
+            True if an appointment of that length can start then, False otherwise
         """
-        try:
-            # Convert date and time to comparable format
-            date_str = check_date.strftime("%Y-%m-%d")
-            
-            # Query for existing appointments at this time
-            if doctor_id:
-                query = """
-                    SELECT COUNT(*) as count FROM appointments
-                    WHERE doctor_id = ?
-                    AND appointment_date = ?
-                    AND appointment_time = ?
-                    AND status != 'cancelled'
-                """
-                result = execute_query(query, (doctor_id, date_str, time_str))
-            else:
-                query = """
-                    SELECT COUNT(*) as count FROM appointments
-                    WHERE appointment_date = ?
-                    AND appointment_time = ?
-                    AND status != 'cancelled'
-                """
-                result = execute_query(query, (date_str, time_str))
-            
-            # Slot is available if no appointment exists
-            count = result[0]['count'] if result else 0
-            return count == 0
-            
-        except Exception as e:
-            # If database error, assume slot is available
-            print(f"Error checking slot availability: {e}")
-            return True
+        index = AvailabilityService._load_index(doctor_id, check_date, check_date)
+        slot = index.grid.slot_of(time_str)
+        if slot is None:
+            return False
+        return bool(index.starts(doctor_id, check_date, duration_minutes) >> slot & 1)
     
     @staticmethod
-    def get_doctor_availability(doctor_id: int, days_ahead: int = 14) -> List[Dict[str, Any]]:
+    def get_doctor_availability(
+        doctor_id: int,
+        days_ahead: int = 14,
+        duration_minutes: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Get availability specifically for a doctor
         
         Args:
             doctor_id: Doctor ID
             days_ahead: Number of days to look ahead
+            duration_minutes: Appointment length (optional)
             
         Returns:
             List of available dates with time slots for this doctor
         """
         return AvailabilityService.get_available_dates(
             doctor_id=doctor_id,
-            days_ahead=days_ahead
+            days_ahead=days_ahead,
+            duration_minutes=duration_minutes
         )
     
     @staticmethod
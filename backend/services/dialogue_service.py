@@ -7,6 +7,8 @@ ARCHITECTURE:
 ✅ State persistence: Abstracted via StateStore (Redis/SQLite ready)
 ✅ Merging: Properly saves back to state
 ✅ Intent: Always persisted for multi-turn context
+✅ DialogueUnitOfWork: one load + at most one save per chat turn
+✅ Concurrent turns: versioned compare-and-set saves + per-conversation lock
 ❌ NO AI decisions here (moved to Planner)
 ❌ NO business validation here (moved to separate layer)
 
@@ -19,9 +21,14 @@ Switch stores by calling:
     from services.state_store import set_state_store, RedisStateStore
     set_state_store(RedisStateStore(redis_client))
 """
-from typing import Dict, Any, Optional
+import asyncio
+import copy
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
-from services.state_store import get_state_store
+from config.settings import STATE_CAS_MAX_RETRIES
+from services.state_store import StateConflictError, get_state_store
+from utils.metrics import Counters, register_metrics
 
 
 class DialogueState:
@@ -33,19 +40,29 @@ class DialogueState:
     - Store detected intent (NOT decide intent)
     - Store collected entities (merged from multiple NLU turns)
     - Track message count (user turns only)
+    - Remember which slot the planner just asked for (slot_to_fill)
     - Provide serialization
     
     ❌ NOT RESPONSIBILITIES:
     - Validate entities (done in validation layer)
     - Decide next questions (done by Planner AI)
     - Generate responses (done by response generator)
+    
+    Slotted: no per-instance __dict__, and a typo'd attribute raises
+    instead of silently never being persisted.
     """
     
+    __slots__ = (
+        "conversation_id", "intent", "collected_entities",
+        "user_message_count", "slot_to_fill", "created_at",
+    )
+    
     def __init__(self, conversation_id: str):
         self.conversation_id = conversation_id
         self.intent = None  # Set by NLU, NOT by dialogue logic
         self.collected_entities = {}  # Merged from all NLU calls
         self.user_message_count = 0  # ✅ ONLY incremented on user input
+        self.slot_to_fill = None  # Set from the planner's last ask_for_slot decision
         self.created_at = datetime.now()
         
     def to_dict(self) -> Dict[str, Any]:
@@ -55,7 +72,8 @@ class DialogueState:
             "intent": self.intent,
             "collected_entities": self.collected_entities,
             "user_message_count": self.user_message_count,
-            "created_at": self.created_at.isoformat()
+            "slot_to_fill": self.slot_to_fill,
+            "created_at": self.created_at.timestamp()
         }
     
     @staticmethod
@@ -65,8 +83,13 @@ class DialogueState:
         state.intent = data.get("intent")
         state.collected_entities = data.get("collected_entities", {})
         state.user_message_count = data.get("user_message_count", 0)
-        if isinstance(data.get("created_at"), str):
-            state.created_at = datetime.fromisoformat(data["created_at"])
+        state.slot_to_fill = data.get("slot_to_fill")
+        created_at = data.get("created_at")
+        if isinstance(created_at, (int, float)):
+            state.created_at = datetime.fromtimestamp(created_at)
+        elif isinstance(created_at, str):
+            # States saved before created_at became an epoch timestamp
+            state.created_at = datetime.fromisoformat(created_at)
         return state
 
 
@@ -130,19 +153,299 @@ def merge_entities_with_state(
           - merged = {doctor: "Dr. Wang", service: "Cleaning"} ✅
           - SAVED to state
     """
-    state = get_or_create_dialogue_state(conversation_id)
-    
-    # Merge: new overrides old, None is skipped
-    merged = {**state.collected_entities}
+    # ✅ CRITICAL: Saved back atomically by the store (one round trip on Redis)
+    return get_state_store().merge_entities(
+        conversation_id, new_entities, DialogueState(conversation_id).to_dict()
+    )
+
+
+def _merge_entities(existing: Dict[str, Any], new_entities: Dict[str, Any]) -> Dict[str, Any]:
+    """New overrides old, None is skipped"""
+    merged = {**existing}
     for key, value in new_entities.items():
         if value is not None:
             merged[key] = value
+    return merged
+
+
+# ═══════════════════════════════════════════════════════
+# UNIT OF WORK (one load + at most one save per request)
+# ═══════════════════════════════════════════════════════
+
+_store_counters = Counters(
+    "turns", "store_reads", "store_writes", "writes_skipped", "version_conflicts", "rebased_writes"
+)
+
+
+class DialogueUnitOfWork:
+    """
+    Request-scoped dialogue state: load once, change in memory, flush once
     
-    # ✅ CRITICAL: Save merged state back
-    state.collected_entities = merged
-    save_dialogue_state(state)
+    Replaces the get → merge (get + save) → save sequence of a chat turn
+    (2 reads + up to 3 writes) with 1 read and 1 write - or no write at
+    all when nothing changed. With a Redis/SQLite store each of those is
+    a round trip.
     
-    return merged
+    Usage:
+        uow = DialogueUnitOfWork(conversation_id)
+        state = uow.load()
+        merged = uow.merge_entities(nlu_result.entities)
+        state.intent = nlu_result.intent
+        uow.commit()
+    
+    The save is a compare-and-set against the version that was loaded.
+    If another writer (a concurrent turn, another worker process) saved
+    in between, this turn's changes are re-applied on top of the newer
+    state instead of overwriting it.
+    """
+    
+    def __init__(self, conversation_id: str):
+        self.conversation_id = conversation_id
+        self.state: Optional[DialogueState] = None
+        self.version = 0
+        self.reads = 0
+        self.writes = 0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._base: Dict[str, Any] = {}
+    
+    def _read(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        self._count_read()
+        return get_state_store().get_versioned(self.conversation_id)
+    
+    async def _aread(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        self._count_read()
+        return await get_state_store().aget_versioned(self.conversation_id)
+    
+    def _count_read(self) -> None:
+        self.reads += 1
+        _store_counters.incr("store_reads")
+    
+    def load(self) -> DialogueState:
+        """Read the state from the store (once - later calls reuse it)"""
+        if self.state is None:
+            self._loaded(*self._read())
+        return self.state
+    
+    def _loaded(self, state_dict: Optional[Dict[str, Any]], version: int) -> None:
+        self.version = version
+        if state_dict:
+            self.state = DialogueState.from_dict(state_dict)
+            self._snapshot = copy.deepcopy(state_dict)
+        else:
+            self.state = DialogueState(self.conversation_id)
+        # What this turn started from - the diff against it is "our changes"
+        self._base = copy.deepcopy(self.state.to_dict())
+    
+    def merge_entities(self, new_entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge NLU entities into the loaded state (in memory only)"""
+        state = self.load()
+        state.collected_entities = _merge_entities(state.collected_entities, new_entities)
+        return state.collected_entities
+    
+    @property
+    def dirty(self) -> bool:
+        return self.state is not None and self.state.to_dict() != self._snapshot
+    
+    def commit(self) -> bool:
+        """
+        Flush the state if it changed
+        
+        Returns:
+            True if a write was issued
+        """
+        if not self._needs_write():
+            return False
+        store = get_state_store()
+        for _ in range(STATE_CAS_MAX_RETRIES + 1):
+            state_dict = self._begin_write()
+            if store.compare_and_set(self.conversation_id, state_dict, self.version):
+                self._written(state_dict)
+                return True
+            _store_counters.incr("version_conflicts")
+            self._rebase(*self._read())
+        raise self._conflict_error()
+    
+    async def acommit(self) -> bool:
+        """commit() on the store's async interface (never blocks the event loop)"""
+        if not self._needs_write():
+            return False
+        store = get_state_store()
+        for _ in range(STATE_CAS_MAX_RETRIES + 1):
+            state_dict = self._begin_write()
+            if await store.acompare_and_set(self.conversation_id, state_dict, self.version):
+                self._written(state_dict)
+                return True
+            _store_counters.incr("version_conflicts")
+            self._rebase(*await self._aread())
+        raise self._conflict_error()
+    
+    def _needs_write(self) -> bool:
+        _store_counters.incr("turns")
+        if not self.dirty:
+            _store_counters.incr("writes_skipped")
+            return False
+        return True
+    
+    def _begin_write(self) -> Dict[str, Any]:
+        self.writes += 1
+        _store_counters.incr("store_writes")
+        return self.state.to_dict()
+    
+    def _written(self, state_dict: Dict[str, Any]) -> None:
+        self.version += 1
+        self._snapshot = copy.deepcopy(state_dict)
+        self._base = copy.deepcopy(state_dict)
+    
+    def _conflict_error(self) -> StateConflictError:
+        return StateConflictError(
+            f"Conversation {self.conversation_id} kept changing during save "
+            f"({STATE_CAS_MAX_RETRIES + 1} attempts)"
+        )
+    
+    def _rebase(self, latest: Optional[Dict[str, Any]], version: int) -> None:
+        """
+        Re-apply this turn's changes on top of a newer stored state
+        
+        Fields this turn changed win; everything else (including entities
+        only the other writer set) is kept from the newer state.
+        """
+        _store_counters.incr("rebased_writes")
+        if latest is None:  # deleted/expired meanwhile
+            latest = DialogueState(self.conversation_id).to_dict()
+        ours = self.state.to_dict()
+        merged = copy.deepcopy(latest)
+        for key, value in ours.items():
+            if key == "collected_entities":
+                base_entities = self._base.get(key, {})
+                entities = merged.setdefault(key, {})
+                for name, entity in value.items():
+                    if base_entities.get(name) != entity:
+                        entities[name] = entity
+                for name in base_entities.keys() - value.keys():
+                    entities.pop(name, None)
+            elif value != self._base.get(key):
+                merged[key] = value
+        
+        self.state = DialogueState.from_dict(merged)
+        self._snapshot = copy.deepcopy(latest)
+        # A further conflict re-applies only what differs from the newer state
+        self._base = copy.deepcopy(latest)
+        self.version = version
+    
+    async def aload(self) -> DialogueState:
+        """load() on the store's async interface"""
+        if self.state is None:
+            self._loaded(*await self._aread())
+        return self.state
+
+
+def get_store_stats() -> Dict[str, Any]:
+    """Store round trips per chat turn"""
+    c = _store_counters.snapshot()
+    turns = c["turns"]
+    return {
+        **c,
+        "round_trips_per_turn": (c["store_reads"] + c["store_writes"]) / turns if turns else 0.0,
+    }
+
+
+register_metrics("dialogue_store", get_store_stats)
+
+
+# ═══════════════════════════════════════════════════════
+# PER-CONVERSATION TURN SERIALIZATION
+# ═══════════════════════════════════════════════════════
+
+_turn_counters = Counters("turns_serialized", "turns_waited")
+
+
+class ConversationLocks:
+    """
+    One asyncio.Lock per active conversation
+    
+    Turns for the same conversation queue up in arrival order (asyncio.Lock
+    is FIFO); different conversations never wait on each other. A lock is
+    dropped as soon as no turn holds or waits on it, so idle conversations
+    cost nothing.
+    
+    Single process only - across workers the store's compare-and-set
+    catches the remaining races.
+    """
+    
+    def __init__(self):
+        # conversation_id → (lock, turns holding or waiting)
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+    
+    @asynccontextmanager
+    async def hold(self, conversation_id: str):
+        lock, users = self._locks.get(conversation_id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[conversation_id] = (lock, users + 1)
+        _turn_counters.incr("turns_serialized")
+        if lock.locked():
+            _turn_counters.incr("turns_waited")
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[conversation_id]
+            if users == 1:
+                del self._locks[conversation_id]
+            else:
+                self._locks[conversation_id] = (lock, users - 1)
+    
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+_conversation_locks = ConversationLocks()
+
+
+def conversation_turn(conversation_id: str):
+    """
+    Async context manager: run a chat turn exclusively for its conversation
+    
+    Usage:
+        async with conversation_turn(conversation_id):
+            ...
+    """
+    return _conversation_locks.hold(conversation_id)
+
+
+def get_turn_stats() -> Dict[str, Any]:
+    return {**_turn_counters.snapshot(), "active_conversations": len(_conversation_locks)}
+
+
+register_metrics("conversation_turns", get_turn_stats)
+
+
+# ═══════════════════════════════════════════════════════
+# ASYNC VARIANTS (async chat pipeline)
+# Use the store's async interface so Redis/SQLite I/O never blocks the loop
+# ═══════════════════════════════════════════════════════
+
+async def aget_or_create_dialogue_state(conversation_id: str) -> DialogueState:
+    """Async get_or_create_dialogue_state"""
+    state_dict = await get_state_store().aget(conversation_id)
+    if state_dict:
+        return DialogueState.from_dict(state_dict)
+    return DialogueState(conversation_id)
+
+
+async def asave_dialogue_state(state: DialogueState) -> None:
+    """Async save_dialogue_state"""
+    await get_state_store().asave(state.conversation_id, state.to_dict())
+
+
+async def amerge_entities_with_state(
+    new_entities: Dict[str, Any],
+    conversation_id: str
+) -> Dict[str, Any]:
+    """Async merge_entities_with_state"""
+    return await get_state_store().amerge_entities(
+        conversation_id, new_entities, DialogueState(conversation_id).to_dict()
+    )
 
 
 def reset_dialogue_state(conversation_id: str) -> None:
@@ -4,29 +4,31 @@ Converts natural language to structured JSON format
 No database queries, no business logic, pure NLU
 """
 import json
-import subprocess
-from typing import Optional, Dict, Any
-from pydantic import BaseModel
-from datetime import datetime, timedelta
+import time
+from contextlib import aclosing
+from typing import Optional, Dict, Any, Tuple
+from datetime import datetime
+from schemas.nlu import LlamaEntity, LlamaResponse
+from config.settings import (
+    LLM_MODEL,
+    NLU_FAST_PATH_ENABLED,
+    NLU_FAST_PATH_THRESHOLD,
+    NLU_STREAMING_ENABLED,
+)
+from services.llm_transport import get_transport
+from services.rule_nlu import get_rule_nlu
+from services.nlu_cache import NLUCache, get_nlu_cache
+from services.llm_limiter import get_llm_limiter
+from utils.json_repair import repair_json
+from utils.json_stream import IncrementalJSONObjectParser
+from utils.temporal_parser import extract_temporal, normalize_date, normalize_time
+from utils.metrics import Counters, register_metrics
 
-
-class LlamaEntity(BaseModel):
-    """Entities extracted by Llama"""
-    service: Optional[str] = None
-    doctor: Optional[str] = None
-    date: Optional[str] = None
-    time: Optional[str] = None
-    customer_name: Optional[str] = None
-    customer_phone: Optional[str] = None
-    customer_email: Optional[str] = None
-
-
-class LlamaResponse(BaseModel):
-    """Response from Llama NLU parser"""
-    intent: str
-    confidence: float
-    entities: Dict[str, Any]
-    raw_input: Optional[str] = None
+# Fast path vs LLM accounting
+_nlu_counters = Counters(
+    "fast_path_attempts", "fast_path_hits", "fast_path_us_total",
+    "llm_calls", "llm_ms_total", "stream_early_stops"
+)
 
 
 class LlamaService:
@@ -73,8 +75,8 @@ EXTRACTION RULES:
 ENTITY EXTRACTION:
 - service: one of [Cleaning, Extraction, Checkup] if mentioned, else null
 - doctor: one of [Dr. Wang, Dr. Chen, Dr. Li] if mentioned, else null
-- date: convert to YYYY-MM-DD format if mentioned (e.g., "tomorrow" → next day), else null
-- time: convert to HH:MM format (24-hour) if mentioned (e.g., "2 PM" → "14:00"), else null
+- date: the date words exactly as the user said them (e.g., "next Wednesday"), else null
+- time: the time words exactly as the user said them (e.g., "2 PM"), else null
 - customer_name: person's name if mentioned, else null
 - customer_phone: phone number if mentioned, else null
 - customer_email: email if mentioned, else null
@@ -86,8 +88,8 @@ JSON Output Format (MUST MATCH EXACTLY):
   "entities": {
     "service": "Cleaning or null",
     "doctor": "Dr. Wang or null",
-    "date": "YYYY-MM-DD or null",
-    "time": "HH:MM or null",
+    "date": "date words or null",
+    "time": "time words or null",
     "customer_name": "string or null",
     "customer_phone": "string or null",
     "customer_email": "string or null"
@@ -96,7 +98,8 @@ JSON Output Format (MUST MATCH EXACTLY):
 
 CRITICAL: Output ONLY JSON, nothing else. Do not guess or fill in missing info."""
     
-    MODEL = "llama3.2:3b"
+    MODEL = LLM_MODEL
+    STREAMING = NLU_STREAMING_ENABLED
     
     @staticmethod
     def parse_user_input(user_message: str) -> LlamaResponse:
@@ -117,184 +120,242 @@ CRITICAL: Output ONLY JSON, nothing else. Do not guess or fill in missing info."
             
         Raises:
             ValueError: If Llama returns invalid JSON
-            RuntimeError: If Ollama command fails
+            RuntimeError: If the model transport fails (timeout, server error)
         """
         if not user_message or not user_message.strip():
             raise ValueError("User message cannot be empty")
         
-        # Build prompt - just NLU, nothing else
-        prompt = f"""{LlamaService.SYSTEM_PROMPT_NLU}
+        response, cache_key = LlamaService._parse_without_model(user_message)
+        if response is not None:
+            return response
+        
+        start = time.perf_counter()
+        prompt = LlamaService._build_prompt(user_message)
+        if LlamaService.STREAMING:
+            output = LlamaService._generate_streaming(prompt)
+        else:
+            output = get_transport().generate(prompt)
+        LlamaService._record_model_call(start)
+        response = LlamaService._parse_model_output(output, user_message)
+        LlamaService._cache_response(cache_key, response)
+        return response
+    
+    @staticmethod
+    async def aparse_user_input(user_message: str) -> LlamaResponse:
+        """
+        Async parse_user_input for the async chat pipeline
+        
+        Same fast path / cache / model order, but the model call goes
+        through the LLM concurrency limiter and never blocks the event loop.
+        
+        Raises:
+            ValueError: If Llama returns invalid JSON
+            RuntimeError: If the model transport fails (timeout, server error)
+            LLMOverloadedError: If too many model calls are already queued
+        """
+        if not user_message or not user_message.strip():
+            raise ValueError("User message cannot be empty")
+        
+        response, cache_key = LlamaService._parse_without_model(user_message)
+        if response is not None:
+            return response
+        
+        response = await LlamaService._amodel_call(user_message)
+        LlamaService._cache_response(cache_key, response)
+        return response
+    
+    @staticmethod
+    async def _amodel_call(user_message: str) -> LlamaResponse:
+        """One model call for one message, inside a limiter slot"""
+        async with get_llm_limiter().slot():
+            start = time.perf_counter()
+            prompt = LlamaService._build_prompt(user_message)
+            if LlamaService.STREAMING:
+                output = await LlamaService._agenerate_streaming(prompt)
+            else:
+                output = await get_transport().agenerate(prompt)
+        LlamaService._record_model_call(start)
+        return LlamaService._parse_model_output(output, user_message)
+    
+    @staticmethod
+    def _generate_streaming(prompt: str) -> str:
+        """
+        Consume the model output as it streams, stop once the JSON object closes
+        
+        Returns the object text (still repaired by _parse_model_output if it
+        isn't strict JSON), or everything received if it never closed.
+        """
+        parser = IncrementalJSONObjectParser()
+        stream = get_transport().generate_stream(prompt)
+        try:
+            for chunk in stream:
+                if parser.feed(chunk):
+                    _nlu_counters.incr("stream_early_stops")
+                    break
+        finally:
+            stream.close()  # cancels the rest of the generation
+        return parser.object_text or parser.buffer
+    
+    @staticmethod
+    async def _agenerate_streaming(prompt: str) -> str:
+        """Async _generate_streaming"""
+        parser = IncrementalJSONObjectParser()
+        async with aclosing(get_transport().agenerate_stream(prompt)) as stream:
+            async for chunk in stream:
+                if parser.feed(chunk):
+                    _nlu_counters.incr("stream_early_stops")
+                    break
+        return parser.object_text or parser.buffer
+    
+    @staticmethod
+    def _parse_without_model(user_message: str) -> Tuple[Optional[LlamaResponse], Optional[str]]:
+        """
+        Try the cheap paths before the model
+        
+        Returns:
+            (response, None) when the fast path or cache answered,
+            (None, cache_key) when the model must be called
+        """
+        # Fast path: deterministic rules, skip the LLM when confident
+        if NLU_FAST_PATH_ENABLED:
+            start = time.perf_counter()
+            fast_result = get_rule_nlu().parse(user_message)
+            _nlu_counters.incr("fast_path_attempts")
+            _nlu_counters.incr("fast_path_us_total", (time.perf_counter() - start) * 1e6)
+            if fast_result.confidence >= NLU_FAST_PATH_THRESHOLD:
+                _nlu_counters.incr("fast_path_hits")
+                return fast_result, None
+        
+        # Cache: reuse an earlier model parse of the same utterance today
+        cache = get_nlu_cache()
+        if cache is None:
+            return None, None
+        cache_key = NLUCache.make_key(user_message, datetime.now().date(), LlamaService.MODEL)
+        return cache.get(cache_key, user_message), cache_key
+    
+    @staticmethod
+    def _record_model_call(start: float) -> None:
+        _nlu_counters.incr("llm_calls")
+        _nlu_counters.incr("llm_ms_total", (time.perf_counter() - start) * 1000)
+    
+    @staticmethod
+    def _cache_response(cache_key: Optional[str], response: LlamaResponse) -> None:
+        cache = get_nlu_cache()
+        if cache is not None and cache_key is not None:
+            cache.put(cache_key, response)
+    
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """Fast path hit rate and estimated LLM latency saved"""
+        c = _nlu_counters.snapshot()
+        attempts = c["fast_path_attempts"]
+        hits = c["fast_path_hits"]
+        avg_llm_ms = c["llm_ms_total"] / c["llm_calls"] if c["llm_calls"] else 0.0
+        avg_fast_us = c["fast_path_us_total"] / attempts if attempts else 0.0
+        return {
+            **c,
+            "fast_path_hit_rate": hits / attempts if attempts else 0.0,
+            "avg_fast_path_us": avg_fast_us,
+            "avg_llm_ms": avg_llm_ms,
+            # Each hit avoided one average LLM call
+            "estimated_ms_saved": hits * avg_llm_ms,
+        }
+    
+    @staticmethod
+    def _build_prompt(user_message: str) -> str:
+        """
+        Build prompt - just NLU, nothing else
+        
+        The system prompt comes first and byte-identical in every prompt so
+        the server can reuse its cached prefix; only the tail differs.
+        """
+        return f"""{LlamaService.SYSTEM_PROMPT_NLU}
 
 User input: {user_message}
 
 Output ONLY JSON (no explanations, no text)."""
+    
+    @staticmethod
+    def _parse_model_output(output: str, user_message: str) -> LlamaResponse:
+        """
+        Turn raw model output into a LlamaResponse
         
+        Raises:
+            ValueError: If the output is not valid JSON
+        """
+        output = LlamaService._clean_json(output)
         try:
-            # Call Ollama with llama3.2:3b
-            result = subprocess.run(
-                ["ollama", "run", LlamaService.MODEL, prompt],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode != 0:
-                raise subprocess.CalledProcessError(
-                    result.returncode,
-                    "ollama",
-                    stderr=result.stderr
-                )
-            
-            # Extract JSON from output
-            output = result.stdout.strip()
-            
-            # Clean up the JSON output
-            output = LlamaService._clean_json(output)
-            
-            # Parse JSON
-            try:
-                parsed = json.loads(output)
-            except json.JSONDecodeError as e:
-                # Try to fix incomplete JSON (missing closing braces)
-                open_braces = output.count('{')
-                close_braces = output.count('}')
-                
-                if open_braces > close_braces:
-                    output = output + '}' * (open_braces - close_braces)
-                    try:
-                        parsed = json.loads(output)
-                    except json.JSONDecodeError:
-                        raise ValueError(f"Llama returned invalid JSON: {output[:200]}...") from e
-                else:
-                    raise ValueError(f"Llama returned invalid JSON: {output}") from e
-            
-            # Extract and normalize entities
-            entities = parsed.get("entities", {})
-            if entities and "date" in entities and entities["date"]:
-                entities["date"] = LlamaService._normalize_date(entities["date"])
-            
-            # Clean up null/empty strings
-            for key in list(entities.keys()):
-                if entities[key] == "" or entities[key] == "null":
-                    entities[key] = None
-            
-            # Extract intent (handle pipe-separated values)
-            raw_intent = parsed.get("intent", "other")
-            if isinstance(raw_intent, str) and "|" in raw_intent:
-                intent = raw_intent.split("|")[0].strip()
-            else:
-                intent = raw_intent
-            
-            return LlamaResponse(
-                intent=intent,
-                confidence=float(parsed.get("confidence", 0.5)),
-                entities=entities,
-                raw_input=user_message
-            )
-            
-        except subprocess.TimeoutExpired:
-            raise RuntimeError("Llama request timed out (>30 seconds)")
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"Ollama error: {e.stderr}")
+            parsed = json.loads(output)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Llama returned invalid JSON: {output[:200]}") from e
+        if not isinstance(parsed, dict):
+            raise ValueError(f"Llama returned {type(parsed).__name__}, expected a JSON object")
+        
+        return LlamaService._response_from_parsed(parsed, user_message)
+    
+    @staticmethod
+    def _response_from_parsed(parsed: Dict[str, Any], user_message: str) -> LlamaResponse:
+        """Normalize one parsed NLU object into a LlamaResponse"""
+        entities = parsed.get("entities") or {}
+        
+        # Clean up null/empty strings
+        for key in list(entities.keys()):
+            if entities[key] == "" or entities[key] == "null":
+                entities[key] = None
+        
+        # Dates/times: the deterministic parser on the user's own words wins,
+        # the model's copy of the phrase is only normalized as a fallback
+        today = datetime.now().date()
+        temporal = extract_temporal(user_message, today)
+        entities["date"] = temporal.date or normalize_date(entities.get("date"), today)
+        entities["time"] = temporal.time or normalize_time(entities.get("time"))
+        entities["part_of_day"] = temporal.part_of_day or entities.get("part_of_day")
+        
+        # Extract intent (handle pipe-separated values)
+        raw_intent = parsed.get("intent", "other")
+        if isinstance(raw_intent, str) and "|" in raw_intent:
+            intent = raw_intent.split("|")[0].strip()
+        else:
+            intent = raw_intent
+        
+        return LlamaResponse(
+            intent=intent,
+            confidence=float(parsed.get("confidence", 0.5)),
+            entities=entities,
+            raw_input=user_message
+        )
     
     @staticmethod
     def _clean_json(text: str) -> str:
         """
         Clean JSON output from Llama (remove comments, extra text)
         
+        Single pass: surrounding prose, comments and trailing commas are
+        dropped and unclosed braces balanced (see utils/json_repair.py).
+        
         Args:
             text: Raw output from Llama
             
         Returns:
             Clean JSON string
         """
-        # Remove leading/trailing whitespace
-        text = text.strip()
-        
-        # Find the start of JSON (first { or [)
-        json_start = text.find('{')
-        if json_start == -1:
-            json_start = text.find('[')
-        
-        if json_start != -1:
-            text = text[json_start:]
-        
-        # Find the end of JSON (last } or ])
-        json_end = max(text.rfind('}'), text.rfind(']'))
-        if json_end != -1:
-            text = text[:json_end + 1]
-        
-        # Remove JSON comments (// ... and /* ... */)
-        # Remove // comments
-        lines = text.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            # Remove // comments
-            comment_index = line.find('//')
-            if comment_index != -1:
-                # Make sure it's not inside a string
-                in_string = False
-                escape_next = False
-                for i, char in enumerate(line):
-                    if escape_next:
-                        escape_next = False
-                        continue
-                    if char == '\\':
-                        escape_next = True
-                        continue
-                    if char == '"':
-                        in_string = not in_string
-                    if char == '/' and i + 1 < len(line) and line[i + 1] == '/' and not in_string:
-                        line = line[:i]
-                        break
-            cleaned_lines.append(line)
-        
-        text = '\n'.join(cleaned_lines)
-        
-        # Remove /* */ comments
-        while '/*' in text and '*/' in text:
-            start = text.find('/*')
-            end = text.find('*/', start)
-            if end != -1:
-                text = text[:start] + text[end + 2:]
-            else:
-                break
-        
-        # Remove trailing commas in JSON (common error)
-        text = text.replace(',\n}', '\n}')
-        text = text.replace(',\n]', '\n]')
-        text = text.replace(', }', '}')
-        text = text.replace(', ]', ']')
-        
-        return text.strip()
+        return repair_json(text)
     
     @staticmethod
     def _normalize_date(date_str: Optional[str]) -> Optional[str]:
         """
-        Normalize date strings like 'today', 'tomorrow' to YYYY-MM-DD format
+        Normalize date strings like 'today', 'next Wednesday' to YYYY-MM-DD format
         
         Args:
             date_str: Date string or null
             
         Returns:
-            Normalized date in YYYY-MM-DD format or null
+            Normalized date in YYYY-MM-DD format, or null if not a date
         """
-        if not date_str:
-            return None
-        
-        date_str = date_str.lower().strip()
-        today = datetime.now().date()
-        
-        if date_str == "today":
-            return today.isoformat()
-        elif date_str == "tomorrow":
-            return (today + timedelta(days=1)).isoformat()
-        elif date_str.startswith("20") or date_str.startswith("19"):  # Already a year
-            # Already in YYYY-MM-DD format, return as-is
-            return date_str
-        
-        # Return original if we can't normalize
-        return date_str
+        return normalize_date(date_str, datetime.now().date())
+
+
+register_metrics("nlu", LlamaService.get_stats)
 
 
 # Example usage for testing (NLU only)
@@ -0,0 +1,135 @@
+"""
+LLM Concurrency Limiter
+
+Bounds how many model calls the async chat pipeline runs at once and how
+many callers may queue behind them.
+
+[Request] → slot free? → run
+          → queue < max depth? → wait (up to queue timeout)
+          → otherwise → LLMOverloadedError → HTTP 503 + Retry-After
+
+Failing fast keeps a burst of chat traffic from piling up thousands of
+pending model calls while /health and the CRUD endpoints stay responsive.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+from config.settings import (
+    LLM_MAX_IN_FLIGHT,
+    LLM_MAX_QUEUE_DEPTH,
+    LLM_QUEUE_TIMEOUT_SECONDS,
+    LLM_RETRY_AFTER_SECONDS,
+)
+from utils.metrics import Counters, register_metrics
+
+
+class LLMOverloadedError(RuntimeError):
+    """Too many model calls queued - caller should retry later"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMConcurrencyLimiter:
+    """
+    Semaphore + bounded wait queue for model calls
+
+    Args:
+        max_in_flight: Concurrent model calls
+        max_queue_depth: Callers allowed to wait for a slot
+        queue_timeout: Max seconds a caller waits before being rejected
+        retry_after: Value suggested to rejected clients (seconds)
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        max_queue_depth: int = LLM_MAX_QUEUE_DEPTH,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+        retry_after: int = LLM_RETRY_AFTER_SECONDS
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.waiting = 0
+        self.counters = Counters("admitted", "queued", "rejected_queue_full", "rejected_timeout")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one model-call slot for the duration of the block
+
+        Raises:
+            LLMOverloadedError: Queue full, or no slot within queue_timeout
+        """
+        semaphore = self._get_semaphore()
+
+        # Counters are updated synchronously, so concurrent callers see each
+        # other even before their semaphore.acquire() has been scheduled
+        admitted = self.in_flight + self.waiting
+        if admitted >= self.max_in_flight:
+            if admitted >= self.max_in_flight + self.max_queue_depth:
+                self.counters.incr("rejected_queue_full")
+                raise LLMOverloadedError(
+                    "Model is busy, please retry shortly", self.retry_after
+                )
+            self.counters.incr("queued")
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counters.incr("rejected_timeout")
+            raise LLMOverloadedError(
+                "Timed out waiting for the model, please retry shortly", self.retry_after
+            )
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.counters.incr("admitted")
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters.snapshot(),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_in_flight": self.max_in_flight,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+# Global limiter instance (configurable)
+_llm_limiter = LLMConcurrencyLimiter()
+
+
+def set_llm_limiter(limiter: LLMConcurrencyLimiter) -> None:
+    """Replace the limiter (tests, or tuning at startup)"""
+    global _llm_limiter
+    _llm_limiter = limiter
+
+
+def get_llm_limiter() -> LLMConcurrencyLimiter:
+    """Get current limiter"""
+    return _llm_limiter
+
+
+register_metrics("llm_limiter", lambda: _llm_limiter.stats())
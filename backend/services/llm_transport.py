@@ -0,0 +1,437 @@
+"""
+LLM Transport Layer
+
+Decouples LlamaService (prompt + JSON parsing) from HOW the model is reached.
+
+Transports:
+  🌐 OllamaHTTPTransport: Pooled keep-alive HTTP client to `ollama serve` (default)
+  🐢 SubprocessTransport: One `ollama run` process per call (fallback)
+  🔁 FallbackTransport: Try primary, switch to fallback if server unreachable
+
+Interface:
+  - generate(prompt) → raw model output (str)
+  - agenerate(prompt) → same, without blocking the event loop
+  - generate_stream / agenerate_stream(prompt) → output chunks as generated;
+    closing the iterator early cancels the generation
+  - preload() → load model into memory and keep it resident
+  - close() → release pooled connections
+
+Switch transports by calling:
+    from services.llm_transport import set_transport, OllamaHTTPTransport
+    set_transport(OllamaHTTPTransport(base_url="http://127.0.0.1:11434"))
+"""
+import asyncio
+import json
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional
+
+import httpx
+
+from config.settings import (
+    LLM_MODEL,
+    LLM_TRANSPORT,
+    LLM_SUBPROCESS_FALLBACK,
+    OLLAMA_BASE_URL,
+    LLM_TIMEOUT_SECONDS,
+    LLM_KEEP_ALIVE,
+    LLM_POOL_SIZE,
+)
+
+
+class TransportUnavailableError(RuntimeError):
+    """Model server could not be reached at all (connection refused, DNS, ...)"""
+    pass
+
+
+class NLUTransport(ABC):
+    """Abstract model transport interface"""
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, prompt: str) -> str:
+        """
+        Send a prompt to the model and return its raw text output
+
+        Raises:
+            RuntimeError: On timeout or model/server error
+        """
+        pass
+
+    async def agenerate(self, prompt: str) -> str:
+        """Async generate (default: run the blocking call in a worker thread)"""
+        return await asyncio.to_thread(self.generate, prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Yield the output in chunks as it is generated
+
+        Default: one chunk with the whole output (no early cancellation).
+        """
+        yield self.generate(prompt)
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        """Async generate_stream (default: one chunk from agenerate)"""
+        yield await self.agenerate(prompt)
+
+    def preload(self) -> None:
+        """Load the model ahead of the first request (no-op by default)"""
+        pass
+
+    def close(self) -> None:
+        """Release resources held by the transport (no-op by default)"""
+        pass
+
+    async def aclose(self) -> None:
+        """Release async resources held by the transport (no-op by default)"""
+        pass
+
+
+class SubprocessTransport(NLUTransport):
+    """
+    Spawns `ollama run <model> <prompt>` for every call
+
+    ⚠️ Pays process startup + model attach on each message.
+    Kept as a fallback for machines without a reachable `ollama serve`.
+    """
+
+    name = "subprocess"
+
+    def __init__(
+        self,
+        model: str = LLM_MODEL,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        command: Optional[List[str]] = None
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.command = command or ["ollama", "run"]
+
+    def generate(self, prompt: str) -> str:
+        try:
+            result = subprocess.run(
+                [*self.command, self.model, prompt],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout
+            )
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"Llama request timed out (>{self.timeout:g} seconds)")
+        except FileNotFoundError as e:
+            raise TransportUnavailableError(f"Ollama CLI not found: {e}")
+
+        if result.returncode != 0:
+            raise RuntimeError(f"Ollama error: {result.stderr}")
+
+        return result.stdout.strip()
+
+    async def agenerate(self, prompt: str) -> str:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.command, self.model, prompt,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError as e:
+            raise TransportUnavailableError(f"Ollama CLI not found: {e}")
+
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise RuntimeError(f"Llama request timed out (>{self.timeout:g} seconds)")
+
+        if process.returncode != 0:
+            raise RuntimeError(f"Ollama error: {stderr.decode(errors='replace')}")
+
+        return stdout.decode(errors="replace").strip()
+
+
+class OllamaHTTPTransport(NLUTransport):
+    """
+    Talks to `ollama serve` over a pooled, keep-alive HTTP connection
+
+    ✅ One TCP connection reused across chat turns (no process spawn)
+    ✅ Model kept resident via `keep_alive`
+    ✅ Configurable timeout and pool size
+
+    Uses /api/generate and returns the `response` field (stream=False),
+    or yields the streamed NDJSON `response` chunks (stream=True).
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        base_url: str = OLLAMA_BASE_URL,
+        model: str = LLM_MODEL,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        keep_alive: str = LLM_KEEP_ALIVE,
+        pool_size: int = LLM_POOL_SIZE,
+        options: Optional[Dict[str, Any]] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.options = options if options is not None else {"temperature": 0}
+        self._limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size
+        )
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout),
+            limits=self._limits
+        )
+        # One async pool per event loop: an httpx.AsyncClient can only be
+        # used (and closed) on the loop that created it
+        self._async_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._async_lock = threading.Lock()
+
+    def _payload(self, prompt: str, stream: bool = False) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": self.options,
+        }
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                # A closed loop can't run its client's aclose() any more;
+                # drop those so their sockets go with the client
+                for old_loop in [l for l in self._async_clients if l.is_closed()]:
+                    del self._async_clients[old_loop]
+                client = self._async_clients[loop] = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    timeout=httpx.Timeout(self.timeout),
+                    limits=self._limits
+                )
+        return client
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = self._client.post(path, json=payload)
+        except httpx.HTTPError as e:
+            self._raise_http_error(e)
+        return self._decode(response)
+
+    async def _apost(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = await self._get_async_client().post(path, json=payload)
+        except httpx.HTTPError as e:
+            self._raise_http_error(e)
+        return self._decode(response)
+
+    def _raise_http_error(self, e: httpx.HTTPError) -> None:
+        if isinstance(e, httpx.TimeoutException):
+            raise RuntimeError(f"Llama request timed out (>{self.timeout:g} seconds)")
+        if isinstance(e, httpx.ConnectError):
+            raise TransportUnavailableError(f"Ollama server unreachable at {self.base_url}: {e}")
+        raise RuntimeError(f"Ollama error: {e}")
+
+    @staticmethod
+    def _decode(response: httpx.Response) -> Dict[str, Any]:
+        if response.status_code != 200:
+            raise RuntimeError(f"Ollama error: HTTP {response.status_code} {response.text[:200]}")
+
+        try:
+            return response.json()
+        except ValueError:
+            raise RuntimeError(f"Ollama error: non-JSON response {response.text[:200]}")
+
+    def generate(self, prompt: str) -> str:
+        data = self._post("/api/generate", self._payload(prompt))
+        return (data.get("response") or "").strip()
+
+    async def agenerate(self, prompt: str) -> str:
+        data = await self._apost("/api/generate", self._payload(prompt))
+        return (data.get("response") or "").strip()
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Stream /api/generate chunks
+
+        Leaving the loop early closes the response (and its connection),
+        which makes Ollama abort the generation.
+        """
+        try:
+            with self._client.stream("POST", "/api/generate", json=self._payload(prompt, True)) as response:
+                if response.status_code != 200:
+                    response.read()
+                    self._decode(response)
+                for line in response.iter_lines():
+                    chunk = self._decode_stream_line(line)
+                    if chunk is None:
+                        return
+                    yield chunk
+        except httpx.HTTPError as e:
+            self._raise_http_error(e)
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        client = self._get_async_client()
+        try:
+            async with client.stream("POST", "/api/generate", json=self._payload(prompt, True)) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    self._decode(response)
+                async for line in response.aiter_lines():
+                    chunk = self._decode_stream_line(line)
+                    if chunk is None:
+                        return
+                    yield chunk
+        except httpx.HTTPError as e:
+            self._raise_http_error(e)
+
+    @staticmethod
+    def _decode_stream_line(line: str) -> Optional[str]:
+        """One NDJSON line → text chunk ("" for blank lines, None when done)"""
+        if not line.strip():
+            return ""
+        try:
+            data = json.loads(line)
+        except ValueError:
+            raise RuntimeError(f"Ollama error: non-JSON stream line {line[:200]}")
+        if data.get("error"):
+            raise RuntimeError(f"Ollama error: {data['error']}")
+        if data.get("done"):
+            return None
+        return data.get("response") or ""
+
+    def preload(self) -> None:
+        """
+        Load the model and pin it in memory
+
+        An /api/generate call without a prompt makes Ollama load the model
+        and keep it resident for `keep_alive`.
+        """
+        self._post("/api/generate", {"model": self.model, "keep_alive": self.keep_alive})
+
+    def close(self) -> None:
+        self._client.close()
+
+    async def aclose(self) -> None:
+        """
+        Close the async pool of every event loop that used this transport
+
+        Each client is closed on its own loop: directly for the current one,
+        handed over for loops still running in other threads.
+        """
+        current = asyncio.get_running_loop()
+        with self._async_lock:
+            clients, self._async_clients = self._async_clients, {}
+        for loop, client in clients.items():
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+
+
+class FallbackTransport(NLUTransport):
+    """
+    Use `primary`, switch to `fallback` when the primary is unreachable
+
+    Only TransportUnavailableError triggers the fallback - timeouts and
+    model errors are real failures and are raised as-is.
+    """
+
+    def __init__(self, primary: NLUTransport, fallback: NLUTransport):
+        self.primary = primary
+        self.fallback = fallback
+
+    @property
+    def name(self) -> str:
+        return f"{self.primary.name}+{self.fallback.name}"
+
+    def generate(self, prompt: str) -> str:
+        try:
+            return self.primary.generate(prompt)
+        except TransportUnavailableError:
+            return self.fallback.generate(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        try:
+            return await self.primary.agenerate(prompt)
+        except TransportUnavailableError:
+            return await self.fallback.agenerate(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        # Only fall back before anything was yielded - never mix two outputs
+        started = False
+        try:
+            for chunk in self.primary.generate_stream(prompt):
+                started = True
+                yield chunk
+        except TransportUnavailableError:
+            if started:
+                raise
+            yield from self.fallback.generate_stream(prompt)
+
+    async def agenerate_stream(self, prompt: str) -> AsyncIterator[str]:
+        started = False
+        try:
+            async for chunk in self.primary.agenerate_stream(prompt):
+                started = True
+                yield chunk
+        except TransportUnavailableError:
+            if started:
+                raise
+            async for chunk in self.fallback.agenerate_stream(prompt):
+                yield chunk
+
+    def preload(self) -> None:
+        try:
+            self.primary.preload()
+        except TransportUnavailableError:
+            self.fallback.preload()
+
+    def close(self) -> None:
+        self.primary.close()
+        self.fallback.close()
+
+    async def aclose(self) -> None:
+        await self.primary.aclose()
+        await self.fallback.aclose()
+
+
+def create_transport_from_settings() -> NLUTransport:
+    """Build the transport selected by LLM_TRANSPORT"""
+    if LLM_TRANSPORT == "subprocess":
+        return SubprocessTransport()
+
+    transport = OllamaHTTPTransport()
+    if LLM_SUBPROCESS_FALLBACK:
+        return FallbackTransport(transport, SubprocessTransport())
+    return transport
+
+
+# Global transport instance (configurable)
+_transport: Optional[NLUTransport] = None
+
+
+def set_transport(transport: NLUTransport) -> None:
+    """
+    Set the transport implementation
+
+    Usage (in app startup or tests):
+        from services.llm_transport import set_transport, OllamaHTTPTransport
+        set_transport(OllamaHTTPTransport(base_url="http://127.0.0.1:11435"))
+    """
+    global _transport
+    _transport = transport
+
+
+def get_transport() -> NLUTransport:
+    """Get current transport (created lazily from settings)"""
+    global _transport
+    if _transport is None:
+        _transport = create_transport_from_settings()
+    return _transport
@@ -0,0 +1,246 @@
+"""
+NLU Result Cache
+
+Bounded cache in front of the LLM path of LlamaService.parse_user_input.
+Short utterances ("yes", "2 PM", "Dr. Li") recur across conversations, so
+their parses are reused instead of calling the model again.
+
+Key: model + normalized message + today's date
+  - The date matters: "tomorrow" resolves differently each day.
+  - The key is case-folded, but a parse carrying a patient's details
+    (name/phone/email) is only reused for the same text as typed, so one
+    patient's spelling of a name never leaks into another conversation.
+
+Tiers:
+  ⚡ L1: in-memory LRU (OrderedDict) with size + TTL eviction
+  💾 L2 (optional): SQLite file so a warm cache survives restarts
+
+Values are plain dicts {intent, confidence, entities}; callers get a fresh
+LlamaResponse on every hit so cached entries are never mutated.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Any, Optional, Tuple
+
+from config.settings import (
+    NLU_CACHE_ENABLED,
+    NLU_CACHE_MAX_ENTRIES,
+    NLU_CACHE_TTL_SECONDS,
+    NLU_CACHE_DISK_PATH,
+)
+from schemas.nlu import LlamaResponse
+from utils.metrics import Counters, register_metrics
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " .!?,;"
+
+# Expired rows are purged from disk every N writes
+_DISK_PRUNE_INTERVAL = 1000
+
+
+# Entities copied from the message text rather than chosen from a fixed set
+PERSONAL_ENTITIES = ("customer_name", "customer_phone", "customer_email")
+
+
+def normalize_message(message: str, fold_case: bool = True) -> str:
+    """Lowercase (unless fold_case=False), collapse whitespace, drop surrounding punctuation"""
+    if fold_case:
+        message = message.lower()
+    return _WHITESPACE_RE.sub(" ", message).strip(_EDGE_PUNCTUATION)
+
+
+class NLUCache:
+    """
+    LRU + TTL cache for NLU results with an optional on-disk tier
+
+    Args:
+        max_entries: L1 capacity; least recently used entries are evicted
+        ttl_seconds: Entries older than this are treated as misses
+        disk_path: SQLite file for the L2 tier (None = memory only)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = NLU_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = NLU_CACHE_TTL_SECONDS,
+        disk_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = Counters(
+            "hits", "misses", "evictions", "expirations", "disk_hits", "disk_writes"
+        )
+        self._disk: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._open_disk(disk_path)
+
+    @staticmethod
+    def make_key(message: str, today: date, namespace: str = "") -> str:
+        return f"{namespace}|{today.isoformat()}|{normalize_message(message)}"
+
+    # ═══════════════════════════════════════════════════════
+    # Public API
+    # ═══════════════════════════════════════════════════════
+
+    def get(self, key: str, user_message: str) -> Optional[LlamaResponse]:
+        """Return a cached parse (as a new LlamaResponse) or None"""
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                created_at, value = item
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    if self._matches(value, user_message):
+                        self.counters.incr("hits")
+                        return self._to_response(value, user_message)
+                    self.counters.incr("misses")
+                    return None
+                del self._entries[key]
+                self.counters.incr("expirations")
+
+        value = self._disk_get(key, now)
+        if value is not None and self._matches(value, user_message):
+            self.counters.incr("hits")
+            self.counters.incr("disk_hits")
+            return self._to_response(value, user_message)
+
+        self.counters.incr("misses")
+        return None
+
+    def put(self, key: str, response: LlamaResponse) -> None:
+        value = {
+            "intent": response.intent,
+            "confidence": response.confidence,
+            "entities": dict(response.entities),
+        }
+        if any(response.entities.get(name) for name in PERSONAL_ENTITIES):
+            if response.raw_input is None:
+                return  # nothing to pin the patient's details to
+            value["text"] = normalize_message(response.raw_input, fold_case=False)
+        now = time.time()
+        self._store(key, now, value)
+        self._disk_put(key, now, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM nlu_cache")
+                self._disk.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        c = self.counters.snapshot()
+        lookups = c["hits"] + c["misses"]
+        return {
+            **c,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": c["hits"] / lookups if lookups else 0.0,
+            "disk_enabled": self._disk is not None,
+        }
+
+    # ═══════════════════════════════════════════════════════
+    # Internals
+    # ═══════════════════════════════════════════════════════
+
+    def _store(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (created_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters.incr("evictions")
+
+    @staticmethod
+    def _matches(value: Dict[str, Any], user_message: str) -> bool:
+        """Parses with personal details only serve the exact same text"""
+        text = value.get("text")
+        return text is None or text == normalize_message(user_message, fold_case=False)
+
+    @staticmethod
+    def _to_response(value: Dict[str, Any], user_message: str) -> LlamaResponse:
+        return LlamaResponse(
+            intent=value["intent"],
+            confidence=value["confidence"],
+            entities=dict(value["entities"]),
+            raw_input=user_message
+        )
+
+    def _open_disk(self, path: str) -> None:
+        self._disk = sqlite3.connect(path, check_same_thread=False)
+        self._disk.execute("PRAGMA journal_mode=WAL")
+        self._disk.execute(
+            "CREATE TABLE IF NOT EXISTS nlu_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        # Drop what expired while we were down, then warm L1 with the newest entries
+        self._disk.execute(
+            "DELETE FROM nlu_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        )
+        self._disk.commit()
+        rows = self._disk.execute(
+            "SELECT key, value, created_at FROM nlu_cache ORDER BY created_at DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        for key, value, created_at in reversed(rows):
+            self._store(key, created_at, json.loads(value))
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        if self._disk is None:
+            return None
+        with self._lock:
+            row = self._disk.execute(
+                "SELECT value, created_at FROM nlu_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            return None
+        value = json.loads(row[0])
+        self._store(key, row[1], value)  # promote to L1
+        return value
+
+    def _disk_put(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        if self._disk is None:
+            return
+        with self._lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO nlu_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), created_at)
+            )
+            self.counters.incr("disk_writes")
+            if self.counters.get("disk_writes") % _DISK_PRUNE_INTERVAL == 0:
+                self._disk.execute(
+                    "DELETE FROM nlu_cache WHERE created_at < ?", (created_at - self.ttl_seconds,)
+                )
+            self._disk.commit()
+
+
+# Global cache instance (None when disabled)
+_nlu_cache: Optional[NLUCache] = (
+    NLUCache(disk_path=NLU_CACHE_DISK_PATH or None) if NLU_CACHE_ENABLED else None
+)
+
+
+def set_nlu_cache(cache: Optional[NLUCache]) -> None:
+    """Replace (or disable with None) the NLU cache"""
+    global _nlu_cache
+    _nlu_cache = cache
+
+
+def get_nlu_cache() -> Optional[NLUCache]:
+    """Get current NLU cache (None when disabled)"""
+    return _nlu_cache
+
+
+def _cache_stats() -> Dict[str, Any]:
+    return _nlu_cache.stats() if _nlu_cache is not None else {"enabled": False}
+
+
+register_metrics("nlu_cache", _cache_stats)
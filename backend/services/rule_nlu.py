@@ -0,0 +1,353 @@
+"""
+Rule-based NLU Fast Path
+
+Deterministic gazetteer + regex extractor for the short, formulaic turns
+that make up most of a booking dialogue ("Dr. Wang", "cleaning",
+"tomorrow at 2pm", a phone number). Dates and times come from the shared
+temporal parser (utils/temporal_parser.py).
+
+[User Input] → [RuleBasedNLU] → confident? → LlamaResponse (no LLM call)
+                              ↘ not confident → LlamaService LLM path
+
+Confidence is COVERAGE based: every token of the message must be explained
+by an extracted entity, an intent keyword or a filler word. Anything the
+rules don't understand lowers confidence, so the LLM handles it instead.
+
+Gazetteer sources:
+- doctors / services tables (when the database is reachable)
+- DOCTOR_ALIAS_MAP in utils/doctor_validator.py
+- SERVICE_ALIAS_MAP below
+"""
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from schemas.nlu import LlamaResponse
+from utils.db_utils import execute_query, DatabaseError
+from utils.doctor_validator import DOCTOR_ALIAS_MAP, VALID_DOCTORS
+from utils.temporal_parser import extract_temporal, normalize_time
+
+# Service synonyms → canonical service name
+SERVICE_ALIAS_MAP = {
+    "cleaning": "Cleaning",
+    "clean": "Cleaning",
+    "teeth cleaning": "Cleaning",
+    "tooth cleaning": "Cleaning",
+    "polish": "Cleaning",
+    "polishing": "Cleaning",
+    "extraction": "Extraction",
+    "extract": "Extraction",
+    "tooth extraction": "Extraction",
+    "tooth removal": "Extraction",
+    "remove tooth": "Extraction",
+    "pull tooth": "Extraction",
+    "checkup": "Checkup",
+    "check-up": "Checkup",
+    "check up": "Checkup",
+    "exam": "Checkup",
+    "examination": "Checkup",
+    "oral exam": "Checkup",
+}
+
+# Intent keywords (checked in this order)
+INTENT_KEYWORDS = [
+    ("cancel", {"cancel", "cancellation", "cancelling", "canceling"}),
+    ("modify", {"reschedule", "rebook", "change", "move", "modify", "postpone"}),
+    ("appointment", {"book", "booking", "appointment", "schedule", "reserve", "visit"}),
+    ("query", {"what", "who", "how", "which", "price", "cost", "much", "hours", "open", "info", "information"}),
+]
+
+ALL_INTENT_KEYWORDS = set().union(*(keywords for _, keywords in INTENT_KEYWORDS))
+
+# Words that carry no information on their own
+FILLER_WORDS = {
+    "i", "i'd", "id", "i'm", "im", "would", "like", "want", "wanna", "to", "a", "an", "the",
+    "with", "at", "on", "for", "please", "pls", "thanks", "thank", "you", "can", "could",
+    "me", "my", "is", "it", "be", "ok", "okay", "sure", "and", "in", "of", "do", "get",
+    "need", "see", "go", "um", "uh", "hi", "hello", "hey", "make", "some", "time",
+    "day", "number", "phone", "email", "name", "dr", "doctor", "dentist", "service",
+    "am", "pm", "let's", "lets", "how", "about", "around", "maybe", "prefer", "works", "good",
+    "fine", "great", "there", "there's", "here", "here's", "it's", "that", "this",
+}
+
+# Short replies that are never a name (answers, acknowledgements, hesitation)
+NOT_A_NAME = {
+    "yes", "yeah", "yep", "no", "nope", "nah", "not", "don't", "dont", "skip",
+    "later", "never", "mind", "nevermind", "sorry", "what", "why", "help",
+    "hmm", "hm", "huh", "eh", "oh", "wait", "stop", "whatever", "idk", "dunno",
+    "nothing", "none", "anything", "anyone", "alright", "cool", "nice", "right",
+}
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(?<![\d\w])\+?\d[\d\s().-]{5,18}\d(?![\d\w])")
+# Digit runs shaped like a date (2025-13-45, 12/31, 12/31/25) are never a
+# phone number, even when extract_temporal rejected them as a date
+DATE_SHAPED_RE = re.compile(r"(?<![\d\w])(?:\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}/\d{1,2}(?:/\d{2,4})?)(?![\d\w])")
+NAME_RE = re.compile(r"\b(?:my name is|name is|name's|this is)\s+([a-z][a-z'-]*(?:\s+[a-z][a-z'-]*){0,2})")
+TOKEN_RE = re.compile(r"[a-z][a-z'-]*|\d+")
+
+ENTITY_KEYS = (
+    "service", "doctor", "date", "time",
+    "customer_name", "customer_phone", "customer_email",
+    "part_of_day",
+)
+
+# Confidence model
+BASE_CONFIDENCE = 0.95
+UNEXPLAINED_TOKEN_PENALTY = 0.15
+
+
+def _alternation(aliases: List[str]) -> re.Pattern:
+    """Compile aliases into one regex, longest first, on word boundaries"""
+    ordered = sorted(set(aliases), key=len, reverse=True)
+    return re.compile(r"(?<![a-z])(" + "|".join(re.escape(a) for a in ordered) + r")(?![a-z])")
+
+
+def _mask(text: str, start: int, end: int) -> str:
+    """Blank out a matched span so later extractors don't see it again"""
+    return text[:start] + " " * (end - start) + text[end:]
+
+
+class RuleBasedNLU:
+    """
+    Compiled gazetteer + regex NLU
+
+    Build once (from_database) and reuse: all patterns are precompiled,
+    a parse is a handful of regex scans over a short string.
+    """
+
+    def __init__(self, doctor_aliases: Dict[str, str], service_aliases: Dict[str, str]):
+        self.doctor_aliases = doctor_aliases
+        self.service_aliases = service_aliases
+        self._doctor_re = _alternation(list(doctor_aliases))
+        self._service_re = _alternation(list(service_aliases))
+
+    @classmethod
+    def from_database(cls) -> "RuleBasedNLU":
+        """Build the gazetteer from the doctors/services tables plus alias maps"""
+        doctor_aliases = dict(DOCTOR_ALIAS_MAP)
+        service_aliases = dict(SERVICE_ALIAS_MAP)
+
+        try:
+            doctor_names = [row["name"] for row in execute_query("SELECT name FROM doctors")]
+            service_names = [row["name"] for row in execute_query("SELECT name FROM services")]
+        except DatabaseError:
+            doctor_names = list(VALID_DOCTORS)
+            service_names = []
+
+        for name in doctor_names:
+            doctor_aliases.setdefault(name.lower(), name)
+            surname = re.sub(r"^(dr\.?|doctor)\s+", "", name.lower()).strip()
+            if surname:
+                doctor_aliases.setdefault(surname, name)
+                doctor_aliases.setdefault(f"dr. {surname}", name)
+                doctor_aliases.setdefault(f"dr {surname}", name)
+                doctor_aliases.setdefault(f"doctor {surname}", name)
+
+        for name in service_names:
+            service_aliases.setdefault(name.lower(), name)
+
+        return cls(doctor_aliases, service_aliases)
+
+    def parse(self, user_message: str, today: Optional[datetime] = None) -> LlamaResponse:
+        """
+        Extract intent + entities deterministically
+
+        Returns:
+            LlamaResponse whose confidence reflects how much of the message
+            the rules could explain (0.0 when nothing was recognized)
+        """
+        text = user_message.lower()
+        entities = dict.fromkeys(ENTITY_KEYS)
+
+        text = self._extract_email(user_message, text, entities)
+        text = self._extract_name(user_message, text, entities)
+        text = self._extract_temporal(text, entities, (today or datetime.now()).date())
+        text = self._extract_phone(text, entities)
+        text = self._extract_gazetteer(self._doctor_re, self.doctor_aliases, text, entities, "doctor")
+        text = self._extract_gazetteer(self._service_re, self.service_aliases, text, entities, "service")
+
+        tokens = TOKEN_RE.findall(text)
+        intent = self._detect_intent(tokens, user_message)
+        has_entities = any(v is not None for v in entities.values())
+
+        unexplained = [
+            t for t in tokens
+            if t not in FILLER_WORDS and t not in ALL_INTENT_KEYWORDS
+        ]
+
+        if not has_entities and intent is None:
+            confidence = 0.0
+        else:
+            confidence = max(0.0, BASE_CONFIDENCE - UNEXPLAINED_TOKEN_PENALTY * len(unexplained))
+
+        return LlamaResponse(
+            intent=intent or "appointment",  # bare slot answers belong to the booking flow
+            confidence=round(confidence, 2),
+            entities=entities,
+            raw_input=user_message
+        )
+
+    def parse_slot(self, slot: str, user_message: str, today: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Parse the answer to "which <slot>?" with only that slot's extractor
+
+        Knowing what was asked lets short answers through that the general
+        parse can't trust ("3" as a time, "John Smith" as a name).
+
+        Returns:
+            Entities with the slot filled, or None when the slot wasn't found
+            or anything else is in the message (the caller falls back to NLU)
+        """
+        text = user_message.lower()
+        entities = dict.fromkeys(ENTITY_KEYS)
+
+        if slot in ("date", "time"):
+            text = self._extract_temporal(text, entities, (today or datetime.now()).date())
+            if slot == "time" and entities["time"] is None and text.strip().isdigit():
+                entities["time"] = normalize_time(text)
+                text = ""
+        elif slot == "doctor":
+            text = self._extract_gazetteer(self._doctor_re, self.doctor_aliases, text, entities, "doctor")
+        elif slot == "service":
+            text = self._extract_gazetteer(self._service_re, self.service_aliases, text, entities, "service")
+        elif slot == "customer_phone":
+            text = self._extract_phone(text, entities)
+        elif slot == "customer_email":
+            text = self._extract_email(user_message, text, entities)
+        elif slot == "customer_name":
+            text = self._extract_name(user_message, text, entities)
+            if entities["customer_name"] is None:
+                text = self._extract_bare_name(user_message, text, entities)
+        else:
+            return None
+
+        if entities[slot] is None:
+            return None
+        if any(t not in FILLER_WORDS for t in TOKEN_RE.findall(text)):
+            return None
+        return entities
+
+    # ═══════════════════════════════════════════════════════
+    # Extractors: each fills one entity and masks its span
+    # ═══════════════════════════════════════════════════════
+
+    @staticmethod
+    def _extract_email(original: str, text: str, entities: Dict[str, Any]) -> str:
+        match = EMAIL_RE.search(text)
+        if match:
+            entities["customer_email"] = original[match.start():match.end()]
+            text = _mask(text, match.start(), match.end())
+        return text
+
+    @staticmethod
+    def _extract_name(original: str, text: str, entities: Dict[str, Any]) -> str:
+        match = NAME_RE.search(text)
+        if not match:
+            return text
+        words = []
+        for word in match.group(1).split():
+            if word in FILLER_WORDS:
+                break
+            words.append(word)
+        if words:
+            start = match.start(1)
+            end = start + len(" ".join(words))
+            entities["customer_name"] = " ".join(w.capitalize() for w in original[start:end].split())
+            text = _mask(text, match.start(), end)
+        return text
+
+    def _extract_bare_name(self, original: str, text: str, entities: Dict[str, Any]) -> str:
+        """
+        A reply that is nothing but a name: 1-3 words, none of them known terms
+
+        Not a question, and a single word only when capitalized as a name
+        ("Maria", not "nevermind") - anything less name-shaped goes to the model.
+        """
+        if "?" in text:
+            return text
+        words = [w for w in TOKEN_RE.findall(text) if w not in FILLER_WORDS]
+        if not 1 <= len(words) <= 3 or not all(w.isalpha() for w in words):
+            return text
+        if any(w in ALL_INTENT_KEYWORDS or w in NOT_A_NAME for w in words):
+            return text
+        spans = [m.span() for m in TOKEN_RE.finditer(text) if m.group() in words]
+        if len(words) == 1 and not original[spans[0][0]].isupper():
+            return text
+        if self._doctor_re.search(text) or self._service_re.search(text):
+            return text
+        if extract_temporal(text, datetime.now().date()).spans:
+            return text
+        entities["customer_name"] = " ".join(original[s:e].capitalize() for s, e in spans)
+        for start, end in spans:
+            text = _mask(text, start, end)
+        return text
+
+    @staticmethod
+    def _extract_temporal(text: str, entities: Dict[str, Any], today) -> str:
+        """Date, time and part of day via the shared temporal parser"""
+        match = extract_temporal(text, today)
+        entities["date"] = match.date
+        entities["time"] = match.time
+        entities["part_of_day"] = match.part_of_day
+        for start, end in match.spans:
+            text = _mask(text, start, end)
+        return text
+
+    @staticmethod
+    def _extract_phone(text: str, entities: Dict[str, Any]) -> str:
+        # Blank date-shaped runs for the search only: left in the text they
+        # stay unexplained and lower the confidence
+        candidates = DATE_SHAPED_RE.sub(lambda m: " " * len(m.group(0)), text)
+        for match in PHONE_RE.finditer(candidates):
+            digits = re.sub(r"\D", "", match.group(0))
+            if 7 <= len(digits) <= 15:
+                entities["customer_phone"] = digits
+                return _mask(text, match.start(), match.end())
+        return text
+
+    @staticmethod
+    def _extract_gazetteer(
+        pattern: re.Pattern,
+        aliases: Dict[str, str],
+        text: str,
+        entities: Dict[str, Any],
+        key: str
+    ) -> str:
+        match = pattern.search(text)
+        if match:
+            entities[key] = aliases[match.group(1)]
+            text = _mask(text, match.start(), match.end())
+        return text
+
+    @staticmethod
+    def _detect_intent(tokens: List[str], original: str) -> Optional[str]:
+        token_set = set(tokens)
+        for intent, keywords in INTENT_KEYWORDS:
+            if token_set & keywords:
+                return intent
+        if original.rstrip().endswith("?"):
+            return "query"
+        return None
+
+
+# Global fast-path instance (built lazily from the database)
+_rule_nlu: Optional[RuleBasedNLU] = None
+_rule_nlu_lock = threading.Lock()
+
+
+def get_rule_nlu() -> RuleBasedNLU:
+    """Get the compiled fast path, building the gazetteer on first use"""
+    global _rule_nlu
+    if _rule_nlu is None:
+        with _rule_nlu_lock:
+            if _rule_nlu is None:
+                _rule_nlu = RuleBasedNLU.from_database()
+    return _rule_nlu
+
+
+def reload_rule_nlu() -> None:
+    """Drop the compiled gazetteer (call after doctors/services change)"""
+    global _rule_nlu
+    _rule_nlu = None
@@ -0,0 +1,417 @@
+"""
+Slot bitmap index for availability
+
+Each doctor's day is one integer bitmask over the clinic's slot grid:
+bit i is the slot starting at grid.start_minute + i * grid.width
+(09:00, 09:30, ... with the default AvailabilityService settings).
+A set bit in a *busy* mask means the slot is booked.
+
+Everything availability needs is then a couple of integer operations:
+
+  free slots          ~busy & open_mask
+  any doctor free     free_a | free_b | ...
+  everyone busy       busy_a & busy_b & ...
+  runs of k slots     free & (free >> 1) & ... & (free >> k-1)
+  first free run      lowest set bit of the runs mask
+  k earliest, anyone  heap merge of per-doctor start streams
+
+Durations work the same way in both directions: an existing booking marks
+every slot its service's duration overlaps (a 60-minute Extraction at 10:00
+blocks 10:00 and 10:30), and a new appointment of k slots may only start
+where a run of k free slots does - runs never extend past the last slot of
+the grid, so a 60-minute service is never offered at 17:30.
+
+Masks stay integers through the service layer; grid.times(mask) turns
+one into "HH:MM" strings only when a response is built.
+
+Storage is one array per doctor (one machine word per day, sized to the
+grid), so 50 doctors × 90 days of half-hour slots is ~18 KB.
+"""
+import heapq
+from array import array
+from datetime import date, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.db_utils import execute_query
+
+
+def _time_to_minutes(value) -> Optional[int]:
+    """'09:30' / '9:30' / '09:30:00' → 570 (None if unparseable)"""
+    try:
+        hours, minutes = str(value).split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return None
+
+
+class SlotGrid:
+    """The fixed slots of a clinic day and mask helpers over them"""
+
+    __slots__ = ("start_minute", "end_minute", "width", "size", "full_mask", "_labels", "_slots")
+
+    def __init__(self, start_minute: int, end_minute: int, width: int):
+        if width <= 0 or end_minute <= start_minute:
+            raise ValueError("Slot grid needs a positive width and end after start")
+        self.start_minute = start_minute
+        self.end_minute = end_minute
+        self.width = width
+        self.size = -(-(end_minute - start_minute) // width)
+        self.full_mask = (1 << self.size) - 1
+        self._labels = [
+            f"{m // 60:02d}:{m % 60:02d}"
+            for m in range(start_minute, start_minute + self.size * width, width)
+        ]
+        self._slots = {label: slot for slot, label in enumerate(self._labels)}
+
+    def slot_of(self, time_str) -> Optional[int]:
+        """Index of the slot containing a time (None outside the grid)"""
+        slot = self._slots.get(time_str)
+        if slot is not None:
+            return slot
+        minutes = _time_to_minutes(time_str)
+        if minutes is None or not self.start_minute <= minutes < self.end_minute:
+            return None
+        return (minutes - self.start_minute) // self.width
+
+    def label(self, slot: int) -> str:
+        return self._labels[slot]
+
+    def slots_for(self, duration_minutes: Optional[int]) -> int:
+        """Slots needed to fit a duration (at least one)"""
+        if not duration_minutes or duration_minutes <= 0:
+            return 1
+        return -(-duration_minutes // self.width)
+
+    def mask_between(self, start_minute: int, end_minute: int) -> int:
+        """Slots lying entirely inside [start, end) - e.g. opening hours"""
+        mask = 0
+        for slot in range(self.size):
+            slot_start = self.start_minute + slot * self.width
+            if slot_start >= start_minute and slot_start + self.width <= end_minute:
+                mask |= 1 << slot
+        return mask
+
+    def covering(self, time_str, duration_minutes: Optional[int] = None) -> int:
+        """
+        Slots overlapped by [time, time + duration) (clipped to the grid)
+
+        Without a duration the booking holds just the slot it starts in.
+        Off-grid starts (09:15) block every slot they overlap.
+        """
+        start = _time_to_minutes(time_str)
+        if start is None:
+            return 0
+        end = start + (duration_minutes if duration_minutes and duration_minutes > 0 else 1)
+        if end <= self.start_minute or start >= self.end_minute:
+            return 0
+        first = max(start - self.start_minute, 0) // self.width
+        last = min((end - 1 - self.start_minute) // self.width, self.size - 1)
+        return self.span(first, last - first + 1)
+
+    def span(self, slot: int, count: int) -> int:
+        """Mask of `count` slots starting at `slot` (clipped to the grid)"""
+        return ((1 << count) - 1) << slot & self.full_mask
+
+    def times(self, mask: int) -> List[str]:
+        """"HH:MM" of every set bit, in order (the API edge)"""
+        labels = self._labels
+        times = []
+        while mask:
+            low = mask & -mask
+            times.append(labels[low.bit_length() - 1])
+            mask ^= low
+        return times
+
+    @staticmethod
+    def runs(free: int, length: int) -> int:
+        """Bits where `length` consecutive free slots start"""
+        runs = free
+        covered = 1
+        # Doubling: after each step `runs` marks starts of `covered` free slots
+        while covered < length:
+            step = min(covered, length - covered)
+            runs &= runs >> step
+            covered += step
+        return runs
+
+    @staticmethod
+    def first(mask: int) -> Optional[int]:
+        """Lowest set bit index (None if empty)"""
+        return (mask & -mask).bit_length() - 1 if mask else None
+
+
+def _word_typecode(bits: int) -> Optional[str]:
+    """Smallest unsigned array type holding `bits` bits (None: too wide)"""
+    for typecode in "BHILQ":
+        if array(typecode).itemsize * 8 >= bits:
+            return typecode
+    return None
+
+
+class SlotIndex:
+    """
+    Busy bitmaps per (doctor, day) over a date horizon
+
+    Appointments without a doctor are kept under doctor_id None. The
+    clinic-wide view (doctor_id None in the queries below) is the union of
+    every doctor's busy mask, i.e. a time is taken if anyone is booked then.
+    """
+
+    def __init__(self, grid: SlotGrid, start_date: date, days: int):
+        self.grid = grid
+        self.start_date = start_date
+        self.days = days
+        self._typecode = _word_typecode(grid.size)
+        self._busy: Dict[Optional[int], "array | list"] = {}
+        self._clinic: Optional[List[int]] = None
+        self._start_ordinal = start_date.toordinal()
+        self._offsets: Dict[str, Optional[int]] = {}
+
+    # ═══════════════════════════════════════════════════════
+    # Building
+    # ═══════════════════════════════════════════════════════
+
+    @classmethod
+    def load(
+        cls,
+        grid: SlotGrid,
+        start_date: date,
+        end_date: date,
+        doctor_id: Optional[int] = None
+    ) -> "SlotIndex":
+        """
+        Index non-cancelled appointments from the database (one range query)
+
+        With a doctor only that doctor's bookings are read; without one,
+        everybody's. Each booking blocks its service's full duration.
+        """
+        index = cls(grid, start_date, (end_date - start_date).days + 1)
+        if doctor_id:
+            rows = execute_query(
+                """
+                SELECT DISTINCT a.date, a.time, s.duration_minutes
+                FROM appointments a LEFT JOIN services s ON s.id = a.service_id
+                WHERE a.doctor_id = ?
+                AND a.date BETWEEN ? AND ?
+                AND a.status != 'cancelled'
+                """,
+                (doctor_id, start_date.isoformat(), end_date.isoformat())
+            )
+            index.add_bookings(
+                (doctor_id, row["date"], row["time"], row["duration_minutes"]) for row in rows
+            )
+        else:
+            rows = execute_query(
+                """
+                SELECT DISTINCT a.doctor_id, a.date, a.time, s.duration_minutes
+                FROM appointments a LEFT JOIN services s ON s.id = a.service_id
+                WHERE a.date BETWEEN ? AND ?
+                AND a.status != 'cancelled'
+                """,
+                (start_date.isoformat(), end_date.isoformat())
+            )
+            index.add_bookings(
+                (row["doctor_id"], row["date"], row["time"], row["duration_minutes"]) for row in rows
+            )
+        return index
+
+    def _day(self, day) -> Optional[int]:
+        """Day offset in the horizon for a date or "YYYY-MM-DD" (None outside)"""
+        if isinstance(day, str):
+            if day not in self._offsets:
+                self._offsets[day] = self._day(date.fromisoformat(day))
+            return self._offsets[day]
+        offset = day.toordinal() - self._start_ordinal
+        return offset if 0 <= offset < self.days else None
+
+    def _row(self, doctor_id: Optional[int]):
+        row = self._busy.get(doctor_id)
+        if row is None:
+            row = array(self._typecode, bytes(self.days * array(self._typecode).itemsize)) \
+                if self._typecode else [0] * self.days
+            self._busy[doctor_id] = row
+        return row
+
+    def mark_busy(self, doctor_id: Optional[int], day, time_str, slots: int = 1) -> bool:
+        """Mark `slots` slots from the one containing time_str; False if off the index"""
+        offset = self._day(day)
+        slot = self.grid.slot_of(time_str)
+        if offset is None or slot is None:
+            return False
+        self._row(doctor_id)[offset] |= self.grid.span(slot, slots)
+        self._clinic = None
+        return True
+
+    def mark_free(self, doctor_id: Optional[int], day, time_str, slots: int = 1) -> bool:
+        offset = self._day(day)
+        slot = self.grid.slot_of(time_str)
+        if offset is None or slot is None or doctor_id not in self._busy:
+            return False
+        self._busy[doctor_id][offset] &= ~self.grid.span(slot, slots) & self.grid.full_mask
+        self._clinic = None
+        return True
+
+    def set_busy(self, doctor_id: Optional[int], day, mask: int) -> None:
+        """Overwrite a day's busy mask (e.g. from a cache)"""
+        offset = self._day(day)
+        if offset is None:
+            raise ValueError(f"{day} is outside the index ({self.start_date} + {self.days} days)")
+        self._row(doctor_id)[offset] = mask & self.grid.full_mask
+        self._clinic = None
+
+    def mark_booking(self, doctor_id: Optional[int], day, time_str,
+                     duration_minutes: Optional[int] = None) -> bool:
+        """Mark every slot a booking of this duration overlaps; False if off the index"""
+        offset = self._day(day)
+        mask = self.grid.covering(time_str, duration_minutes)
+        if offset is None or not mask:
+            return False
+        self._row(doctor_id)[offset] |= mask
+        self._clinic = None
+        return True
+
+    def add_bookings(self, bookings: Iterable[tuple]) -> None:
+        """
+        Bulk mark bookings busy
+
+        Each is (doctor_id, "YYYY-MM-DD", "HH:MM"), optionally followed by
+        the booking's duration_minutes.
+        """
+        for booking in bookings:
+            if len(booking) == 3:
+                self.mark_busy(*booking)
+            else:
+                self.mark_booking(*booking)
+
+    # ═══════════════════════════════════════════════════════
+    # Queries (all bitwise)
+    # ═══════════════════════════════════════════════════════
+
+    def busy(self, doctor_id: Optional[int], day) -> int:
+        """Busy mask for a doctor's day (doctor_id None: anyone busy)"""
+        offset = self._day(day)
+        if offset is None:
+            raise ValueError(f"{day} is outside the index ({self.start_date} + {self.days} days)")
+        if doctor_id is None:
+            return self._clinic_busy()[offset]
+        row = self._busy.get(doctor_id)
+        return row[offset] if row is not None else 0
+
+    def _clinic_busy(self) -> List[int]:
+        if self._clinic is None:
+            clinic = [0] * self.days
+            for row in self._busy.values():
+                clinic = [a | b for a, b in zip(clinic, row)]
+            self._clinic = clinic
+        return self._clinic
+
+    def free(self, doctor_id: Optional[int], day, open_mask: Optional[int] = None) -> int:
+        """Free mask, limited to open_mask (default: the whole grid)"""
+        open_mask = self.grid.full_mask if open_mask is None else open_mask
+        return ~self.busy(doctor_id, day) & open_mask
+
+    def is_free(self, doctor_id: Optional[int], day, time_str) -> bool:
+        slot = self.grid.slot_of(time_str)
+        return slot is not None and bool(self.free(doctor_id, day) >> slot & 1)
+
+    def any_free(self, doctor_ids: Iterable[int], day, open_mask: Optional[int] = None) -> int:
+        """Slots where at least one of the doctors is free"""
+        offset = self._day(day)
+        if offset is None:
+            raise ValueError(f"{day} is outside the index ({self.start_date} + {self.days} days)")
+        # Free for someone = not busy for everyone
+        all_busy = self.grid.full_mask
+        for doctor_id in doctor_ids:
+            row = self._busy.get(doctor_id)
+            if row is None:
+                all_busy = 0
+                break
+            all_busy &= row[offset]
+        open_mask = self.grid.full_mask if open_mask is None else open_mask
+        return ~all_busy & open_mask
+
+    def starts(self, doctor_id: Optional[int], day, duration_minutes: Optional[int] = None,
+               open_mask: Optional[int] = None) -> int:
+        """Slots where an appointment of this duration fits"""
+        return SlotGrid.runs(self.free(doctor_id, day, open_mask), self.grid.slots_for(duration_minutes))
+
+    def first_free(self, doctor_id: Optional[int], day, duration_minutes: Optional[int] = None,
+                   open_mask: Optional[int] = None) -> Optional[int]:
+        """Earliest slot where the duration fits (None: day is full)"""
+        return SlotGrid.first(self.starts(doctor_id, day, duration_minutes, open_mask))
+
+    def earliest(self, doctor_id: Optional[int], duration_minutes: Optional[int] = None,
+                 open_mask: Optional[int] = None, from_day=None) -> Optional[Tuple[date, int]]:
+        """(day, slot) of the first fit in the horizon, scanning the doctor's row directly"""
+        length = self.grid.slots_for(duration_minutes)
+        open_mask = self.grid.full_mask if open_mask is None else open_mask
+        if doctor_id is None:
+            row = self._clinic_busy()
+        else:
+            row = self._busy.get(doctor_id)
+        first = 0 if from_day is None else self._day(from_day)
+        if first is None:
+            return None
+        runs = SlotGrid.runs
+        for offset in range(first, self.days):
+            free = ~(row[offset] if row is not None else 0) & open_mask
+            starts = runs(free, length) if length > 1 else free
+            if starts:
+                return self.start_date + timedelta(days=offset), (starts & -starts).bit_length() - 1
+        return None
+
+    def iter_starts(self, doctor_id: Optional[int], duration_minutes: Optional[int] = None,
+                    open_mask: Optional[int] = None, days: Optional[Iterable] = None
+                    ) -> Iterator[Tuple[date, int]]:
+        """
+        Lazily yield every (day, slot) where the duration fits, in time order
+
+        Args:
+            days: Days to consider, ascending (default: the whole horizon);
+                days outside the index are skipped
+        """
+        length = self.grid.slots_for(duration_minutes)
+        open_mask = self.grid.full_mask if open_mask is None else open_mask
+        row = self._clinic_busy() if doctor_id is None else self._busy.get(doctor_id)
+        runs = SlotGrid.runs
+        for day in self.dates() if days is None else days:
+            offset = self._day(day)
+            if offset is None:
+                continue
+            starts = runs(~(row[offset] if row is not None else 0) & open_mask, length)
+            while starts:
+                low = starts & -starts
+                yield self.start_date + timedelta(days=offset), low.bit_length() - 1
+                starts ^= low
+
+    def _tagged_starts(self, doctor_id, duration_minutes, open_mask, days):
+        for day, slot in self.iter_starts(doctor_id, duration_minutes, open_mask, days):
+            yield day, slot, doctor_id
+
+    def earliest_across(self, doctor_ids: Iterable[int], limit: int = 1,
+                        duration_minutes: Optional[int] = None, open_mask: Optional[int] = None,
+                        days: Optional[Iterable] = None) -> List[Tuple[date, int, int]]:
+        """
+        First `limit` (day, slot, doctor_id) options across several doctors
+
+        A k-way heap merge of each doctor's iter_starts() stream: every
+        stream is only advanced as far as the options actually taken, so
+        the search stops as soon as `limit` are found. Ties go to the lower
+        doctor_id.
+        """
+        days = None if days is None else list(days)
+        streams = [
+            self._tagged_starts(doctor_id, duration_minutes, open_mask, days)
+            for doctor_id in doctor_ids
+        ]
+        return list(islice(heapq.merge(*streams), limit))
+
+    def dates(self) -> List[date]:
+        return [self.start_date + timedelta(days=i) for i in range(self.days)]
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the bitmaps"""
+        if self._typecode:
+            return sum(len(row) * row.itemsize for row in self._busy.values())
+        return sum(mask.__sizeof__() + 8 for row in self._busy.values() for mask in row)
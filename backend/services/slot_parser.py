@@ -0,0 +1,84 @@
+"""
+Dialogue-context Slot Short-circuit
+
+When the planner has just asked for a slot ("What time would you
+prefer?"), the next message is almost always just that slot. Parse it
+with the slot's own rule-based extractor and skip NLU entirely:
+
+[state.slot_to_fill = "time"] + "3pm" → slot parser → hit? LlamaResponse
+                                                     ↘ miss → LlamaService
+
+Hit/attempt counts per slot are reported under slot_short_circuit in
+/api/chat/metrics.
+"""
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from schemas.nlu import LlamaResponse
+from services.rule_nlu import get_rule_nlu
+from utils.metrics import Counters, register_metrics
+
+# Slots with a dedicated parser
+SHORT_CIRCUIT_SLOTS = (
+    "doctor", "service", "date", "time",
+    "customer_name", "customer_phone", "customer_email",
+)
+
+# A slot answer fully explained by its parser is as good as a fast-path hit
+SLOT_ANSWER_CONFIDENCE = 0.95
+
+_slot_counters = Counters(
+    *(f"{slot}_attempts" for slot in SHORT_CIRCUIT_SLOTS),
+    *(f"{slot}_hits" for slot in SHORT_CIRCUIT_SLOTS),
+)
+
+
+def parse_slot_answer(
+    slot: Optional[str],
+    user_message: str,
+    intent: Optional[str],
+    today: Optional[datetime] = None
+) -> Optional[LlamaResponse]:
+    """
+    Try to read user_message as the answer to the pending slot question
+
+    Args:
+        slot: slot_to_fill recorded in the dialogue state (None = nothing asked)
+        user_message: The user's reply
+        intent: The conversation's current intent (kept for the answer)
+
+    Returns:
+        LlamaResponse with the slot filled, or None to fall back to NLU
+    """
+    if slot not in SHORT_CIRCUIT_SLOTS or not intent:
+        return None
+
+    _slot_counters.incr(f"{slot}_attempts")
+    entities = get_rule_nlu().parse_slot(slot, user_message, today)
+    if entities is None:
+        return None
+
+    _slot_counters.incr(f"{slot}_hits")
+    return LlamaResponse(
+        intent=intent,
+        confidence=SLOT_ANSWER_CONFIDENCE,
+        entities=entities,
+        raw_input=user_message
+    )
+
+
+def get_slot_stats() -> Dict[str, Any]:
+    """Per-slot attempts, hits and short-circuit rate"""
+    c = _slot_counters.snapshot()
+    stats = {}
+    for slot in SHORT_CIRCUIT_SLOTS:
+        attempts, hits = c[f"{slot}_attempts"], c[f"{slot}_hits"]
+        stats[slot] = {
+            "attempts": attempts,
+            "hits": hits,
+            "short_circuit_rate": hits / attempts if attempts else 0.0,
+        }
+    return stats
+
+
+register_metrics("slot_short_circuit", get_slot_stats)
@@ -6,22 +6,75 @@ Decouples dialogue_service.py from storage implementation.
 This allows seamless switching:
   🔄 Development: In-memory dict
   📦 Production: Redis
-  💾 Alternative: SQLite
+  💾 Alternative: SQLite (WAL, TTL expiry, group commit)
 
 Interface:
   - get(conversation_id) → DialogueState dict
   - save(conversation_id, state_dict) → None
   - delete(conversation_id) → None
   - exists(conversation_id) → bool
+  - get_versioned(conversation_id) → (state, version)
+  - compare_and_set(conversation_id, state_dict, expected_version) → bool
 """
 
-from typing import Dict, Any, Optional, Protocol
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Protocol, Tuple
 from abc import ABC, abstractmethod
+import copy
 import json
+import queue
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from config.settings import (
+    STATE_STORE,
+    STATE_DB_PATH,
+    STATE_TTL_SECONDS,
+    STATE_SWEEP_INTERVAL_SECONDS,
+    STATE_MEMORY_MAX_ENTRIES,
+    STATE_MEMORY_MAX_BYTES,
+    STATE_MEMORY_SHARDS,
+    STATE_CODEC,
+    STATE_L1_ENABLED,
+    STATE_L1_MAX_ENTRIES,
+    STATE_L1_WRITE_MODE,
+    STATE_L1_TRUST_SECONDS,
+    STATE_CAS_MAX_RETRIES,
+    STATE_STORE_EXECUTOR_WORKERS,
+)
+from utils.metrics import Counters, register_metrics
+from utils.state_codec import decode_state, get_codec
+
+
+# Bounded pool for blocking store calls made from async code
+_store_executor: Optional[ThreadPoolExecutor] = None
+_store_executor_lock = threading.Lock()
+
+
+async def run_blocking(fn, *args):
+    """Run a blocking store call on the bounded store executor"""
+    global _store_executor
+    if _store_executor is None:
+        with _store_executor_lock:
+            if _store_executor is None:
+                _store_executor = ThreadPoolExecutor(
+                    max_workers=STATE_STORE_EXECUTOR_WORKERS, thread_name_prefix="state-store"
+                )
+    return await asyncio.get_running_loop().run_in_executor(_store_executor, lambda: fn(*args))
 
 
 class StateStore(ABC):
-    """Abstract state store interface"""
+    """
+    Abstract state store interface
+    
+    Every method has an async twin (aget, asave, ...) for the async chat
+    pipeline. By default those run the sync method on a bounded executor;
+    stores that can do I/O without blocking override them.
+    """
     
     @abstractmethod
     def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
@@ -47,44 +100,318 @@ class StateStore(ABC):
     def clear_all(self) -> None:
         """Clear all states (testing only)"""
         pass
+    
+    @abstractmethod
+    def get_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """
+        Get dialogue state and its version (0 = no state)
+        
+        Pass the version to compare_and_set to detect concurrent writers.
+        """
+        pass
+    
+    def get_version(self, conversation_id: str) -> int:
+        """Current version only (0 = no state) - a cheap staleness probe"""
+        return self.get_versioned(conversation_id)[1]
+    
+    @abstractmethod
+    def compare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        """
+        Save state only if its version is still expected_version
+        
+        Returns:
+            True if written (version becomes expected_version + 1),
+            False if another writer got there first
+        """
+        pass
+    
+    def merge_entities(
+        self,
+        conversation_id: str,
+        new_entities: Dict[str, Any],
+        default_state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Merge entities into the stored state (new overrides old, None is skipped)
+        
+        Atomic: retried compare-and-set here, a single server-side script in
+        RedisStateStore.
+        
+        Args:
+            new_entities: Fresh NLU extraction
+            default_state: State to merge into when none is stored yet
+        
+        Returns:
+            The merged collected_entities
+        """
+        updates = {name: value for name, value in new_entities.items() if value is not None}
+        for _ in range(STATE_CAS_MAX_RETRIES + 1):
+            stored, version = self.get_versioned(conversation_id)
+            state = copy.deepcopy(stored if stored is not None else default_state)
+            entities = {**(state.get("collected_entities") or {}), **updates}
+            if stored is not None and not updates:
+                return entities
+            state["collected_entities"] = entities
+            if self.compare_and_set(conversation_id, state, version):
+                return entities
+        raise StateConflictError(f"Conversation {conversation_id} kept changing during merge")
+    
+    def close(self) -> None:
+        """Release connections/threads held by the store (no-op by default)"""
+        pass
+    
+    # ═══════════════════════════════════════════════════════
+    # Async interface (default: bounded-executor adapter)
+    # ═══════════════════════════════════════════════════════
+    
+    async def aget(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return await run_blocking(self.get, conversation_id)
+    
+    async def aget_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        return await run_blocking(self.get_versioned, conversation_id)
+    
+    async def aget_version(self, conversation_id: str) -> int:
+        return await run_blocking(self.get_version, conversation_id)
+    
+    async def asave(self, conversation_id: str, state: Dict[str, Any]) -> None:
+        await run_blocking(self.save, conversation_id, state)
+    
+    async def acompare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        return await run_blocking(self.compare_and_set, conversation_id, state, expected_version)
+    
+    async def amerge_entities(
+        self,
+        conversation_id: str,
+        new_entities: Dict[str, Any],
+        default_state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return await run_blocking(self.merge_entities, conversation_id, new_entities, default_state)
+    
+    async def adelete(self, conversation_id: str) -> None:
+        await run_blocking(self.delete, conversation_id)
+    
+    async def aexists(self, conversation_id: str) -> bool:
+        return await run_blocking(self.exists, conversation_id)
+
+
+class StateConflictError(Exception):
+    """Raised when a versioned save keeps losing to concurrent writers"""
+    pass
+
+
+class StateTooLargeError(Exception):
+    """Raised when a state can't be stored within the store's size cap (the old state is kept)"""
+    pass
+
+
+class _Shard:
+    """One lock-striped slice of the in-memory store (LRU order = access order)"""
+    
+    __slots__ = ("lock", "entries", "bytes")
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        # conversation_id → (state, approx_bytes, last_access, version)
+        self.entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float, int]]" = OrderedDict()
+        self.bytes = 0
 
 
 class InMemoryStateStore(StateStore):
     """
-    Simple in-memory store for development
+    Bounded in-memory store (single process)
+    
+    Features:
+    ✅ Thread-safe: keys are hashed onto lock-striped shards
+    ✅ O(1) LRU per shard (OrderedDict in access order)
+    ✅ max_entries / max_bytes caps (split evenly across shards)
+    ✅ Idle TTL: conversations untouched for idle_ttl_seconds expire
     
-    ⚠️ NOT suitable for production:
-    - Lost on service restart
-    - No multi-process support
-    - No concurrent safety
+    ⚠️ Still lost on restart and not shared between processes - use
+    SQLiteStateStore or RedisStateStore for that.
+    
+    Sizes are approximated by the JSON length of the state, measured on save.
+    A state bigger than a shard's byte cap is refused with StateTooLargeError
+    and the stored one is left as it was.
     """
     
-    def __init__(self):
-        self._store: Dict[str, Dict[str, Any]] = {}
+    def __init__(
+        self,
+        max_entries: int = STATE_MEMORY_MAX_ENTRIES,
+        max_bytes: int = STATE_MEMORY_MAX_BYTES,
+        idle_ttl_seconds: float = STATE_TTL_SECONDS,
+        shards: int = STATE_MEMORY_SHARDS
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._shards = [_Shard() for _ in range(shards)]
+        self._shard_max_entries = max(1, max_entries // shards)
+        self._shard_max_bytes = max(1, max_bytes // shards)
+        self.counters = Counters("lru_evictions", "ttl_expirations", "oversized_rejections")
+    
+    def _shard(self, conversation_id: str) -> _Shard:
+        return self._shards[hash(conversation_id) % len(self._shards)]
+    
+    def _remove(self, shard: _Shard, conversation_id: str) -> None:
+        size = shard.entries.pop(conversation_id)[1]
+        shard.bytes -= size
+    
+    def _expire_idle(self, shard: _Shard, now: float) -> None:
+        """Drop idle entries from the LRU end (caller holds the lock)"""
+        cutoff = now - self.idle_ttl_seconds
+        while shard.entries:
+            conversation_id, (_, _, last_access, _) = next(iter(shard.entries.items()))
+            if last_access > cutoff:
+                break
+            self._remove(shard, conversation_id)
+            self.counters.incr("ttl_expirations")
+    
+    def _live_entry(self, shard: _Shard, conversation_id: str, now: float):
+        """Entry if present and not idle-expired (caller holds the lock)"""
+        entry = shard.entries.get(conversation_id)
+        if entry is not None and now - entry[2] >= self.idle_ttl_seconds:
+            self._remove(shard, conversation_id)
+            self.counters.incr("ttl_expirations")
+            return None
+        return entry
     
     def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        return self._store.get(conversation_id)
+        return self.get_versioned(conversation_id)[0]
+    
+    def get_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        shard = self._shard(conversation_id)
+        now = time.monotonic()
+        with shard.lock:
+            entry = self._live_entry(shard, conversation_id, now)
+            if entry is None:
+                return None, 0
+            state, size, _, version = entry
+            shard.entries[conversation_id] = (state, size, now, version)
+            shard.entries.move_to_end(conversation_id)
+            return state, version
     
     def save(self, conversation_id: str, state: Dict[str, Any]) -> None:
-        self._store[conversation_id] = state
+        self._put(conversation_id, state, expected_version=None)
+    
+    def compare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        return self._put(conversation_id, state, expected_version)
+    
+    def _put(self, conversation_id: str, state: Dict[str, Any], expected_version: Optional[int]) -> bool:
+        size = len(json.dumps(state, default=str))
+        shard = self._shard(conversation_id)
+        now = time.monotonic()
+        with shard.lock:
+            entry = self._live_entry(shard, conversation_id, now)
+            version = entry[3] if entry else 0
+            if expected_version is not None and version != expected_version:
+                return False
+            if size > self._shard_max_bytes:
+                # Not a version conflict (retrying can't help) and not a
+                # success: the stored state stays as it was
+                self.counters.incr("oversized_rejections")
+                raise StateTooLargeError(
+                    f"Dialogue state for {conversation_id} ({size} bytes) exceeds the store's memory cap"
+                )
+            if entry is not None:
+                self._remove(shard, conversation_id)
+            self._expire_idle(shard, now)
+            while shard.entries and (
+                len(shard.entries) >= self._shard_max_entries
+                or shard.bytes + size > self._shard_max_bytes
+            ):
+                self._remove(shard, next(iter(shard.entries)))
+                self.counters.incr("lru_evictions")
+            shard.entries[conversation_id] = (state, size, now, version + 1)
+            shard.bytes += size
+            return True
     
     def delete(self, conversation_id: str) -> None:
-        if conversation_id in self._store:
-            del self._store[conversation_id]
+        shard = self._shard(conversation_id)
+        with shard.lock:
+            if conversation_id in shard.entries:
+                self._remove(shard, conversation_id)
     
     def exists(self, conversation_id: str) -> bool:
-        return conversation_id in self._store
+        shard = self._shard(conversation_id)
+        with shard.lock:
+            entry = shard.entries.get(conversation_id)
+            return entry is not None and time.monotonic() - entry[2] < self.idle_ttl_seconds
     
     def clear_all(self) -> None:
-        self._store.clear()
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.bytes = 0
+    
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+    
+    def get_all(self, page_size: int = 100) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Debugging: iterate over all states, page_size at a time
+        
+        Each page is copied under its shard lock, so the store is never
+        locked (or copied) as a whole.
+        """
+        page: Dict[str, Dict[str, Any]] = {}
+        for shard in self._shards:
+            with shard.lock:
+                items = [(cid, entry[0]) for cid, entry in shard.entries.items()]
+            for conversation_id, state in items:
+                page[conversation_id] = state
+                if len(page) >= page_size:
+                    yield page
+                    page = {}
+        if page:
+            yield page
+    
+    def stats(self) -> Dict[str, Any]:
+        entries = len(self)
+        total_bytes = sum(shard.bytes for shard in self._shards)
+        return {
+            **self.counters.snapshot(),
+            "entries": entries,
+            "approx_bytes": total_bytes,
+            "avg_bytes_per_conversation": total_bytes / entries if entries else 0.0,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+    
+    # Native async: every operation is a short in-process critical section,
+    # cheaper to run inline than to hand to a thread
+    
+    async def aget(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return self.get(conversation_id)
+    
+    async def aget_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        return self.get_versioned(conversation_id)
+    
+    async def aget_version(self, conversation_id: str) -> int:
+        return self.get_version(conversation_id)
+    
+    async def asave(self, conversation_id: str, state: Dict[str, Any]) -> None:
+        self.save(conversation_id, state)
+    
+    async def acompare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        return self.compare_and_set(conversation_id, state, expected_version)
+    
+    async def amerge_entities(
+        self,
+        conversation_id: str,
+        new_entities: Dict[str, Any],
+        default_state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return self.merge_entities(conversation_id, new_entities, default_state)
+    
+    async def adelete(self, conversation_id: str) -> None:
+        self.delete(conversation_id)
     
-    def get_all(self) -> Dict[str, Dict[str, Any]]:
-        """Debugging: get all states"""
-        return self._store.copy()
+    async def aexists(self, conversation_id: str) -> bool:
+        return self.exists(conversation_id)
 
 
-# Global store instance (configurable)
-_state_store: StateStore = InMemoryStateStore()
+# Global store instance (configurable; created from settings on first use)
+_state_store: Optional[StateStore] = None
 
 
 def set_state_store(store: StateStore) -> None:
@@ -101,11 +428,26 @@ def set_state_store(store: StateStore) -> None:
 
 def get_state_store() -> StateStore:
     """Get current state store"""
+    global _state_store
+    if _state_store is None:
+        _state_store = create_state_store_from_settings()
     return _state_store
 
 
+def create_state_store_from_settings() -> StateStore:
+    """Build the store selected by STATE_STORE (memory|sqlite), L1-cached if enabled"""
+    if STATE_STORE == "sqlite":
+        store = SQLiteStateStore(STATE_DB_PATH)
+        if STATE_L1_ENABLED:
+            return TieredStateStore(store)
+        return store
+    if STATE_STORE != "memory":
+        print(f"Warning: unknown STATE_STORE '{STATE_STORE}', using in-memory store")
+    return InMemoryStateStore()
+
+
 # ═══════════════════════════════════════════════════════
-# FUTURE IMPLEMENTATIONS (stub)
+# PERSISTENT IMPLEMENTATIONS
 # ═══════════════════════════════════════════════════════
 
 class RedisStateStore(StateStore):
@@ -116,40 +458,258 @@ class RedisStateStore(StateStore):
     ✅ Multi-process safe
     ✅ Distributed ready
     ✅ TTL support (auto-expiry)
-    ✅ Atomic operations
+    ✅ Atomic operations (compare-and-set and entity merge are server-side
+       Lua scripts, sent once and then called by SHA)
+    ✅ One round trip per operation (MGET / pipelines / scripts)
+    ✅ clear_all walks the keyspace with SCAN, never KEYS
+    ✅ Pluggable codec: JSON text or compact binary (utils/state_codec)
+    ✅ Native async methods when given a redis.asyncio client
+       (async_client=); otherwise they run on the bounded store executor
     
-    TODO: Implement when Redis added to stack
+    The version lives next to the state under "<key>:version" with the
+    same TTL.
     """
     
-    def __init__(self, redis_client):
+    # KEYS: state key, version key; ARGV: expected version, encoded state, TTL
+    CAS_SCRIPT = """
+        local version = tonumber(redis.call('GET', KEYS[2]) or '0')
+        if redis.call('EXISTS', KEYS[1]) == 0 then version = 0 end
+        if version ~= tonumber(ARGV[1]) then return 0 end
+        redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+        redis.call('SET', KEYS[2], version + 1, 'EX', ARGV[3])
+        return 1
+    """
+    
+    # Non-None overwrite merge into collected_entities (JSON codec only -
+    # Lua can't read the compact format)
+    # KEYS: state key, version key; ARGV: entities JSON, default state JSON, TTL
+    # Returns the merged entities as JSON, or nil without writing when the
+    # stored row isn't JSON (left by the compact codec - JSON rows start with "{")
+    MERGE_SCRIPT = """
+        local data = redis.call('GET', KEYS[1])
+        if data and string.sub(data, 1, 1) ~= '{' then return false end
+        local state = cjson.decode(data or ARGV[2])
+        local entities = state['collected_entities']
+        if type(entities) ~= 'table' then entities = {} end
+        for name, value in pairs(cjson.decode(ARGV[1])) do
+            entities[name] = value
+        end
+        state['collected_entities'] = entities
+        redis.call('SET', KEYS[1], cjson.encode(state), 'EX', ARGV[3])
+        if data then
+            redis.call('INCR', KEYS[2])
+            redis.call('EXPIRE', KEYS[2], ARGV[3])
+        else
+            redis.call('SET', KEYS[2], 1, 'EX', ARGV[3])
+        end
+        return cjson.encode(entities)
+    """
+    
+    SCAN_BATCH = 500
+    
+    def __init__(self, redis_client, codec: str = STATE_CODEC, async_client=None):
         self.redis = redis_client
+        self.async_redis = async_client
         self.prefix = "dialogue:"
+        self.ttl_seconds = 86400
+        self.codec = get_codec(codec)
+        self._cas = redis_client.register_script(self.CAS_SCRIPT)
+        self._merge = redis_client.register_script(self.MERGE_SCRIPT)
+        if async_client is not None:
+            self._acas = async_client.register_script(self.CAS_SCRIPT)
+            self._amerge = async_client.register_script(self.MERGE_SCRIPT)
+        self.counters = Counters("round_trips", "merges", "scan_calls")
+    
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.prefix}{conversation_id}"
     
     def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        key = f"{self.prefix}{conversation_id}"
-        data = self.redis.get(key)
+        self.counters.incr("round_trips")
+        data = self.redis.get(self._key(conversation_id))
         if data:
-            return json.loads(data)
+            return decode_state(data)
         return None
     
+    def get_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        key = self._key(conversation_id)
+        self.counters.incr("round_trips")
+        data, version = self.redis.mget(key, f"{key}:version")
+        if data:
+            return decode_state(data), int(version or 0)
+        return None, 0
+    
+    def get_version(self, conversation_id: str) -> int:
+        self.counters.incr("round_trips")
+        return int(self.redis.get(f"{self._key(conversation_id)}:version") or 0)
+    
     def save(self, conversation_id: str, state: Dict[str, Any]) -> None:
-        key = f"{self.prefix}{conversation_id}"
+        key = self._key(conversation_id)
         # TTL: 24 hours
-        self.redis.setex(key, 86400, json.dumps(state))
+        pipe = self.redis.pipeline()
+        pipe.setex(key, self.ttl_seconds, self.codec.encode(state))
+        pipe.incr(f"{key}:version")
+        pipe.expire(f"{key}:version", self.ttl_seconds)
+        self.counters.incr("round_trips")
+        pipe.execute()
+    
+    def compare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        key = self._key(conversation_id)
+        self.counters.incr("round_trips")
+        written = self._cas(
+            keys=[key, f"{key}:version"],
+            args=[expected_version, self.codec.encode(state), self.ttl_seconds]
+        )
+        return bool(written)
+    
+    def merge_entities(
+        self,
+        conversation_id: str,
+        new_entities: Dict[str, Any],
+        default_state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if self.codec.name != "json":
+            return super().merge_entities(conversation_id, new_entities, default_state)
+        key = self._key(conversation_id)
+        updates = {name: value for name, value in new_entities.items() if value is not None}
+        self.counters.incr("round_trips")
+        merged = self._merge(
+            keys=[key, f"{key}:version"],
+            args=[json.dumps(updates), json.dumps(default_state), self.ttl_seconds]
+        )
+        if merged is None:  # compact row from before a codec switch
+            return super().merge_entities(conversation_id, new_entities, default_state)
+        self.counters.incr("merges")
+        merged = json.loads(merged)
+        # cjson encodes an empty table as []
+        return merged if isinstance(merged, dict) else {}
     
     def delete(self, conversation_id: str) -> None:
-        key = f"{self.prefix}{conversation_id}"
-        self.redis.delete(key)
+        key = self._key(conversation_id)
+        self.counters.incr("round_trips")
+        self.redis.delete(key, f"{key}:version")
     
     def exists(self, conversation_id: str) -> bool:
-        key = f"{self.prefix}{conversation_id}"
-        return self.redis.exists(key) > 0
+        self.counters.incr("round_trips")
+        return self.redis.exists(self._key(conversation_id)) > 0
     
     def clear_all(self) -> None:
-        # Only for testing
-        keys = self.redis.keys(f"{self.prefix}*")
-        if keys:
-            self.redis.delete(*keys)
+        """Delete every dialogue key in SCAN-sized batches (never blocks Redis like KEYS)"""
+        cursor = 0
+        while True:
+            self.counters.incr("round_trips")
+            self.counters.incr("scan_calls")
+            cursor, keys = self.redis.scan(cursor, match=f"{self.prefix}*", count=self.SCAN_BATCH)
+            if keys:
+                self.counters.incr("round_trips")
+                self.redis.unlink(*keys)
+            if cursor == 0:
+                break
+    
+    def stats(self) -> Dict[str, Any]:
+        return self.counters.snapshot()
+    
+    # ═══════════════════════════════════════════════════════
+    # Native async (redis.asyncio client)
+    # ═══════════════════════════════════════════════════════
+    
+    async def aget(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        if self.async_redis is None:
+            return await super().aget(conversation_id)
+        self.counters.incr("round_trips")
+        data = await self.async_redis.get(self._key(conversation_id))
+        return decode_state(data) if data else None
+    
+    async def aget_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        if self.async_redis is None:
+            return await super().aget_versioned(conversation_id)
+        key = self._key(conversation_id)
+        self.counters.incr("round_trips")
+        data, version = await self.async_redis.mget(key, f"{key}:version")
+        if data:
+            return decode_state(data), int(version or 0)
+        return None, 0
+    
+    async def aget_version(self, conversation_id: str) -> int:
+        if self.async_redis is None:
+            return await super().aget_version(conversation_id)
+        self.counters.incr("round_trips")
+        return int(await self.async_redis.get(f"{self._key(conversation_id)}:version") or 0)
+    
+    async def asave(self, conversation_id: str, state: Dict[str, Any]) -> None:
+        if self.async_redis is None:
+            return await super().asave(conversation_id, state)
+        key = self._key(conversation_id)
+        pipe = self.async_redis.pipeline()
+        pipe.setex(key, self.ttl_seconds, self.codec.encode(state))
+        pipe.incr(f"{key}:version")
+        pipe.expire(f"{key}:version", self.ttl_seconds)
+        self.counters.incr("round_trips")
+        await pipe.execute()
+    
+    async def acompare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        if self.async_redis is None:
+            return await super().acompare_and_set(conversation_id, state, expected_version)
+        key = self._key(conversation_id)
+        self.counters.incr("round_trips")
+        written = await self._acas(
+            keys=[key, f"{key}:version"],
+            args=[expected_version, self.codec.encode(state), self.ttl_seconds]
+        )
+        return bool(written)
+    
+    async def amerge_entities(
+        self,
+        conversation_id: str,
+        new_entities: Dict[str, Any],
+        default_state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if self.async_redis is None or self.codec.name != "json":
+            return await super().amerge_entities(conversation_id, new_entities, default_state)
+        key = self._key(conversation_id)
+        updates = {name: value for name, value in new_entities.items() if value is not None}
+        self.counters.incr("round_trips")
+        merged = await self._amerge(
+            keys=[key, f"{key}:version"],
+            args=[json.dumps(updates), json.dumps(default_state), self.ttl_seconds]
+        )
+        if merged is None:  # compact row from before a codec switch
+            return await super().amerge_entities(conversation_id, new_entities, default_state)
+        self.counters.incr("merges")
+        merged = json.loads(merged)
+        return merged if isinstance(merged, dict) else {}
+    
+    async def adelete(self, conversation_id: str) -> None:
+        if self.async_redis is None:
+            return await super().adelete(conversation_id)
+        key = self._key(conversation_id)
+        self.counters.incr("round_trips")
+        await self.async_redis.delete(key, f"{key}:version")
+    
+    async def aexists(self, conversation_id: str) -> bool:
+        if self.async_redis is None:
+            return await super().aexists(conversation_id)
+        self.counters.incr("round_trips")
+        return await self.async_redis.exists(self._key(conversation_id)) > 0
+
+
+class _FutureEvent:
+    """threading.Event look-alike that resolves an asyncio future from any thread"""
+    
+    __slots__ = ("future", "_loop")
+    
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self.future = self._loop.create_future()
+    
+    def set(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._resolve)
+        except RuntimeError:
+            pass  # the waiter's loop is closed - nobody left to wake
+    
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
 
 
 class SQLiteStateStore(StateStore):
@@ -157,28 +717,620 @@ class SQLiteStateStore(StateStore):
     SQLite-backed state store
     
     Features:
-    ✅ Persistent storage
-    ✅ Simple setup
-    ✅ Suitable for MVP/small deployments
+    ✅ Persistent storage (survives restarts, shareable between workers)
+    ✅ WAL mode: readers never block the writer or each other
+    ✅ Long-lived connections (one writer + one reader per thread)
+    ✅ Group commit: concurrent saves share one transaction
+    ✅ Per-row TTL, expired rows swept in the background
+    ✅ Pluggable codec: JSON text or compact binary (utils/state_codec)
+    ✅ Async: writes await the group commit on a future; reads use a bounded
+       pool of reader threads
     
-    TODO: Implement when needed
+    Writes go through a single writer thread. A save() blocks until the
+    transaction holding it commits, so a read after save sees the write.
     """
     
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str = STATE_DB_PATH,
+        ttl_seconds: float = STATE_TTL_SECONDS,
+        sweep_interval: float = STATE_SWEEP_INTERVAL_SECONDS,
+        max_batch: int = 256,
+        codec: str = STATE_CODEC,
+        read_workers: int = 4
+    ):
         self.db_path = db_path
-        # Initialize table on first use
+        self.codec = get_codec(codec)
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.max_batch = max_batch
+        self.counters = Counters("commits", "writes", "expired_swept")
+        
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._writer_conn = self._connect()
+        self._writer_conn.executescript("""
+            CREATE TABLE IF NOT EXISTS dialogue_states (
+                conversation_id TEXT PRIMARY KEY,
+                state BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS idx_dialogue_states_expires_at
+                ON dialogue_states(expires_at);
+        """)
+        columns = {row[1] for row in self._writer_conn.execute("PRAGMA table_info(dialogue_states)")}
+        if "version" not in columns:
+            self._writer_conn.execute(
+                "ALTER TABLE dialogue_states ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+            )
+        self._local = threading.local()
+        self._read_executor = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="sqlite-state-read")
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._in_flight: list = []
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="sqlite-state-writer", daemon=True)
+        self._writer.start()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly by the writer
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+    
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+    
+    # ═══════════════════════════════════════════════════════
+    # Writer thread (group commit + TTL sweep)
+    # ═══════════════════════════════════════════════════════
+    
+    def _submit(self, sql: str, params: tuple) -> int:
+        """Queue a write, wait for the transaction containing it, return rows changed"""
+        op = (sql, params, threading.Event(), [])
+        self._enqueue(op)
+        op[2].wait()
+        return self._result(op)
+    
+    async def _asubmit(self, sql: str, params: tuple) -> int:
+        """_submit without blocking the event loop: the writer resolves a future"""
+        op = (sql, params, _FutureEvent(), [])
+        self._enqueue(op)
+        await op[2].future
+        return self._result(op)
+    
+    def _enqueue(self, op: tuple) -> None:
+        if self._closed:
+            raise RuntimeError("SQLiteStateStore is closed")
+        self._queue.put(op)
+        if not self._writer.is_alive():
+            # Nothing will ever take this op off the queue
+            self._fail_pending(RuntimeError("SQLiteStateStore writer thread is not running"))
+    
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every queued write (the writer stopped)"""
+        while True:
+            try:
+                op = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if op[0] is None:
+                continue
+            op[3].append(error)
+            op[2].set()
+    
+    @staticmethod
+    def _result(op: tuple) -> int:
+        result = op[3][0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def _write_loop(self) -> None:
+        try:
+            self._write_forever()
+        finally:
+            # Closed or crashed: don't leave anyone waiting on a write
+            error = RuntimeError("SQLiteStateStore writer thread is not running")
+            for op in self._in_flight:
+                if not op[3]:
+                    op[3].append(error)
+                op[2].set()
+            self._fail_pending(error)
+    
+    def _write_forever(self) -> None:
+        last_sweep = time.time()
+        while True:
+            try:
+                first = self._queue.get(timeout=self.sweep_interval)
+            except queue.Empty:
+                first = None
+            
+            if time.time() - last_sweep >= self.sweep_interval:
+                self._sweep()
+                last_sweep = time.time()
+            if first is None:
+                continue
+            if first[0] is None:  # close() sentinel
+                return
+            
+            # Everything that queued up while the last commit ran joins this one
+            batch = [first]
+            while len(batch) < self.max_batch:
+                try:
+                    op = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if op[0] is None:
+                    self._queue.put(op)  # handle the sentinel after this batch
+                    break
+                batch.append(op)
+            self._in_flight = batch
+            self._commit_batch(batch)
+            self._in_flight = []
+    
+    def _commit_batch(self, batch: list) -> None:
+        """
+        One transaction for the whole batch
+        
+        Any failure (not just sqlite3.Error - a bad parameter raises
+        TypeError/OverflowError) rolls it back and is reported to every
+        op; the waiters are always woken and the writer keeps running.
+        """
+        conn = self._writer_conn
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rowcounts = [conn.execute(sql, params).rowcount for sql, params, _, _ in batch]
+            conn.execute("COMMIT")
+            for op, rowcount in zip(batch, rowcounts):
+                op[3].append(rowcount)
+            self.counters.incr("commits")
+            self.counters.incr("writes", len(batch))
+        except Exception as e:
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except sqlite3.Error as rollback_error:
+                print(f"Warning: state store rollback failed: {rollback_error}")
+            for op in batch:
+                op[3][:] = [RuntimeError(f"State store write failed: {e!r}")]
+        finally:
+            for op in batch:
+                if not op[3]:
+                    op[3].append(RuntimeError("State store write failed"))
+                op[2].set()
+    
+    def _sweep(self) -> None:
+        try:
+            cursor = self._writer_conn.execute(
+                "DELETE FROM dialogue_states WHERE expires_at <= ?", (time.time(),)
+            )
+            self.counters.incr("expired_swept", cursor.rowcount)
+        except Exception as e:
+            print(f"Warning: state store sweep failed: {e}")
+    
+    # ═══════════════════════════════════════════════════════
+    # StateStore interface
+    # ═══════════════════════════════════════════════════════
     
     def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        pass
+        return self.get_versioned(conversation_id)[0]
+    
+    def get_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        row = self._reader().execute(
+            "SELECT state, version FROM dialogue_states WHERE conversation_id = ? AND expires_at > ?",
+            (conversation_id, time.time())
+        ).fetchone()
+        return (decode_state(row[0]), row[1]) if row else (None, 0)
+    
+    def get_version(self, conversation_id: str) -> int:
+        row = self._reader().execute(
+            "SELECT version FROM dialogue_states WHERE conversation_id = ? AND expires_at > ?",
+            (conversation_id, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+    
+    _UPSERT_SQL = (
+        "INSERT INTO dialogue_states (conversation_id, state, updated_at, expires_at, version)"
+        " VALUES (?, ?, ?, ?, 1)"
+        " ON CONFLICT(conversation_id) DO UPDATE SET"
+        " state = excluded.state, updated_at = excluded.updated_at, expires_at = excluded.expires_at,"
+        " version = CASE WHEN dialogue_states.expires_at > excluded.updated_at"
+        " THEN dialogue_states.version + 1 ELSE 1 END"
+    )
+    
+    def _save_op(self, conversation_id: str, state: Dict[str, Any]) -> Tuple[str, tuple]:
+        now = time.time()
+        return self._UPSERT_SQL, (conversation_id, self.codec.encode(state), now, now + self.ttl_seconds)
+    
+    def _cas_op(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> Tuple[str, tuple]:
+        now = time.time()
+        if expected_version == 0:
+            # Insert, or take over a row that has expired (reads treat it as absent)
+            return (
+                self._UPSERT_SQL + " WHERE dialogue_states.expires_at <= excluded.updated_at",
+                (conversation_id, self.codec.encode(state), now, now + self.ttl_seconds)
+            )
+        return (
+            "UPDATE dialogue_states SET state = ?, updated_at = ?, expires_at = ?, version = version + 1"
+            " WHERE conversation_id = ? AND version = ? AND expires_at > ?",
+            (self.codec.encode(state), now, now + self.ttl_seconds, conversation_id, expected_version, now)
+        )
+    
+    _DELETE_SQL = "DELETE FROM dialogue_states WHERE conversation_id = ?"
     
     def save(self, conversation_id: str, state: Dict[str, Any]) -> None:
-        pass
+        self._submit(*self._save_op(conversation_id, state))
+    
+    def compare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        return self._submit(*self._cas_op(conversation_id, state, expected_version)) > 0
     
     def delete(self, conversation_id: str) -> None:
-        pass
+        self._submit(self._DELETE_SQL, (conversation_id,))
     
     def exists(self, conversation_id: str) -> bool:
-        pass
+        row = self._reader().execute(
+            "SELECT 1 FROM dialogue_states WHERE conversation_id = ? AND expires_at > ?",
+            (conversation_id, time.time())
+        ).fetchone()
+        return row is not None
     
     def clear_all(self) -> None:
-        pass
+        self._submit("DELETE FROM dialogue_states", ())
+    
+    def stats(self) -> Dict[str, Any]:
+        c = self.counters.snapshot()
+        return {
+            **c,
+            "avg_writes_per_commit": c["writes"] / c["commits"] if c["commits"] else 0.0,
+            "pending_writes": self._queue.qsize(),
+        }
+    
+    # Async: writes join the group commit and await a future (no thread
+    # parked per write); reads run on a small bounded pool of reader threads
+    
+    async def _aread(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, lambda: fn(*args))
+    
+    async def aget(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return (await self._aread(self.get_versioned, conversation_id))[0]
+    
+    async def aget_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        return await self._aread(self.get_versioned, conversation_id)
+    
+    async def aget_version(self, conversation_id: str) -> int:
+        return await self._aread(self.get_version, conversation_id)
+    
+    async def aexists(self, conversation_id: str) -> bool:
+        return await self._aread(self.exists, conversation_id)
+    
+    async def asave(self, conversation_id: str, state: Dict[str, Any]) -> None:
+        await self._asubmit(*self._save_op(conversation_id, state))
+    
+    async def acompare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        return await self._asubmit(*self._cas_op(conversation_id, state, expected_version)) > 0
+    
+    async def adelete(self, conversation_id: str) -> None:
+        await self._asubmit(self._DELETE_SQL, (conversation_id,))
+    
+    def close(self) -> None:
+        """Flush queued writes, stop the writer and close all connections"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((None, None, None, None))
+        self._writer.join()
+        self._read_executor.shutdown(wait=True)
+        self._writer_conn.close()
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+
+
+# ═══════════════════════════════════════════════════════
+# TIERED STORE (in-process L1 over any persistent L2)
+# ═══════════════════════════════════════════════════════
+
+class TieredStateStore(StateStore):
+    """
+    Small in-process LRU (L1) in front of any StateStore (L2)
+    
+    Most conversations stay on one worker, so most turns can be served from
+    L1 instead of a Redis/SQLite read. Each L1 entry remembers the L2
+    version it was read or written at:
+    
+    ✅ Reads: an L1 hit younger than trust_seconds is served as is; an older
+       one is checked with a version probe (get_version - no payload, no
+       decode) and refetched only if another worker wrote in between.
+       trust_seconds=0 (default) probes on every hit.
+    ✅ Writes: compare_and_set always checks the version. A conflict drops
+       the L1 entry, so the caller's re-read comes from L2.
+    
+    Write modes:
+      "through" - compare_and_set writes L2 before returning (default)
+      "behind"  - compare_and_set checks L1's version, updates L1 and
+                  returns; a background thread applies the writes to L2 in
+                  order. A write that then loses in L2 (another worker
+                  wrote) is dropped with a warning - only use with sticky
+                  sessions. Plain save() is always write-through.
+    
+    States are copied in and out of L1 so callers can't mutate the cache.
+    """
+    
+    def __init__(
+        self,
+        l2: StateStore,
+        max_entries: int = STATE_L1_MAX_ENTRIES,
+        write_mode: str = STATE_L1_WRITE_MODE,
+        trust_seconds: float = STATE_L1_TRUST_SECONDS
+    ):
+        if write_mode not in ("through", "behind"):
+            raise ValueError(f"write_mode must be 'through' or 'behind', got '{write_mode}'")
+        self.l2 = l2
+        self.max_entries = max_entries
+        self.write_mode = write_mode
+        self.trust_seconds = trust_seconds
+        # conversation_id → (state, version, validated_at)
+        self._l1: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = Counters(
+            "l1_hits", "l1_misses", "version_probes", "stale_invalidations",
+            "l2_reads", "l2_writes", "write_conflicts", "write_behind_conflicts"
+        )
+        
+        self._pending: Dict[str, int] = {}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._flusher: Optional[threading.Thread] = None
+        if write_mode == "behind":
+            self._flusher = threading.Thread(target=self._flush_loop, name="state-write-behind", daemon=True)
+            self._flusher.start()
+    
+    # ═══════════════════════════════════════════════════════
+    # L1
+    # ═══════════════════════════════════════════════════════
+    
+    def _l1_put(self, conversation_id: str, state: Dict[str, Any], version: int) -> None:
+        with self._lock:
+            self._l1[conversation_id] = (copy.deepcopy(state), version, time.monotonic())
+            self._l1.move_to_end(conversation_id)
+            while len(self._l1) > self.max_entries:
+                oldest = next(iter(self._l1))
+                if oldest in self._pending:
+                    break  # never drop a state whose write hasn't reached L2
+                del self._l1[oldest]
+    
+    def _l1_drop(self, conversation_id: str) -> None:
+        with self._lock:
+            self._l1.pop(conversation_id, None)
+    
+    def _cache_read(self, conversation_id: str, state: Optional[Dict[str, Any]], version: int):
+        self.counters.incr("l2_reads")
+        if state is not None:
+            self._l1_put(conversation_id, state, version)
+        return state, version
+    
+    def _read_l2(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        return self._cache_read(conversation_id, *self.l2.get_versioned(conversation_id))
+    
+    async def _aread_l2(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        return self._cache_read(conversation_id, *await self.l2.aget_versioned(conversation_id))
+    
+    def _l1_lookup(self, conversation_id: str):
+        """(entry or None, has pending write-behind, needs a version probe)"""
+        with self._lock:
+            entry = self._l1.get(conversation_id)
+            if entry is not None:
+                self._l1.move_to_end(conversation_id)
+            pending = conversation_id in self._pending
+        needs_probe = (
+            entry is not None and not pending
+            and time.monotonic() - entry[2] >= self.trust_seconds
+        )
+        if entry is None:
+            self.counters.incr("l1_misses")
+        elif needs_probe:
+            self.counters.incr("version_probes")
+        return entry, pending, needs_probe
+    
+    def _l1_stale(self, conversation_id: str) -> None:
+        # Another worker wrote (or the state expired) - L1 is stale
+        self.counters.incr("stale_invalidations")
+        self.counters.incr("l1_misses")
+        self._l1_drop(conversation_id)
+    
+    def _l1_hit(self, conversation_id: str, entry: tuple, validated: bool) -> Tuple[Dict[str, Any], int]:
+        state, version, _ = entry
+        if validated:
+            with self._lock:
+                if conversation_id in self._l1:
+                    self._l1[conversation_id] = (state, version, time.monotonic())
+        self.counters.incr("l1_hits")
+        return copy.deepcopy(state), version
+    
+    def _after_l2_write(self, conversation_id: str, state: Dict[str, Any], expected_version: int, written: bool) -> bool:
+        self.counters.incr("l2_writes")
+        if not written:
+            self.counters.incr("write_conflicts")
+            self._l1_drop(conversation_id)
+            return False
+        self._l1_put(conversation_id, state, expected_version + 1)
+        return True
+    
+    # ═══════════════════════════════════════════════════════
+    # StateStore interface
+    # ═══════════════════════════════════════════════════════
+    
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return self.get_versioned(conversation_id)[0]
+    
+    def get_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        entry, pending, needs_probe = self._l1_lookup(conversation_id)
+        if entry is None:
+            if pending:
+                self.flush()
+            return self._read_l2(conversation_id)
+        if needs_probe and self.l2.get_version(conversation_id) != entry[1]:
+            self._l1_stale(conversation_id)
+            return self._read_l2(conversation_id)
+        return self._l1_hit(conversation_id, entry, needs_probe)
+    
+    def get_version(self, conversation_id: str) -> int:
+        return self.get_versioned(conversation_id)[1]
+    
+    def save(self, conversation_id: str, state: Dict[str, Any]) -> None:
+        self.flush_conversation(conversation_id)
+        self.l2.save(conversation_id, state)
+        self.counters.incr("l2_writes")
+        self._l1_drop(conversation_id)  # new L2 version unknown - reload on next read
+    
+    def compare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        if self.write_mode == "behind":
+            if not self._l1_has(conversation_id):
+                self.get_versioned(conversation_id)  # loads L1, or confirms there is no state
+            return self._write_behind(conversation_id, state, expected_version)
+        written = self.l2.compare_and_set(conversation_id, state, expected_version)
+        return self._after_l2_write(conversation_id, state, expected_version, written)
+    
+    # Native async: L1 work inline, L2 through the wrapped store's async methods
+    
+    async def aget(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        return (await self.aget_versioned(conversation_id))[0]
+    
+    async def aget_versioned(self, conversation_id: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        entry, pending, needs_probe = self._l1_lookup(conversation_id)
+        if entry is None:
+            if pending:
+                await run_blocking(self.flush)
+            return await self._aread_l2(conversation_id)
+        if needs_probe and await self.l2.aget_version(conversation_id) != entry[1]:
+            self._l1_stale(conversation_id)
+            return await self._aread_l2(conversation_id)
+        return self._l1_hit(conversation_id, entry, needs_probe)
+    
+    async def aget_version(self, conversation_id: str) -> int:
+        return (await self.aget_versioned(conversation_id))[1]
+    
+    async def acompare_and_set(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        if self.write_mode == "behind":
+            if not self._l1_has(conversation_id):
+                await self.aget_versioned(conversation_id)
+            return self._write_behind(conversation_id, state, expected_version)
+        written = await self.l2.acompare_and_set(conversation_id, state, expected_version)
+        return self._after_l2_write(conversation_id, state, expected_version, written)
+    
+    async def aexists(self, conversation_id: str) -> bool:
+        return (await self.aget_versioned(conversation_id))[0] is not None
+    
+    def delete(self, conversation_id: str) -> None:
+        self.flush_conversation(conversation_id)
+        self._l1_drop(conversation_id)
+        self.l2.delete(conversation_id)
+    
+    def exists(self, conversation_id: str) -> bool:
+        return self.get_versioned(conversation_id)[0] is not None
+    
+    def clear_all(self) -> None:
+        self.flush()
+        with self._lock:
+            self._l1.clear()
+        self.l2.clear_all()
+    
+    # ═══════════════════════════════════════════════════════
+    # Write-behind
+    # ═══════════════════════════════════════════════════════
+    
+    def _l1_has(self, conversation_id: str) -> bool:
+        with self._lock:
+            return conversation_id in self._l1
+    
+    def _write_behind(self, conversation_id: str, state: Dict[str, Any], expected_version: int) -> bool:
+        """Check the version against L1 (already loaded), update it, queue the L2 write"""
+        with self._lock:
+            entry = self._l1.get(conversation_id)
+            version = entry[1] if entry else 0
+            if version != expected_version:
+                self.counters.incr("write_conflicts")
+                return False
+            self._pending[conversation_id] = self._pending.get(conversation_id, 0) + 1
+        self._l1_put(conversation_id, state, expected_version + 1)
+        self._queue.put((conversation_id, copy.deepcopy(state), expected_version))
+        return True
+    
+    def _flush_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                conversation_id, state, expected_version = item
+                self.counters.incr("l2_writes")
+                try:
+                    written = self.l2.compare_and_set(conversation_id, state, expected_version)
+                except Exception as e:
+                    print(f"Warning: write-behind to L2 failed for {conversation_id}: {e}")
+                    written = False
+                with self._lock:
+                    remaining = self._pending[conversation_id] - 1
+                    if remaining:
+                        self._pending[conversation_id] = remaining
+                    else:
+                        del self._pending[conversation_id]
+                if not written:
+                    self.counters.incr("write_behind_conflicts")
+                    print(f"Warning: write-behind for {conversation_id} lost to a newer L2 write; dropped")
+                    self._l1_drop(conversation_id)
+            finally:
+                self._queue.task_done()
+    
+    def flush(self) -> None:
+        """Wait until every write-behind write has reached L2"""
+        if self._flusher is not None:
+            self._queue.join()
+    
+    def flush_conversation(self, conversation_id: str) -> None:
+        if conversation_id in self._pending:
+            self.flush()
+    
+    # ═══════════════════════════════════════════════════════
+    # Stats / lifecycle
+    # ═══════════════════════════════════════════════════════
+    
+    def stats(self) -> Dict[str, Any]:
+        c = self.counters.snapshot()
+        lookups = c["l1_hits"] + c["l1_misses"]
+        return {
+            **c,
+            "l1_entries": len(self._l1),
+            "l1_hit_ratio": c["l1_hits"] / lookups if lookups else 0.0,
+            # Every hit avoids a full read; hits inside trust_seconds avoid the probe too
+            "l2_reads_saved": c["l1_hits"],
+            "l2_round_trips_saved": c["l1_hits"] - (c["version_probes"] - c["stale_invalidations"]),
+            "write_behind_pending": self._queue.qsize(),
+            "l2": self.l2.stats() if hasattr(self.l2, "stats") else {},
+        }
+    
+    def close(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            self._queue.put(None)
+            self._flusher.join()
+        self.l2.close()
+
+
+def _state_store_metrics() -> Dict[str, Any]:
+    store = get_state_store()
+    stats = store.stats() if hasattr(store, "stats") else {}
+    return {"backend": type(store).__name__, **stats}
+
+
+register_metrics("state_store", _state_store_metrics)
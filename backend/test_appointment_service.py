@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Verify AppointmentService against a throwaway clinic database"""
+from services.appointment_service import AppointmentService
+from testing.clinic_db import clinic_db
+from utils.db_utils import DatabaseError, execute_query, transaction
+
+
+def test_transaction_commits_once_and_returns_ids():
+    with clinic_db():
+        with transaction() as tx:
+            first = tx.insert("INSERT INTO customers (name, phone) VALUES (?, ?)", ("Maria", "555"))
+            rows = tx.query("INSERT INTO customers (name, phone) VALUES (?, ?) RETURNING id, name",
+                            ("Omar", "556"))
+            assert tx.executemany(
+                "UPDATE customers SET email = ? WHERE id = ?",
+                [("maria@example.com", first), ("omar@example.com", rows[0]["id"])],
+            ) == 2
+        assert rows == [{"id": first + 1, "name": "Omar"}]
+        assert execute_query("SELECT email FROM customers WHERE id = ?", (first,)) == [
+            {"email": "maria@example.com"}
+        ]
+
+
+def test_transaction_rolls_back_everything_on_error():
+    with clinic_db():
+        try:
+            with transaction() as tx:
+                tx.insert("INSERT INTO customers (name, phone) VALUES ('Maria', '555')")
+                tx.insert("INSERT INTO customers (name, phone) VALUES ('Maria 2', '555')")  # UNIQUE phone
+        except DatabaseError:
+            pass
+        else:
+            raise AssertionError("duplicate phone should fail")
+        assert execute_query("SELECT * FROM customers WHERE phone = '555'") == []
+
+
+def test_book_appointment_returns_new_id_in_one_checkout():
+    with clinic_db() as pool:
+        customer_id = AppointmentService.find_or_create_customer("Maria Lopez", "5550001")
+        assert AppointmentService.find_or_create_customer(phone="5550001") == customer_id
+
+        before = pool.stats()["checkouts"]
+        result = AppointmentService.book_appointment(1, customer_id, 2, "2026-01-06", "10:00")
+        assert result["success"]
+        assert pool.stats()["checkouts"] - before == 1
+
+        booked = execute_query("SELECT * FROM appointments WHERE id = ?", (result["appointment_id"],))
+        assert booked[0]["customer_id"] == customer_id
+
+        cancelled = AppointmentService.cancel_appointment(result["appointment_id"])
+        assert cancelled["success"]
+        assert not AppointmentService.cancel_appointment(result["appointment_id"])["success"]
+
+
+def test_book_appointment_rejects_unknown_doctor():
+    with clinic_db():
+        result = AppointmentService.book_appointment(1, 1, 99, "2026-01-06", "10:00")
+        assert result["errors"] == ["invalid_doctor_or_service"]
+        assert len(execute_query("SELECT * FROM appointments")) == 1  # sample row only
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""Verify the availability cache and its invalidation on appointment writes"""
+from datetime import date, timedelta
+
+from services.appointment_service import AppointmentService
+from services.availability_cache import AvailabilityCache, get_availability_cache, set_availability_cache
+from services.availability_service import AvailabilityService
+from services.slot_index import SlotIndex
+from testing.clinic_db import clinic_db
+from utils.db_utils import execute_update
+
+
+def _next_weekday(offset: int = 1) -> date:
+    day = date.today() + timedelta(days=offset)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def _free(doctor_id, day):
+    return AvailabilityService._generate_time_slots(day, doctor_id)
+
+
+def _with_cache(cache: AvailabilityCache):
+    """Install a fresh cache for one test, restoring the global one after"""
+    previous = get_availability_cache()
+    set_availability_cache(cache)
+    return previous
+
+
+def test_warm_reads_skip_sqlite():
+    previous = _with_cache(AvailabilityCache())
+    try:
+        with clinic_db() as pool:
+            AvailabilityService.get_available_dates(doctor_id=1, days_ahead=14)
+            before = pool.stats()["checkouts"]
+            for _ in range(5):
+                AvailabilityService.get_available_dates(doctor_id=1, days_ahead=14)
+                _free(1, _next_weekday())
+            assert pool.stats()["checkouts"] == before
+
+            stats = get_availability_cache().stats()
+            assert stats["loads"] == 1
+            assert stats["hit_rate"] > 0.8
+    finally:
+        set_availability_cache(previous)
+
+
+def test_book_cancel_modify_invalidate_precisely():
+    day, other_day = _next_weekday(), _next_weekday(3)
+    previous = _with_cache(AvailabilityCache())
+    try:
+        with clinic_db():
+            customer_id = AppointmentService.find_or_create_customer("Maria Lopez", "5550001")
+            assert "10:00" in _free(1, day) and "14:00" in _free(2, day)
+            assert "09:00" in _free(1, other_day)
+            cache = get_availability_cache()
+
+            booked = AppointmentService.book_appointment(1, customer_id, 1, day.isoformat(), "10:00")
+            assert "10:00" not in _free(1, day)
+            # Other doctors' cached days are untouched
+            hits = cache.stats()["hits"]
+            assert "14:00" in _free(2, day)
+            assert cache.stats()["hits"] == hits + 1
+
+            AppointmentService.modify_appointment(
+                booked["appointment_id"], new_date=other_day.isoformat(), new_time="09:00"
+            )
+            assert "10:00" in _free(1, day)
+            assert "09:00" not in _free(1, other_day)
+
+            AppointmentService.cancel_appointment(booked["appointment_id"])
+            assert "09:00" in _free(1, other_day)
+    finally:
+        set_availability_cache(previous)
+
+
+def test_clinic_wide_view_invalidated_by_any_doctor():
+    day = _next_weekday()
+    previous = _with_cache(AvailabilityCache())
+    try:
+        with clinic_db():
+            customer_id = AppointmentService.find_or_create_customer("Maria Lopez", "5550001")
+            assert "11:00" in _free(None, day)
+            AppointmentService.book_appointment(1, customer_id, 2, day.isoformat(), "11:00")
+            assert "11:00" not in _free(None, day)
+    finally:
+        set_availability_cache(previous)
+
+
+def test_ttl_is_a_safety_net_for_outside_writes():
+    day = _next_weekday()
+    cache = AvailabilityCache(ttl_seconds=0)
+    previous = _with_cache(cache)
+    try:
+        with clinic_db():
+            assert "15:00" in _free(1, day)
+            # Written behind the service's back: only the TTL catches it
+            execute_update(
+                "INSERT INTO appointments (service_id, customer_id, doctor_id, date, time, status) "
+                "VALUES (1, 1, 1, ?, '15:00', 'confirmed')",
+                (day.isoformat(),),
+            )
+            assert "15:00" not in _free(1, day)
+            assert cache.stats()["expirations"] >= 1
+    finally:
+        set_availability_cache(previous)
+
+
+def test_load_racing_a_write_is_not_cached():
+    day = _next_weekday()
+    cache = AvailabilityCache()
+    grid = AvailabilityService.grid()
+    real_load = SlotIndex.load
+    descriptor = SlotIndex.__dict__["load"]
+
+    def load_then_write(*args, **kwargs):
+        index = real_load(*args, **kwargs)
+        cache.invalidate(1, day)  # a booking committed while we were reading
+        return index
+
+    with clinic_db():
+        SlotIndex.load = load_then_write
+        try:
+            cache.load_index(grid, 1, day, day)
+        finally:
+            SlotIndex.load = descriptor
+
+        assert cache.stats()["stale_loads_dropped"] == 1
+        cache.load_index(grid, 1, day, day)
+        assert cache.stats()["loads"] == 2
+
+
+def test_lru_eviction_bounds_size():
+    day = _next_weekday()
+    cache = AvailabilityCache(max_entries=3)
+    with clinic_db():
+        cache.load_index(AvailabilityService.grid(), 1, day, day + timedelta(days=4))
+    stats = cache.stats()
+    assert stats["size"] == 3 and stats["evictions"] == 2
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""Verify AvailabilityService against the real appointments schema"""
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+
+from main import app
+from services.availability_cache import clear_availability
+from services.availability_service import AvailabilityService
+from testing.clinic_db import clinic_db
+from utils.db_utils import DatabaseError, execute_update
+
+
+def _next_weekday(offset: int = 1) -> date:
+    day = date.today() + timedelta(days=offset)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def _book(doctor_id, day, time_str, status="confirmed", service_id=1):
+    execute_update(
+        "INSERT INTO appointments (service_id, customer_id, doctor_id, date, time, status) "
+        "VALUES (?, 1, ?, ?, ?, ?)",
+        (service_id, doctor_id, day.isoformat(), time_str, status),
+    )
+
+
+def _slots(dates, day):
+    return next(entry["slots"] for entry in dates if entry["date"] == day.isoformat())
+
+
+def test_booked_slots_are_excluded_in_one_query():
+    day = _next_weekday()
+    with clinic_db() as pool:
+        _book(1, day, "10:00")
+        _book(1, day, "9:30")            # unpadded time still blocks 09:30
+        _book(1, day, "11:00", "cancelled")
+        _book(2, day, "14:00")           # other doctor
+
+        before = pool.stats()["checkouts"]
+        dates = AvailabilityService.get_available_dates(doctor_id=1, days_ahead=14)
+        assert pool.stats()["checkouts"] - before == 1
+
+        slots = _slots(dates, day)
+        assert "10:00" not in slots and "09:30" not in slots
+        assert "11:00" in slots and "14:00" in slots
+        assert len(slots) == 16
+
+        # Any doctor: a time is taken if anyone is booked then
+        slots = _slots(AvailabilityService.get_available_dates(days_ahead=14), day)
+        assert "14:00" not in slots and "11:00" in slots
+
+        assert not AvailabilityService._is_slot_available(1, day, "10:00")
+        assert AvailabilityService._is_slot_available(2, day, "10:00")
+
+
+def test_result_shape_skips_weekends_and_full_days():
+    day = _next_weekday()
+    with clinic_db():
+        for time_str in AvailabilityService._slot_times():
+            _book(2, day, time_str)
+        dates = AvailabilityService.get_available_dates(doctor_id=2, days_ahead=14)
+
+        assert day.isoformat() not in {entry["date"] for entry in dates}
+        for entry in dates:
+            parsed = date.fromisoformat(entry["date"])
+            assert parsed.weekday() < 5
+            assert entry["day_of_week"] == parsed.strftime("%A")
+            assert entry["slots"] == AvailabilityService._slot_times()
+
+
+
+def test_service_duration_limits_start_times():
+    day = _next_weekday()
+    with clinic_db():
+        # Sample services: 1 Cleaning 30 min, 2 Extraction 60 min, 3 Checkup 20 min
+        _book(2, day, "10:00", service_id=2)     # Extraction holds 10:00-11:00
+        _book(2, day, "13:00", service_id=3)     # Checkup holds 13:00 only
+
+        # Single slots: both halves of the Extraction are taken
+        slots = AvailabilityService._generate_time_slots(day, doctor_id=2)
+        assert "10:00" not in slots and "10:30" not in slots and "11:00" in slots
+
+        extraction = AvailabilityService.service_duration(2)
+        assert extraction == 60
+        slots = _slots(AvailabilityService.get_available_dates(2, 14, extraction), day)
+        assert "09:00" in slots and "11:00" in slots and "17:00" in slots
+        for time_str in ("09:30", "12:30", "13:00", "17:30"):
+            assert time_str not in slots
+        assert not AvailabilityService._is_slot_available(2, day, "12:30", extraction)
+        assert AvailabilityService._is_slot_available(2, day, "12:30", 20)
+
+        # A part-of-day hint narrows the offered start times
+        slots = _slots(AvailabilityService.get_available_dates(2, 14, part_of_day="morning"), day)
+        assert slots == ["09:00", "09:30", "11:00", "11:30"]
+        slots = _slots(AvailabilityService.get_available_dates(2, 14, part_of_day="evening"), day)
+        assert slots == ["17:00", "17:30"]
+
+
+def test_availability_api_takes_service_or_duration():
+    day = _next_weekday()
+
+    async def get(client, **params):
+        return await client.get("/api/availability/", params=params)
+
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return await asyncio.gather(
+                get(client, doctor_id=2, service_id=2),
+                get(client, doctor_id=2, duration_minutes=90),
+                get(client, doctor_id=2),
+                get(client, service_id=999),
+                get(client, duration_minutes=0),
+            )
+
+    with clinic_db():
+        _book(2, day, "16:00")
+        extraction, ninety, single, missing, invalid = asyncio.run(scenario())
+
+    assert extraction.status_code == 200
+    slots = _slots(extraction.json(), day)
+    assert "15:30" not in slots and "17:00" in slots and "17:30" not in slots
+    slots = _slots(ninety.json(), day)
+    assert "15:00" not in slots and "16:30" in slots and "17:00" not in slots
+    assert "17:30" in _slots(single.json(), day)
+    assert missing.status_code == 404
+    assert invalid.status_code == 422
+
+
+def test_earliest_available_across_doctors_stops_early():
+    day = _next_weekday()
+    with clinic_db() as pool:
+        for time_str in AvailabilityService._slot_times():
+            _book(1, day, time_str)
+        _book(2, day, "09:00", service_id=2)   # Extraction: Dr. Li free from 10:00
+
+        before = pool.stats()["checkouts"]
+        options = AvailabilityService.get_earliest_available(duration_minutes=60, limit=3, days_ahead=90)
+        assert pool.stats()["checkouts"] - before == 2    # doctors + one 7-day window
+        assert [(o["doctor_id"], o["date"], o["time"]) for o in options] == [
+            (2, day.isoformat(), "10:00"), (2, day.isoformat(), "10:30"), (2, day.isoformat(), "11:00")
+        ]
+        assert options[0]["doctor_name"] == "Dr. Li"
+        assert options[0]["day_of_week"] == day.strftime("%A")
+
+        # Doctor 1 alone: the first day is full, so the next weekday
+        options = AvailabilityService.get_earliest_available(limit=1, doctor_ids=[1])
+        assert date.fromisoformat(options[0]["date"]) > day and options[0]["time"] == "09:00"
+
+        # Earliest slots are past the first window: keep going, window by window
+        for offset in range(1, 9):
+            for time_str in AvailabilityService._slot_times():
+                for doctor_id in (1, 2):
+                    _book(doctor_id, date.today() + timedelta(days=offset), time_str)
+        clear_availability()  # written behind the service's back
+        options = AvailabilityService.get_earliest_available(limit=1)
+        assert date.fromisoformat(options[0]["date"]) > date.today() + timedelta(days=8)
+
+
+def test_earliest_api():
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return await asyncio.gather(
+                client.get("/api/availability/earliest", params={"service_id": 2, "limit": 2}),
+                client.get("/api/availability/earliest", params={"limit": 0}),
+            )
+
+    with clinic_db():
+        options, invalid = asyncio.run(scenario())
+    assert options.status_code == 200
+    body = options.json()
+    assert len(body) == 2 and {"doctor_id", "doctor_name", "date", "time"} <= set(body[0])
+    assert invalid.status_code == 422
+
+
+def test_pool_timeout_is_not_reported_as_free_slots():
+    """A failed bookings read must surface, never come back as an empty (all free) day"""
+    day = _next_weekday()
+
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return await client.get("/api/availability/")
+
+    with clinic_db(size=1, timeout=0.05) as pool:
+        _book(1, day, "10:00")
+        held = pool.acquire()  # the only connection: every read times out
+        try:
+            for check in (
+                lambda: AvailabilityService.get_available_dates(doctor_id=1, days_ahead=14),
+                lambda: AvailabilityService._is_slot_available(1, day, "10:00"),
+            ):
+                try:
+                    check()
+                except DatabaseError:
+                    pass
+                else:
+                    raise AssertionError("expected DatabaseError")
+            assert AvailabilityService.get_earliest_available(limit=1) == []
+            response = asyncio.run(scenario())
+        finally:
+            pool.release(held)
+
+        assert response.status_code == 500
+        assert pool.stats()["timeouts"] >= 3
+        assert "10:00" not in _slots(AvailabilityService.get_available_dates(doctor_id=1), day)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Verify the async chat pipeline: backpressure and responsiveness"""
+import asyncio
+
+import httpx
+
+from main import app
+from services.llm_limiter import LLMConcurrencyLimiter, get_llm_limiter, set_llm_limiter
+from services.llm_transport import OllamaHTTPTransport, get_transport, set_transport
+from testing.fake_ollama import FakeOllamaServer
+
+# Too open-ended for the fast path, so every request needs the model
+OPEN_ENDED = "Could someone look at my sore gum sometime"
+
+
+async def _run_with_fake_model(limiter: LLMConcurrencyLimiter, scenario):
+    previous_transport, previous_limiter = get_transport(), get_llm_limiter()
+    with FakeOllamaServer(latency=0.3) as server:
+        transport = OllamaHTTPTransport(base_url=server.url)
+        set_transport(transport)
+        set_llm_limiter(limiter)
+        try:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                return await scenario(client)
+        finally:
+            set_transport(previous_transport)
+            set_llm_limiter(previous_limiter)
+            await transport.aclose()
+            transport.close()
+
+
+def test_queue_full_returns_503_with_retry_after():
+    async def scenario(client):
+        # Distinct conversations/messages so nothing is served from cache
+        return await asyncio.gather(*[
+            client.post("/api/chat/message", json={
+                "content": f"{OPEN_ENDED} {i}", "conversation_id": f"conv_503_{i}"
+            })
+            for i in range(4)
+        ])
+
+    limiter = LLMConcurrencyLimiter(max_in_flight=1, max_queue_depth=1, retry_after=3)
+    responses = asyncio.run(_run_with_fake_model(limiter, scenario))
+    codes = sorted(r.status_code for r in responses)
+    assert codes == [200, 200, 503, 503], codes
+    rejected = [r for r in responses if r.status_code == 503]
+    assert all(r.headers["Retry-After"] == "3" for r in rejected)
+
+
+def test_health_not_blocked_by_model_calls():
+    async def scenario(client):
+        chats = [
+            asyncio.create_task(client.post("/api/chat/message", json={
+                "content": f"{OPEN_ENDED} health {i}", "conversation_id": f"conv_h_{i}"
+            }))
+            for i in range(8)
+        ]
+        await asyncio.sleep(0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        health = await client.get("/health")
+        elapsed = loop.time() - start
+        await asyncio.gather(*chats)
+        return health, elapsed
+
+    limiter = LLMConcurrencyLimiter(max_in_flight=2, max_queue_depth=16)
+    health, elapsed = asyncio.run(_run_with_fake_model(limiter, scenario))
+    assert health.status_code == 200
+    assert elapsed < 0.2, elapsed
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
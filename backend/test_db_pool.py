@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""Verify the pooled clinic database connections in utils.db_utils"""
+import tempfile
+import threading
+from pathlib import Path
+
+from utils.db_utils import (
+    ConnectionPool, DatabaseError, execute_query, execute_update, get_by_id,
+    get_connection_pool, get_db_connection, set_connection_pool,
+)
+
+
+def _with_pool(fn, **kwargs):
+    previous = get_connection_pool()
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(db_path=str(Path(tmp) / "clinic.db"), **kwargs)
+        set_connection_pool(pool)
+        try:
+            execute_update("CREATE TABLE doctors (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+            fn(pool)
+        finally:
+            pool.close()
+            set_connection_pool(previous)
+
+
+def test_connections_are_reused_with_pragmas():
+    def scenario(pool):
+        for i in range(20):
+            execute_update("INSERT INTO doctors (name) VALUES (?)", (f"Dr. {i}",))
+        assert len(execute_query("SELECT * FROM doctors")) == 20
+        assert get_by_id("doctors", 1) == {"id": 1, "name": "Dr. 0"}
+
+        stats = pool.stats()
+        assert stats["connections_opened"] == 1
+        assert stats["checkouts"] == 23
+        assert (stats["idle"], stats["in_use"]) == (1, 0)
+
+        with get_db_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+
+    _with_pool(scenario)
+
+
+def test_failed_work_is_rolled_back_before_reuse():
+    def scenario(pool):
+        try:
+            with get_db_connection() as conn:
+                conn.execute("INSERT INTO doctors (name) VALUES ('Dr. Li')")
+                conn.execute("INSERT INTO doctors (name) VALUES ('Dr. Li')")  # UNIQUE violation
+        except DatabaseError:
+            pass
+        else:
+            raise AssertionError("duplicate insert should fail")
+
+        try:
+            with get_db_connection() as conn:
+                conn.execute("INSERT INTO doctors (name) VALUES ('Dr. Wang')")
+                raise ValueError("caller bug")
+        except ValueError:
+            pass
+
+        # Neither half-finished transaction leaked into the pooled connection
+        assert execute_query("SELECT * FROM doctors") == []
+        assert pool.stats()["connections_opened"] == 1
+
+    _with_pool(scenario)
+
+
+def test_pool_is_bounded_and_times_out():
+    def scenario(pool):
+        held = [pool.acquire(), pool.acquire()]
+        try:
+            execute_query("SELECT 1")
+        except DatabaseError as e:
+            assert "No database connection free" in str(e)
+        else:
+            raise AssertionError("exhausted pool should time out")
+        for conn in held:
+            pool.release(conn)
+
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(50):
+                    execute_query("SELECT COUNT(*) AS n FROM doctors")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = pool.stats()
+        assert not errors
+        assert stats["open"] == 2
+        assert stats["timeouts"] == 1
+
+    _with_pool(scenario, size=2, timeout=0.05)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""Verify the dialogue unit of work: one read, at most one write per turn"""
+import asyncio
+
+import httpx
+
+from main import app
+from services.dialogue_service import DialogueUnitOfWork, conversation_turn, get_store_stats
+from services.state_store import InMemoryStateStore, get_state_store, set_state_store
+
+
+class CountingStore(InMemoryStateStore):
+    def __init__(self):
+        super().__init__()
+        self.gets = 0
+        self.saves = 0
+
+    def get_versioned(self, conversation_id):
+        self.gets += 1
+        return super().get_versioned(conversation_id)
+
+    def compare_and_set(self, conversation_id, state, expected_version):
+        self.saves += 1
+        return super().compare_and_set(conversation_id, state, expected_version)
+
+
+def _all_states(store):
+    return {cid: state for page in store.get_all() for cid, state in page.items()}
+
+
+def _with_store(fn):
+    previous = get_state_store()
+    store = CountingStore()
+    set_state_store(store)
+    try:
+        fn(store)
+    finally:
+        set_state_store(previous)
+
+
+def test_single_load_and_flush():
+    def scenario(store):
+        uow = DialogueUnitOfWork("conv_uow")
+        state = uow.load()
+        uow.load()
+        uow.merge_entities({"doctor": "Dr. Li", "time": None})
+        uow.merge_entities({"service": "Cleaning"})
+        state.intent = "appointment"
+        assert uow.commit()
+        assert (store.gets, store.saves) == (1, 1)
+        assert _all_states(store)["conv_uow"]["collected_entities"] == {
+            "doctor": "Dr. Li", "service": "Cleaning"
+        }
+
+    _with_store(scenario)
+
+
+def test_unchanged_state_is_not_written():
+    def scenario(store):
+        first = DialogueUnitOfWork("conv_same")
+        first.load().intent = "appointment"
+        first.merge_entities({"doctor": "Dr. Li"})
+        first.commit()
+
+        second = DialogueUnitOfWork("conv_same")
+        second.load().intent = "appointment"
+        second.merge_entities({"doctor": "Dr. Li", "date": None})
+        assert not second.commit()
+        assert store.saves == 1
+
+        # In-place change of a nested value is still detected
+        third = DialogueUnitOfWork("conv_same")
+        third.load().collected_entities["doctor"] = "Dr. Wang"
+        assert third.commit()
+
+    _with_store(scenario)
+
+
+def test_chat_turn_round_trips():
+    def scenario(store):
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                await client.post("/api/chat/message", json={
+                    "content": "I want to book an appointment", "conversation_id": "conv_rt"
+                })
+                await client.post("/api/chat/message", json={
+                    "content": "Dr. Li", "conversation_id": "conv_rt"
+                })
+
+        before = get_store_stats()
+        asyncio.run(run())
+        assert (store.gets, store.saves) == (2, 2)
+        after = get_store_stats()
+        assert after["turns"] - before["turns"] == 2
+        assert after["store_reads"] - before["store_reads"] == 2
+        assert _all_states(store)["conv_rt"]["collected_entities"]["doctor"] == "Dr. Li"
+
+    _with_store(scenario)
+
+
+def test_concurrent_commit_is_rebased_not_overwritten():
+    def scenario(store):
+        first = DialogueUnitOfWork("conv_race")
+        second = DialogueUnitOfWork("conv_race")
+        first.load()
+        second.load()
+
+        first.merge_entities({"doctor": "Dr. Li"})
+        first.load().slot_to_fill = "date"
+        assert first.commit()
+
+        # second loaded before first saved: its CAS fails, it re-reads and re-applies
+        second.merge_entities({"service": "Cleaning"})
+        second.load().intent = "appointment"
+        assert second.commit()
+        assert (store.gets, store.saves) == (3, 3)
+
+        saved = store.get("conv_race")
+        assert saved["collected_entities"] == {"doctor": "Dr. Li", "service": "Cleaning"}
+        assert saved["intent"] == "appointment"
+        assert saved["slot_to_fill"] == "date"
+        assert store.get_versioned("conv_race")[1] == 2
+
+    _with_store(scenario)
+
+
+def test_same_conversation_turns_run_in_order():
+    order = []
+
+    async def turn(conversation_id, label, delay):
+        async with conversation_turn(conversation_id):
+            order.append(f"{label} start")
+            await asyncio.sleep(delay)
+            order.append(f"{label} end")
+
+    async def run():
+        await asyncio.gather(
+            turn("conv_a", "a1", 0.05),
+            turn("conv_a", "a2", 0.0),
+            turn("conv_b", "b1", 0.0),
+        )
+
+    asyncio.run(run())
+    assert order.index("a1 end") < order.index("a2 start")
+    assert order.index("b1 end") < order.index("a1 end")  # other conversations don't wait
+
+
+def test_double_send_keeps_both_entities():
+    def scenario(store):
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                await client.post("/api/chat/message", json={
+                    "content": "I want to book an appointment", "conversation_id": "conv_dbl"
+                })
+                await asyncio.gather(
+                    client.post("/api/chat/message", json={
+                        "content": "Dr. Li", "conversation_id": "conv_dbl"
+                    }),
+                    client.post("/api/chat/message", json={
+                        "content": "cleaning", "conversation_id": "conv_dbl"
+                    }),
+                )
+
+        asyncio.run(run())
+        entities = store.get("conv_dbl")["collected_entities"]
+        assert entities["doctor"] == "Dr. Li"
+        assert entities["service"] == "Cleaning"
+
+    _with_store(scenario)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Verify the single-pass JSON repair scanner against a fuzz corpus"""
+import json
+import random
+
+from services.llama_service import LlamaService
+from testing.json_corpus import malformed_outputs
+from utils.json_repair import repair_json
+
+
+def test_fuzz_corpus_repairs_to_original_object():
+    failures = []
+    for text, expected in malformed_outputs(count=500, seed=7):
+        try:
+            if json.loads(repair_json(text)) != expected:
+                failures.append(text)
+        except json.JSONDecodeError:
+            failures.append(text)
+    assert not failures, f"{len(failures)} failures, first: {failures[0]!r}"
+
+
+def test_strings_are_copied_verbatim():
+    text = '{"customer_name": "a // b /* c */ , }", "x": "\\"}\\""}'
+    assert json.loads(repair_json(text)) == {"customer_name": "a // b /* c */ , }", "x": '"}"'}
+
+
+def test_truncated_output_is_closed():
+    assert json.loads(repair_json('{"intent": "query", "entities": {"doctor": "Dr. L')) == {
+        "intent": "query", "entities": {"doctor": "Dr. L"}
+    }
+    assert json.loads(repair_json('{"intent": "query", "entities": {"doctor":')) == {
+        "intent": "query", "entities": {"doctor": None}
+    }
+    assert json.loads(repair_json('{"items": [1, 2,')) == {"items": [1, 2]}
+
+
+def test_stops_after_first_top_level_object():
+    text = 'Result: {"intent": "cancel"} and also {"intent": "query"}'
+    assert json.loads(repair_json(text)) == {"intent": "cancel"}
+
+
+def test_array_preference_for_batches():
+    text = 'Here you go: [{"intent": "query"}, {"intent": "cancel"},] done'
+    assert json.loads(repair_json(text, prefer="[")) == [{"intent": "query"}, {"intent": "cancel"}]
+
+
+def test_no_json_returns_text():
+    assert repair_json("  I could not understand that.  ") == "I could not understand that."
+
+
+def test_random_garbage_never_raises():
+    rng = random.Random(3)
+    alphabet = '{}[]",:/*\\ \nab1'
+    for _ in range(2000):
+        repair_json("".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40))))
+
+
+def test_parse_model_output_uses_repair():
+    response = LlamaService._parse_model_output(
+        'Sure! {"intent": "appointment", "confidence": 0.9, // ok\n'
+        ' "entities": {"doctor": "Dr. Wang",}',
+        "book dr wang"
+    )
+    assert response.intent == "appointment"
+    assert response.entities["doctor"] == "Dr. Wang"
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
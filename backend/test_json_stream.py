@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Verify the incremental JSON object parser used for streamed NLU output"""
+from utils.json_stream import IncrementalJSONObjectParser
+
+NLU_OBJECT = '{"intent": "appointment", "confidence": 0.9, "entities": {"doctor": "Dr. Wang"}}'
+
+
+def _feed_chars(text: str) -> IncrementalJSONObjectParser:
+    """Feed one character at a time (worst-case chunking)"""
+    parser = IncrementalJSONObjectParser()
+    for ch in text:
+        if parser.feed(ch):
+            break
+    return parser
+
+
+def test_stops_when_object_closes():
+    parser = _feed_chars(NLU_OBJECT + "\n\nExplanation: the user wants {a booking}.")
+    assert parser.complete
+    assert parser.object_text == NLU_OBJECT
+    assert parser.result()["entities"]["doctor"] == "Dr. Wang"
+    # Nothing after the closing brace was consumed
+    assert parser.buffer == NLU_OBJECT
+
+
+def test_skips_leading_prose():
+    parser = _feed_chars("Sure! Here is the JSON: " + NLU_OBJECT)
+    assert parser.object_text == NLU_OBJECT
+
+
+def test_braces_inside_strings_and_escapes():
+    text = '{"customer_name": "Bob } {", "note": "say \\"}\\""}'
+    parser = _feed_chars(text + " trailing")
+    assert parser.object_text == text
+    assert parser.result()["customer_name"] == "Bob } {"
+
+
+def test_braces_inside_comments():
+    text = '{"intent": "query", // not a } brace\n "x": 1 /* nor } this */}'
+    parser = _feed_chars(text + "}")
+    assert parser.object_text == text
+    # Not strict JSON - complete, but left to the repair path
+    assert parser.result() is None
+
+
+def test_incomplete_stream():
+    parser = IncrementalJSONObjectParser()
+    assert not parser.feed('{"intent": "appoint')
+    assert not parser.complete
+    assert parser.result() is None
+    assert parser.buffer == '{"intent": "appoint'
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
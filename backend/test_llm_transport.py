@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""Verify NLU transports against the local fake Ollama server"""
+import asyncio
+import sys
+import threading
+import time
+
+from services.llama_service import LlamaService
+from services.llm_transport import (
+    OllamaHTTPTransport, SubprocessTransport, FallbackTransport,
+    TransportUnavailableError, set_transport, get_transport
+)
+from testing import fake_ollama
+from testing.fake_ollama import DEFAULT_NLU_OUTPUT, FakeOllamaServer
+
+
+def test_http_transport_reuses_connection():
+    """Several turns should go over ONE keep-alive connection"""
+    with FakeOllamaServer() as server:
+        transport = OllamaHTTPTransport(base_url=server.url, pool_size=1)
+        try:
+            for _ in range(5):
+                assert '"intent"' in transport.generate("hello")
+        finally:
+            transport.close()
+        assert server.requests == 5
+        assert server.connections == 1
+
+
+def test_http_transport_preload():
+    with FakeOllamaServer() as server:
+        transport = OllamaHTTPTransport(base_url=server.url)
+        transport.preload()
+        transport.close()
+        assert server.preloads == 1
+        assert server.requests == 0
+
+
+def test_http_transport_timeout():
+    with FakeOllamaServer(latency=0.5) as server:
+        transport = OllamaHTTPTransport(base_url=server.url, timeout=0.1)
+        try:
+            transport.generate("slow")
+            assert False, "expected timeout"
+        except RuntimeError as e:
+            assert "timed out" in str(e)
+        finally:
+            transport.close()
+
+
+def test_fallback_when_server_unreachable():
+    """Connection refused on HTTP → `ollama run` path is used instead"""
+    fallback = SubprocessTransport(command=[sys.executable, fake_ollama.__file__, "run"])
+    primary = OllamaHTTPTransport(base_url="http://127.0.0.1:9", timeout=1)
+    transport = FallbackTransport(primary, fallback)
+    try:
+        assert '"intent"' in transport.generate("hello")
+        try:
+            primary.generate("hello")
+            assert False, "expected TransportUnavailableError"
+        except TransportUnavailableError:
+            pass
+    finally:
+        transport.close()
+
+
+def test_parse_user_input_over_http():
+    previous = get_transport()
+    with FakeOllamaServer() as server:
+        transport = OllamaHTTPTransport(base_url=server.url)
+        set_transport(transport)
+        try:
+            # Too open-ended for the rule-based fast path → goes to the model
+            response = LlamaService.parse_user_input("Could someone look at my sore gum sometime")
+        finally:
+            set_transport(previous)
+            transport.close()
+        assert response.intent == "appointment"
+        assert response.entities["doctor"] == "Dr. Wang"
+        assert "User input: Could someone look at my sore gum sometime" in server.prompts[0]
+
+
+def test_streaming_stops_generation_when_object_closes():
+    """Trailing explanation is never waited for: the stream is cancelled"""
+    chatty = DEFAULT_NLU_OUTPUT + "\n\nExplanation: " + "the user wants a cleaning. " * 20
+    total_chunks = len(chatty) // FakeOllamaServer.STREAM_CHUNK_CHARS + 1
+    previous = get_transport()
+    with FakeOllamaServer(responder=lambda prompt: chatty, token_latency=0.002) as server:
+        transport = OllamaHTTPTransport(base_url=server.url)
+        set_transport(transport)
+        LlamaService.STREAMING = True
+        try:
+            response = LlamaService.parse_user_input("Could someone look at my sore gum, streaming")
+            async_response = asyncio.run(
+                LlamaService.aparse_user_input("Could someone look at my sore gum, async streaming")
+            )
+        finally:
+            LlamaService.STREAMING = False
+            set_transport(previous)
+            transport.close()
+        time.sleep(0.05)
+        assert response.entities["doctor"] == "Dr. Wang"
+        assert async_response.entities["doctor"] == "Dr. Wang"
+        assert server.streamed_chunks < total_chunks
+        assert server.cancelled_streams == 2
+
+
+def test_async_clients_are_per_loop_and_all_closed():
+    """A loop change keeps the other loop's pool; aclose() closes every live one"""
+    async def turn_then_close():
+        await transport.agenerate("from a short-lived loop")
+        await transport.aclose()
+
+    async def main_loop():
+        await transport.agenerate("from the main loop")
+        clients = dict(transport._async_clients)
+        await transport.aclose()
+        return clients
+
+    with FakeOllamaServer() as server:
+        transport = OllamaHTTPTransport(base_url=server.url)
+        background = asyncio.new_event_loop()
+        thread = threading.Thread(target=background.run_forever, daemon=True)
+        thread.start()
+        try:
+            asyncio.run(turn_then_close())
+            asyncio.run_coroutine_threadsafe(transport.agenerate("from a running loop"), background).result(5)
+            clients = asyncio.run(main_loop())
+        finally:
+            background.call_soon_threadsafe(background.stop)
+            thread.join(5)
+            background.close()
+            transport.close()
+
+        # The background loop's client survived the main loop starting up,
+        # and was closed on its own loop by the main loop's aclose()
+        assert len(clients) == 2 and background in clients
+        assert all(client.is_closed for client in clients.values())
+        assert transport._async_clients == {}
+        assert server.requests == 3
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""Verify schema migrations and that hot queries are index lookups"""
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from testing.clinic_db import SCHEMA, make_clinic_db
+from utils.migrations import (
+    MigrationError, applied_versions, apply_migrations, check_query_plans, discover_migrations,
+)
+
+
+def test_migrations_apply_once_in_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "fresh.db")
+        versions = [version for version, _, _ in discover_migrations()]
+        assert apply_migrations(db_path) == versions
+        assert apply_migrations(db_path) == []
+
+        conn = sqlite3.connect(db_path)
+        assert applied_versions(conn) == versions
+        conn.close()
+
+
+def test_hot_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Straight from create_tables.sql: no secondary indexes yet
+        legacy = Path(tmp) / "legacy.db"
+        conn = sqlite3.connect(legacy)
+        conn.executescript(SCHEMA.read_text())
+        conn.close()
+        assert "booked_range_for_doctor" in check_query_plans(str(legacy))
+
+        assert check_query_plans(make_clinic_db(Path(tmp) / "clinic.db")) == {}
+
+
+def test_only_indexes_used_by_live_queries_remain():
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(make_clinic_db(Path(tmp) / "clinic.db"))
+        indexes = {
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+            )
+        }
+        conn.close()
+        assert "idx_appointments_slot" not in indexes
+        assert "idx_appointments_customer" not in indexes
+        assert "idx_time_slots_doctor_date" not in indexes
+        assert "idx_appointments_date_range" in indexes
+
+
+def test_failed_migration_is_rolled_back_and_not_recorded():
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "migrations"
+        directory.mkdir()
+        (directory / "0001_first.sql").write_text("CREATE TABLE a (id INTEGER);")
+        (directory / "0002_broken.sql").write_text("CREATE TABLE b (id INTEGER);\nNOT SQL;")
+        db_path = str(Path(tmp) / "test.db")
+        try:
+            apply_migrations(db_path, directory)
+        except MigrationError as e:
+            assert "0002_broken.sql" in str(e)
+        else:
+            raise AssertionError("broken migration should fail")
+
+        conn = sqlite3.connect(db_path)
+        assert applied_versions(conn) == [1]
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "a" in tables and "b" not in tables
+        conn.close()
+
+
+
+def test_dev_reset_then_migrate_restores_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_clinic_db(Path(tmp) / "clinic.db")
+        conn = sqlite3.connect(db_path)
+        conn.executescript(SCHEMA.read_text())          # the documented reset
+        conn.close()
+        assert apply_migrations(db_path) == [version for version, _, _ in discover_migrations()]
+        assert check_query_plans(db_path) == {}
+
+
+def test_recorded_migration_with_missing_objects_is_reapplied():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_clinic_db(Path(tmp) / "clinic.db")
+        conn = sqlite3.connect(db_path)
+        # Tables recreated by hand, history kept: every 0002 index is gone
+        conn.executescript(
+            SCHEMA.read_text().replace("DROP TABLE IF EXISTS schema_migrations;", "")
+        )
+        assert len(applied_versions(conn)) == len(discover_migrations())
+        conn.close()
+        assert 2 in apply_migrations(db_path)
+        assert check_query_plans(db_path) == {}
+        assert apply_migrations(db_path) == []
+
+
+def test_objects_dropped_by_later_migrations_are_not_expected():
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "migrations"
+        directory.mkdir()
+        (directory / "0001_first.sql").write_text(
+            "CREATE TABLE a (id INTEGER);\nCREATE INDEX IF NOT EXISTS idx_a ON a(id);"
+        )
+        (directory / "0002_drop.sql").write_text("DROP INDEX IF EXISTS idx_a;")
+        db_path = str(Path(tmp) / "test.db")
+        assert apply_migrations(db_path, directory) == [1, 2]
+        assert apply_migrations(db_path, directory) == []
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Verify the NLU result cache (LRU, TTL, date-keyed, disk tier)"""
+import os
+import tempfile
+import time
+from datetime import date
+
+from schemas.nlu import LlamaResponse
+from services.llama_service import LlamaService
+from services.llm_transport import OllamaHTTPTransport, get_transport, set_transport
+from services.nlu_cache import NLUCache, get_nlu_cache, set_nlu_cache
+from testing.fake_ollama import FakeOllamaServer
+
+TODAY = date(2026, 1, 5)
+
+
+def _response(intent: str = "appointment") -> LlamaResponse:
+    return LlamaResponse(intent=intent, confidence=0.9, entities={"time": "14:00"})
+
+
+def test_key_normalizes_message_and_includes_date():
+    assert NLUCache.make_key("  2 PM! ", TODAY) == NLUCache.make_key("2 pm", TODAY)
+    assert NLUCache.make_key("tomorrow", TODAY) != NLUCache.make_key("tomorrow", date(2026, 1, 6))
+
+
+def test_lru_eviction():
+    cache = NLUCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", _response())
+    cache.put("b", _response())
+    assert cache.get("a", "a") is not None  # a is now most recent
+    cache.put("c", _response())             # evicts b
+    assert cache.get("b", "b") is None
+    assert cache.get("a", "a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = NLUCache(max_entries=10, ttl_seconds=0.05)
+    cache.put("a", _response())
+    time.sleep(0.1)
+    assert cache.get("a", "a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_hits_are_independent_copies():
+    cache = NLUCache(max_entries=10, ttl_seconds=60)
+    cache.put("a", _response())
+    first = cache.get("a", "2 PM")
+    first.entities["time"] = "09:00"
+    second = cache.get("a", "2 pm")
+    assert second.entities["time"] == "14:00"
+    assert second.raw_input == "2 pm"
+
+
+def test_personal_details_only_served_for_the_same_spelling():
+    cache = NLUCache(max_entries=10, ttl_seconds=60)
+    key = NLUCache.make_key("my name is John Smith", TODAY)
+    assert key == NLUCache.make_key("my name is john smith", TODAY)
+    cache.put(key, LlamaResponse(
+        intent="appointment", confidence=0.9,
+        entities={"customer_name": "John Smith"}, raw_input="my name is John Smith"
+    ))
+    assert cache.get(key, "my name is john smith") is None
+    assert cache.get(key, "My name is John Smith") is None  # must match as typed
+    assert cache.get(key, "my name is John Smith.").entities["customer_name"] == "John Smith"
+
+    # Parses without personal details still ignore case
+    cache.put("k", _response())
+    assert cache.get("k", "2 PM") is not None and cache.get("k", "2 pm") is not None
+
+def test_disk_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "nlu_cache.db")
+        cache = NLUCache(max_entries=10, ttl_seconds=60, disk_path=path)
+        cache.put("a", _response("query"))
+        restarted = NLUCache(max_entries=10, ttl_seconds=60, disk_path=path)
+        hit = restarted.get("a", "a")
+        assert hit is not None and hit.intent == "query"
+
+
+def test_parse_user_input_calls_model_once():
+    previous_transport, previous_cache = get_transport(), get_nlu_cache()
+    with FakeOllamaServer() as server:
+        transport = OllamaHTTPTransport(base_url=server.url)
+        set_transport(transport)
+        set_nlu_cache(NLUCache(max_entries=10, ttl_seconds=60))
+        try:
+            for _ in range(3):
+                LlamaService.parse_user_input("Could someone look at my sore gum")
+        finally:
+            set_transport(previous_transport)
+            set_nlu_cache(previous_cache)
+            transport.close()
+        assert server.requests == 1
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
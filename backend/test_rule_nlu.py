@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Verify the rule-based NLU fast path"""
+from datetime import datetime
+
+from services.rule_nlu import RuleBasedNLU, SERVICE_ALIAS_MAP
+from utils.doctor_validator import DOCTOR_ALIAS_MAP
+
+NLU = RuleBasedNLU(dict(DOCTOR_ALIAS_MAP), dict(SERVICE_ALIAS_MAP))
+TODAY = datetime(2026, 1, 5)  # Monday
+
+
+def test_confident_slot_answers():
+    """Short slot answers are fully explained → high confidence"""
+    cases = [
+        ("Dr. Wang", "doctor", "Dr. Wang"),
+        ("wang", "doctor", "Dr. Wang"),
+        ("cleaning", "service", "Cleaning"),
+        ("teeth cleaning please", "service", "Cleaning"),
+        ("tomorrow", "date", "2026-01-06"),
+        ("2 PM", "time", "14:00"),
+        ("2:30pm", "time", "14:30"),
+        ("next wednesday", "date", "2026-01-14"),
+        ("March 3rd", "date", "2026-03-03"),
+        ("friday afternoon", "part_of_day", "afternoon"),
+        ("My phone is 555-123-4567", "customer_phone", "5551234567"),
+        ("john@example.com", "customer_email", "john@example.com"),
+        ("my name is John Smith", "customer_name", "John Smith"),
+    ]
+    for message, key, expected in cases:
+        result = NLU.parse(message, today=TODAY)
+        assert result.entities[key] == expected, (message, result.entities)
+        assert result.confidence >= 0.85, (message, result.confidence)
+
+
+def test_part_of_day_never_fills_time():
+    """"in the morning" is not a time the user chose - the planner must still ask"""
+    for message in ["I want to see a doctor in the morning", "change my appointment to Friday afternoon"]:
+        result = NLU.parse(message, today=TODAY)
+        assert result.entities["time"] is None, (message, result.entities)
+        assert result.entities["part_of_day"] in ("morning", "afternoon")
+
+
+def test_date_shaped_digits_are_not_a_phone():
+    """An invalid date isn't masked by the temporal parser - it must not turn into a phone"""
+    for message in ["book a cleaning on 2025-13-45", "book a cleaning on 13/45", "book a cleaning on 2/30/2026"]:
+        result = NLU.parse(message, today=TODAY)
+        assert result.entities["customer_phone"] is None, (message, result.entities)
+        assert result.confidence < 0.85, (message, result.confidence)
+    assert NLU.parse("call me at 555-123-4567", today=TODAY).entities["customer_phone"] == "5551234567"
+
+def test_full_booking_sentence():
+    result = NLU.parse("I want to book a cleaning with Dr. Li tomorrow at 2 PM", today=TODAY)
+    assert result.intent == "appointment"
+    assert result.entities["doctor"] == "Dr. Li"
+    assert result.entities["service"] == "Cleaning"
+    assert result.entities["date"] == "2026-01-06"
+    assert result.entities["time"] == "14:00"
+    assert result.confidence >= 0.85
+
+
+def test_intents():
+    assert NLU.parse("cancel my appointment", today=TODAY).intent == "cancel"
+    assert NLU.parse("I want to reschedule", today=TODAY).intent == "modify"
+    assert NLU.parse("How much is a cleaning?", today=TODAY).intent == "query"
+
+
+def test_unexplained_tokens_fall_back_to_llm():
+    """Anything the rules can't account for drops below the threshold"""
+    for message in [
+        "What is Dr. Li's specialization?",
+        "I need to reschedule my Thursday appointment to Friday afternoon",
+        "yes",
+    ]:
+        assert NLU.parse(message, today=TODAY).confidence < 0.85, message
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
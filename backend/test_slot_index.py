@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""Verify the slot bitmap index (pure bit operations, no database)"""
+from datetime import date
+
+from services.slot_index import SlotGrid, SlotIndex
+
+DAY = date(2026, 3, 2)
+GRID = SlotGrid(9 * 60, 18 * 60, 30)
+
+
+def test_grid_slots_and_labels():
+    assert GRID.size == 18
+    assert GRID.times(GRID.full_mask)[:3] == ["09:00", "09:30", "10:00"]
+    assert GRID.slot_of("09:00") == 0
+    assert GRID.slot_of("9:45") == 1          # off-grid time → containing slot
+    assert GRID.slot_of("17:30:00") == 17
+    assert GRID.slot_of("18:00") is None and GRID.slot_of("bad") is None
+    assert GRID.slots_for(60) == 2 and GRID.slots_for(20) == 1 and GRID.slots_for(None) == 1
+    assert GRID.times(GRID.mask_between(12 * 60, 13 * 60)) == ["12:00", "12:30"]
+
+
+def test_runs_and_first_free():
+    free = 0b1110111011
+    assert SlotGrid.runs(free, 1) == free
+    assert SlotGrid.runs(free, 2) == 0b0110011001
+    assert SlotGrid.runs(free, 3) == 0b0010001000
+    assert SlotGrid.runs(free, 4) == 0
+    assert SlotGrid.first(SlotGrid.runs(free, 3)) == 3
+    assert SlotGrid.first(0) is None
+
+
+def test_index_busy_free_and_clinic_views():
+    index = SlotIndex(GRID, DAY, 90)
+    index.mark_busy(1, DAY, "09:00", slots=2)
+    index.mark_busy(2, "2026-03-02", "10:00")
+    assert not index.mark_busy(1, date(2026, 1, 1), "09:00")   # before the horizon
+
+    assert GRID.times(index.busy(1, DAY)) == ["09:00", "09:30"]
+    assert not index.is_free(1, DAY, "09:30") and index.is_free(1, DAY, "10:00")
+    assert GRID.times(index.busy(None, DAY)) == ["09:00", "09:30", "10:00"]
+    assert index.any_free([1, 2], DAY) == GRID.full_mask      # someone is always free
+
+    # Clinic hours limited to the morning; a 90-minute service needs 3 slots
+    morning = GRID.mask_between(9 * 60, 12 * 60)
+    assert GRID.label(index.first_free(1, DAY, 90, morning)) == "10:00"
+    assert index.first_free(None, DAY, 90, morning) == GRID.slot_of("10:30")
+
+    # Earliest fit over the horizon: doctor 1 is full on DAY, so the next day
+    for time_str in GRID.times(GRID.full_mask):
+        index.mark_busy(1, DAY, time_str)
+    day, slot = index.earliest(1, 60)
+    assert (day, GRID.label(slot)) == (date(2026, 3, 3), "09:00")
+    assert index.earliest(None, 30, from_day="2026-03-02")[0] == date(2026, 3, 3)
+    assert index.earliest(1, 10 * 60) is None                  # longer than the day
+
+    index.mark_free(1, DAY, "09:00", slots=18)
+    index.mark_busy(1, DAY, "09:00", slots=2)
+    index.mark_free(1, DAY, "09:00", slots=2)
+    assert index.busy(1, DAY) == 0
+    assert index.busy(None, DAY) == 1 << GRID.slot_of("10:00")
+
+
+def test_wide_grid_and_memory():
+    wide = SlotGrid(0, 24 * 60, 15)               # 96 bits: wider than a machine word
+    index = SlotIndex(wide, DAY, 2)
+    index.mark_busy(7, DAY, "23:45")
+    assert wide.times(index.busy(7, DAY)) == ["23:45"]
+
+    index = SlotIndex(GRID, DAY, 90)
+    for doctor_id in range(50):
+        index.mark_busy(doctor_id, DAY, "09:00")
+    assert index.memory_bytes() == 50 * 90 * 4
+
+
+
+def test_bookings_block_their_whole_duration():
+    assert GRID.times(GRID.covering("10:00", 60)) == ["10:00", "10:30"]
+    assert GRID.times(GRID.covering("10:00", 20)) == ["10:00"]
+    assert GRID.times(GRID.covering("09:15", 30)) == ["09:00", "09:30"]   # off-grid start
+    assert GRID.times(GRID.covering("08:30", 60)) == ["09:00"]            # starts before opening
+    assert GRID.times(GRID.covering("17:30", 60)) == ["17:30"]            # clipped at closing
+    assert GRID.covering("18:00", 30) == 0 and GRID.covering("bad", 30) == 0
+
+    index = SlotIndex(GRID, DAY, 1)
+    index.add_bookings([(1, DAY, "10:00", 60), (1, DAY, "13:00"), (1, DAY, "15:00", None)])
+    assert GRID.times(index.busy(1, DAY)) == ["10:00", "10:30", "13:00", "15:00"]
+
+    # A 60-minute start needs two free slots: not 09:30 (10:00 taken),
+    # not 12:30 / 14:30 (next slot taken), and never 17:30 (past closing)
+    starts = GRID.times(index.starts(1, DAY, 60))
+    assert "09:00" in starts and "11:00" in starts
+    for time_str in ("09:30", "10:00", "10:30", "12:30", "14:30", "17:30"):
+        assert time_str not in starts
+    assert starts[-1] == "17:00"
+
+
+def test_earliest_across_doctors_merges_lazily():
+    index = SlotIndex(GRID, DAY, 90)
+    for time_str in GRID.times(GRID.full_mask):
+        index.mark_busy(1, DAY, time_str)                       # doctor 1 full on DAY
+    index.mark_busy(2, DAY, "09:00", slots=3)                    # doctor 2 from 10:30
+    index.mark_busy(3, DAY, "09:00")                             # doctor 3 from 09:30
+
+    options = [(day, GRID.label(slot), doctor_id)
+               for day, slot, doctor_id in index.earliest_across([1, 2, 3], 4)]
+    assert options == [
+        (DAY, "09:30", 3), (DAY, "10:00", 3), (DAY, "10:30", 2), (DAY, "10:30", 3)
+    ]
+    # 60 minutes, only from the next day: ties go to the lower doctor_id
+    next_day = date(2026, 3, 3)
+    options = index.earliest_across([3, 1, 2], 2, 60, days=[next_day])
+    assert [(doctor_id, GRID.label(slot)) for _, slot, doctor_id in options] == [(1, "09:00"), (2, "09:00")]
+
+    # Streams are only advanced as far as needed
+    stream = index.iter_starts(1)
+    assert next(stream) == (next_day, 0)
+    assert index.earliest_across([], 3) == []
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
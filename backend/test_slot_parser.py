@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Verify the dialogue-context slot short-circuit"""
+import asyncio
+from datetime import datetime
+
+import httpx
+
+from main import app
+from services.dialogue_service import get_dialogue_history
+from services.llm_transport import OllamaHTTPTransport, get_transport, set_transport
+from services.rule_nlu import RuleBasedNLU, SERVICE_ALIAS_MAP
+from services.slot_parser import get_slot_stats, parse_slot_answer
+from testing.fake_ollama import FakeOllamaServer
+from utils.doctor_validator import DOCTOR_ALIAS_MAP
+
+NLU = RuleBasedNLU(dict(DOCTOR_ALIAS_MAP), dict(SERVICE_ALIAS_MAP))
+TODAY = datetime(2026, 1, 5)  # Monday
+
+
+def test_slot_answers_parse():
+    cases = [
+        ("time", "3", "15:00"),
+        ("time", "around 2:30 pm please", "14:30"),
+        ("date", "next friday", "2026-01-16"),
+        ("date", "the 20th", "2026-01-20"),
+        ("doctor", "Chen", "Dr. Chen"),
+        ("service", "a checkup", "Checkup"),
+        ("customer_phone", "555 123 4567", "5551234567"),
+        ("customer_email", "it's jo@example.com", "jo@example.com"),
+        ("customer_name", "John Smith", "John Smith"),
+        ("customer_name", "my name is Ann", "Ann"),
+        ("customer_name", "Maria", "Maria"),
+        ("customer_name", "anna lee", "Anna Lee"),
+    ]
+    for slot, message, expected in cases:
+        entities = NLU.parse_slot(slot, message, today=TODAY)
+        assert entities is not None and entities[slot] == expected, (slot, message, entities)
+
+
+def test_anything_else_falls_back():
+    cases = [
+        ("time", "Dr. Wang at 3pm"),     # carries another slot too
+        ("time", "actually cancel it"),  # intent change
+        ("time", "in the morning"),      # a part of day is not a time
+        ("date", "whenever works"),
+        ("doctor", "who is the best one?"),
+        ("customer_name", "yes"),
+        ("customer_name", "tomorrow"),
+        ("customer_name", "nevermind"),  # acknowledgements and hesitation
+        ("customer_name", "ok"),
+        ("customer_name", "hmm"),
+        ("customer_name", "what?"),      # a question, not an answer
+        ("customer_name", "Maria?"),
+        ("customer_name", "whatever"),
+        ("customer_name", "john"),       # one lowercase word: let the model decide
+        ("customer_phone", "I don't have one"),
+    ]
+    for slot, message in cases:
+        assert NLU.parse_slot(slot, message, today=TODAY) is None, (slot, message)
+
+
+def test_no_pending_slot_or_intent_is_skipped():
+    assert parse_slot_answer(None, "3pm", "appointment") is None
+    assert parse_slot_answer("time", "3pm", None) is None
+
+
+def test_chat_flow_skips_model_and_reports_rate():
+    before = get_slot_stats()
+    previous = get_transport()
+
+    async def conversation(client):
+        replies = []
+        for text in ["I want to book an appointment", "Chen", "extraction please"]:
+            response = await client.post(
+                "/api/chat/message", json={"content": text, "conversation_id": "conv_slot_flow"}
+            )
+            replies.append(response.json())
+        return replies
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return await conversation(client)
+
+    with FakeOllamaServer() as server:
+        transport = OllamaHTTPTransport(base_url=server.url)
+        set_transport(transport)
+        try:
+            replies = asyncio.run(run())
+        finally:
+            set_transport(previous)
+            transport.close()
+        assert server.requests == 0
+
+    assert [r["action_result"]["slot"] for r in replies] == ["doctor", "service", "date"]
+    state = get_dialogue_history("conv_slot_flow")
+    assert state["slot_to_fill"] == "date"
+    assert state["collected_entities"]["doctor"] == "Dr. Chen"
+    assert state["collected_entities"]["service"] == "Extraction"
+
+    after = get_slot_stats()
+    for slot in ("doctor", "service"):
+        assert after[slot]["hits"] == before[slot]["hits"] + 1
+        assert after[slot]["short_circuit_rate"] > 0
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
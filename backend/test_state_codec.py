@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""Verify the dialogue state codecs and the slotted DialogueState"""
+import json
+import tempfile
+from pathlib import Path
+
+from services.dialogue_service import DialogueState
+from services.state_store import SQLiteStateStore
+from utils.state_codec import CompactCodec, JSONCodec, decode_state
+
+
+def _state() -> DialogueState:
+    state = DialogueState("conv_codec")
+    state.intent = "appointment"
+    state.slot_to_fill = "time"
+    state.collected_entities = {"doctor": "Dr. Wang", "service": "Cleaning", "date": "2026-03-14"}
+    return state
+
+
+def test_compact_round_trip():
+    state_dict = _state().to_dict()
+    data = CompactCodec().encode(state_dict)
+    assert isinstance(data, bytes)
+    assert decode_state(data) == state_dict
+    assert len(data) < len(JSONCodec().encode(state_dict)) / 2
+
+
+def test_compact_keeps_fields_outside_the_fixed_layout():
+    state_dict = _state().to_dict()
+    state_dict["collected_entities"].update({"notes": "café ☕", "party_size": 3, "time": None})
+    state_dict["experiment"] = {"arm": "b"}
+    assert decode_state(CompactCodec().encode(state_dict)) == state_dict
+
+
+def test_decode_sniffs_format():
+    state_dict = _state().to_dict()
+    assert decode_state(JSONCodec().encode(state_dict)) == state_dict
+    assert decode_state(json.dumps(state_dict).encode()) == state_dict
+
+
+def test_unknown_format_version_is_rejected():
+    data = bytearray(CompactCodec().encode(_state().to_dict()))
+    data[1] = 99
+    try:
+        decode_state(bytes(data))
+    except ValueError as e:
+        assert "version 99" in str(e)
+    else:
+        raise AssertionError("unknown version should fail")
+
+
+def test_dialogue_state_is_slotted_and_reads_legacy_dicts():
+    state = _state()
+    try:
+        state.slot_to_fil = "date"
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("DialogueState should reject unknown attributes")
+
+    legacy = {**state.to_dict(), "created_at": "2026-03-14T10:30:00"}
+    assert DialogueState.from_dict(legacy).created_at.hour == 10
+    restored = DialogueState.from_dict(state.to_dict())
+    assert restored.created_at == state.created_at
+
+
+def test_sqlite_store_switches_codec_without_migration():
+    path = str(Path(tempfile.mkdtemp()) / "state.db")
+    state_dict = _state().to_dict()
+    store = SQLiteStateStore(path, codec="json")
+    store.save("old", state_dict)
+    store.close()
+
+    store = SQLiteStateStore(path, codec="compact")
+    try:
+        store.save("new", state_dict)
+        assert store.get("old") == store.get("new") == state_dict
+        raw = store._reader().execute(
+            "SELECT state FROM dialogue_states WHERE conversation_id = 'new'"
+        ).fetchone()[0]
+        assert isinstance(raw, bytes)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
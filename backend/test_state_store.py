@@ -0,0 +1,494 @@
+#!/usr/bin/env python
+"""Verify the state stores: bounded in-memory LRU, SQLite persistence/TTL/group commit"""
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from services.dialogue_service import merge_entities_with_state
+from services.state_store import (
+    InMemoryStateStore, RedisStateStore, SQLiteStateStore, StateStore, StateTooLargeError, TieredStateStore,
+    get_state_store, set_state_store,
+)
+from testing.fake_redis import FakeRedis
+
+
+def test_memory_lru_evicts_least_recently_used():
+    store = InMemoryStateStore(max_entries=3, shards=1)
+    for cid in ("a", "b", "c"):
+        store.save(cid, {"id": cid})
+    store.get("a")  # a is now most recently used
+    store.save("d", {"id": "d"})
+    assert store.get("b") is None
+    assert all(store.exists(cid) for cid in ("a", "c", "d"))
+    assert store.stats()["lru_evictions"] == 1
+
+
+def test_memory_byte_cap_and_stats():
+    store = InMemoryStateStore(max_bytes=200, shards=1)
+    for i in range(10):
+        store.save(f"c{i}", {"note": "x" * 40})
+    stats = store.stats()
+    assert stats["approx_bytes"] <= 200
+    assert stats["entries"] == len(store) < 10
+    assert stats["avg_bytes_per_conversation"] > 40
+    try:
+        store.save("huge", {"note": "x" * 500})
+    except StateTooLargeError:
+        pass
+    else:
+        raise AssertionError("oversized save should fail")
+    assert not store.exists("huge")
+    assert store.stats()["oversized_rejections"] == 1
+
+
+def test_oversized_save_keeps_the_previous_state():
+    """A state that outgrew the cap must fail loudly, not erase the conversation"""
+    store = InMemoryStateStore(max_bytes=200, shards=1)
+    store.save("conv", {"turn": 1})
+    _, version = store.get_versioned("conv")
+    for write in (
+        lambda: store.save("conv", {"note": "x" * 500}),
+        lambda: store.compare_and_set("conv", {"note": "x" * 500}, version),
+    ):
+        try:
+            write()
+        except StateTooLargeError:
+            pass
+        else:
+            raise AssertionError("oversized save should fail")
+    assert store.get_versioned("conv") == ({"turn": 1}, version)
+    assert store.stats()["oversized_rejections"] == 2
+
+
+def test_memory_idle_ttl():
+    store = InMemoryStateStore(idle_ttl_seconds=0.05)
+    store.save("c1", {"intent": "query"})
+    assert store.get("c1") is not None
+    time.sleep(0.1)
+    assert not store.exists("c1")
+    assert store.get("c1") is None
+    assert store.stats()["ttl_expirations"] == 1
+
+
+def test_memory_concurrent_access_and_paging():
+    store = InMemoryStateStore(max_entries=100_000)
+
+    def worker(n):
+        for i in range(500):
+            store.save(f"conv_{n}_{i}", {"i": i})
+            store.get(f"conv_{n}_{i // 2}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    pages = list(store.get_all(page_size=300))
+    assert all(len(page) <= 300 for page in pages)
+    assert sum(len(page) for page in pages) == len(store) == 4000
+    assert store.stats()["approx_bytes"] == sum(
+        len(json.dumps(state)) for page in pages for state in page.values()
+    )
+
+
+def _check_compare_and_set(store):
+    assert store.get_versioned("c1") == (None, 0)
+    assert store.compare_and_set("c1", {"n": 1}, 0)
+    assert not store.compare_and_set("c1", {"n": 99}, 0)
+    assert store.get_versioned("c1") == ({"n": 1}, 1)
+    assert store.compare_and_set("c1", {"n": 2}, 1)
+    assert not store.compare_and_set("c1", {"n": 99}, 1)
+    store.save("c1", {"n": 3})
+    assert store.get_versioned("c1") == ({"n": 3}, 3)
+    store.delete("c1")
+    assert store.compare_and_set("c1", {"n": 4}, 0)
+
+
+def test_memory_compare_and_set():
+    _check_compare_and_set(InMemoryStateStore())
+
+
+def test_sqlite_compare_and_set():
+    store = _store()
+    try:
+        _check_compare_and_set(store)
+    finally:
+        store.close()
+
+
+def test_sqlite_expired_row_counts_as_absent_for_cas():
+    store = _store(ttl_seconds=0.05, sweep_interval=60)
+    try:
+        store.save("c1", {"n": 1})
+        time.sleep(0.1)
+        assert store.get_versioned("c1") == (None, 0)
+        assert store.compare_and_set("c1", {"n": 2}, 0)
+        assert store.get_versioned("c1")[0] == {"n": 2}
+    finally:
+        store.close()
+
+
+def _store(**kwargs) -> SQLiteStateStore:
+    path = Path(tempfile.mkdtemp()) / "state.db"
+    return SQLiteStateStore(str(path), **kwargs)
+
+
+def test_round_trip_and_delete():
+    store = _store()
+    try:
+        assert store.get("c1") is None
+        store.save("c1", {"intent": "appointment", "entities": {"doctor": "Dr. Wang"}})
+        assert store.exists("c1")
+        assert store.get("c1")["entities"]["doctor"] == "Dr. Wang"
+        store.save("c1", {"intent": "cancel"})
+        assert store.get("c1") == {"intent": "cancel"}
+        store.delete("c1")
+        assert not store.exists("c1")
+    finally:
+        store.close()
+
+
+def test_survives_reopen():
+    store = _store()
+    store.save("c1", {"intent": "query"})
+    store.close()
+    reopened = SQLiteStateStore(store.db_path)
+    try:
+        assert reopened.get("c1") == {"intent": "query"}
+    finally:
+        reopened.close()
+
+
+def test_expired_rows_are_hidden_and_swept():
+    store = _store(ttl_seconds=0.05, sweep_interval=0.05)
+    try:
+        store.save("c1", {"intent": "query"})
+        assert store.get("c1") is not None
+        time.sleep(0.2)
+        assert store.get("c1") is None
+        assert not store.exists("c1")
+        assert store.stats()["expired_swept"] >= 1
+    finally:
+        store.close()
+
+
+def test_concurrent_saves_share_commits():
+    store = _store()
+    try:
+        def worker(n):
+            for i in range(25):
+                store.save(f"conv_{n}_{i}", {"n": n, "i": i})
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = store.stats()
+        assert stats["writes"] == 200
+        assert stats["commits"] < 200
+        assert all(store.get(f"conv_{n}_24") == {"n": n, "i": 24} for n in range(8))
+    finally:
+        store.close()
+
+
+def test_tiered_serves_hits_and_detects_other_writers():
+    l2 = _store()
+    worker_a, worker_b = TieredStateStore(l2), TieredStateStore(l2)
+    try:
+        assert worker_a.compare_and_set("c1", {"n": 1}, 0)
+        assert worker_a.get_versioned("c1") == ({"n": 1}, 1)
+        assert worker_a.get_versioned("c1") == ({"n": 1}, 1)
+
+        # Worker B writes: A's probe notices the version moved on
+        assert worker_b.compare_and_set("c1", {"n": 2}, 1)
+        assert worker_a.get_versioned("c1") == ({"n": 2}, 2)
+
+        stats = worker_a.stats()
+        assert stats["l1_hits"] == 2
+        assert stats["stale_invalidations"] == 1
+        assert stats["l2_reads_saved"] == 2
+        assert stats["l1_hit_ratio"] == 2 / 3
+    finally:
+        l2.close()
+
+
+def test_tiered_trusted_hits_skip_l2_and_conflicts_invalidate():
+    l2 = _store()
+    worker_a = TieredStateStore(l2, trust_seconds=60)
+    worker_b = TieredStateStore(l2)
+    try:
+        worker_a.compare_and_set("c1", {"n": 1}, 0)
+        worker_b.compare_and_set("c1", {"n": 2}, 1)
+        # Trusted (stale) hit, but the write can't clobber B's state
+        state, version = worker_a.get_versioned("c1")
+        assert (state, version) == ({"n": 1}, 1)
+        assert not worker_a.compare_and_set("c1", {"n": 3}, version)
+        assert worker_a.get_versioned("c1") == ({"n": 2}, 2)
+        assert worker_a.stats()["l2_round_trips_saved"] == 1
+    finally:
+        l2.close()
+
+
+def test_tiered_cache_is_isolated_from_caller_mutation():
+    store = TieredStateStore(InMemoryStateStore())
+    state = {"collected_entities": {"doctor": "Dr. Li"}}
+    store.compare_and_set("c1", state, 0)
+    state["collected_entities"]["doctor"] = "Dr. Wang"
+    store.get("c1")["collected_entities"]["doctor"] = "Dr. Chen"
+    assert store.get("c1") == {"collected_entities": {"doctor": "Dr. Li"}}
+
+
+def test_tiered_write_behind():
+    l2 = _store()
+    store = TieredStateStore(l2, write_mode="behind")
+    other = TieredStateStore(l2)
+    try:
+        for version in range(5):
+            assert store.compare_and_set("c1", {"n": version + 1}, version)
+        assert store.get_versioned("c1") == ({"n": 5}, 5)
+        store.flush()
+        assert l2.get_versioned("c1") == ({"n": 5}, 5)
+
+        # Lost race in L2: the queued write is dropped and L1 invalidated
+        assert other.compare_and_set("c1", {"n": "other"}, 5)
+        assert store.compare_and_set("c1", {"n": 6}, 5)
+        store.flush()
+        assert store.stats()["write_behind_conflicts"] == 1
+        assert store.get("c1") == {"n": "other"}
+    finally:
+        store.close()
+
+
+def test_redis_compare_and_set():
+    _check_compare_and_set(RedisStateStore(FakeRedis()))
+
+
+def test_redis_one_round_trip_per_operation():
+    redis = FakeRedis()
+    store = RedisStateStore(redis)
+    store.save("c1", {"intent": "query"})
+    store.get_versioned("c1")
+    store.compare_and_set("c1", {"intent": "cancel"}, 2)
+    store.merge_entities("c1", {"doctor": "Dr. Li"}, {})
+    assert redis.round_trips == store.stats()["round_trips"] == 4
+
+
+def test_redis_merge_entities_is_atomic():
+    redis = FakeRedis(latency=0.001)
+    store = RedisStateStore(redis)
+    default = {"conversation_id": "c1", "collected_entities": {}}
+    keys = ["service", "doctor", "date", "time", "customer_name", "customer_phone"]
+
+    threads = [
+        threading.Thread(target=store.merge_entities, args=("c1", {"time": None, key: key.upper()}, default))
+        for key in keys
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    state, version = store.get_versioned("c1")
+    assert state["collected_entities"] == {key: key.upper() for key in keys}
+    assert version == len(keys)
+    assert store.merge_entities("c1", {"doctor": None}, default)["doctor"] == "DOCTOR"
+
+
+def test_redis_merge_with_compact_codec_falls_back_to_cas():
+    store = RedisStateStore(FakeRedis(), codec="compact")
+    store.save("c1", {"conversation_id": "c1", "collected_entities": {"doctor": "Dr. Li"}})
+    merged = store.merge_entities("c1", {"service": "Cleaning", "doctor": None}, {})
+    assert merged == {"doctor": "Dr. Li", "service": "Cleaning"}
+    assert store.get("c1")["collected_entities"] == merged
+    assert store.stats()["merges"] == 0
+
+
+def test_redis_json_merge_over_compact_row_after_codec_switch():
+    """Rows written under the compact codec are merged via CAS, not handed to cjson"""
+    redis = FakeRedis()
+    compact = RedisStateStore(redis, codec="compact")
+    for cid in ("c1", "c2"):
+        compact.save(cid, {"conversation_id": cid, "collected_entities": {"doctor": "Dr. Li"}})
+
+    store = RedisStateStore(redis, codec="json", async_client=redis.async_client())
+    merged = store.merge_entities("c1", {"service": "Cleaning"}, {})
+    assert merged == {"doctor": "Dr. Li", "service": "Cleaning"}
+    amerged = asyncio.run(store.amerge_entities("c2", {"time": "10:00"}, {}))
+    assert amerged == {"doctor": "Dr. Li", "time": "10:00"}
+    assert store.stats()["merges"] == 0
+
+    # The fallback rewrote the rows as JSON, so the script handles the next merge
+    assert store.merge_entities("c1", {"time": "09:00"}, {})["time"] == "09:00"
+    assert store.stats()["merges"] == 1
+    assert store.get("c1")["collected_entities"] == {"doctor": "Dr. Li", "service": "Cleaning", "time": "09:00"}
+
+def test_redis_clear_all_scans_instead_of_keys():
+    redis = FakeRedis()
+    store = RedisStateStore(redis)
+    store.SCAN_BATCH = 7
+    for i in range(20):
+        store.save(f"c{i}", {"n": i})
+    redis.set("other:key", "keep")
+
+    store.clear_all()
+    assert redis.keys_calls == 0
+    assert store.stats()["scan_calls"] > 1
+    assert not any(store.exists(f"c{i}") for i in range(20))
+    assert redis.get("other:key") == b"keep"
+
+
+def test_merge_entities_with_state_uses_store_merge():
+    previous = get_state_store()
+    redis = FakeRedis()
+    set_state_store(RedisStateStore(redis))
+    try:
+        merge_entities_with_state({"doctor": "Dr. Wang"}, "conv_merge")
+        merged = merge_entities_with_state({"service": "Cleaning", "doctor": None}, "conv_merge")
+        assert merged == {"doctor": "Dr. Wang", "service": "Cleaning"}
+        assert redis.round_trips == 2
+        assert get_state_store().get("conv_merge")["conversation_id"] == "conv_merge"
+    finally:
+        set_state_store(previous)
+
+
+async def _acheck_compare_and_set(store):
+    assert await store.aget_versioned("c1") == (None, 0)
+    assert await store.acompare_and_set("c1", {"n": 1}, 0)
+    assert not await store.acompare_and_set("c1", {"n": 99}, 0)
+    assert await store.aget_versioned("c1") == ({"n": 1}, 1)
+    assert await store.aget_version("c1") == 1
+    await store.asave("c1", {"n": 2})
+    assert await store.aget("c1") == {"n": 2}
+    assert store.get_versioned("c1") == ({"n": 2}, 2)  # sync view agrees
+    assert await store.aexists("c1")
+    merged = await store.amerge_entities("c1", {"doctor": "Dr. Li", "time": None}, {})
+    assert merged == {"doctor": "Dr. Li"}
+    await store.adelete("c1")
+    assert not await store.aexists("c1")
+    assert await store.aget("c1") is None
+
+
+def test_async_interface_on_every_store():
+    redis = FakeRedis()
+    sqlite_store = _store()
+    stores = [
+        InMemoryStateStore(),
+        sqlite_store,
+        RedisStateStore(redis, async_client=redis.async_client()),
+        RedisStateStore(FakeRedis()),  # no async client: executor fallback
+        TieredStateStore(InMemoryStateStore()),
+    ]
+    try:
+        for store in stores:
+            asyncio.run(_acheck_compare_and_set(store))
+    finally:
+        sqlite_store.close()
+
+
+def test_sqlite_async_writes_share_commits():
+    store = _store()
+
+    async def run():
+        await asyncio.gather(*(store.asave(f"conv_{i}", {"i": i}) for i in range(100)))
+        return await asyncio.gather(*(store.aget(f"conv_{i}") for i in range(100)))
+
+    try:
+        states = asyncio.run(run())
+        assert states == [{"i": i} for i in range(100)]
+        assert store.stats()["commits"] < 100
+    finally:
+        store.close()
+
+
+def test_redis_async_client_round_trips():
+    redis = FakeRedis(latency=0.001)
+    store = RedisStateStore(redis, async_client=redis.async_client())
+
+    async def run():
+        await asyncio.gather(*(
+            store.amerge_entities("c1", {f"slot_{i}": i}, {"collected_entities": {}})
+            for i in range(10)
+        ))
+
+    asyncio.run(run())
+    assert len(store.get("c1")["collected_entities"]) == 10
+    assert redis.round_trips == 11
+
+
+def test_closed_store_rejects_writes():
+    store = _store()
+    store.close()
+    try:
+        store.save("c1", {})
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("save after close should fail")
+
+
+def _expect_write_failure(write):
+    try:
+        write()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("write should fail")
+
+
+def test_sqlite_non_sqlite_error_fails_the_batch_not_the_writer():
+    """An OverflowError from a bound parameter is reported; later writes still go through"""
+    store = _store()
+    try:
+        store.save("c1", {"turn": 1})
+        too_big = (store._UPSERT_SQL, ("c1", b"{}", time.time(), 2 ** 70))
+        _expect_write_failure(lambda: store._submit(*too_big))
+        _expect_write_failure(lambda: asyncio.run(store._asubmit(*too_big)))
+        store.save("c2", {"turn": 1})
+        assert store.get("c1") == {"turn": 1} and store.get("c2") == {"turn": 1}
+    finally:
+        store.close()
+
+
+def test_sqlite_dead_writer_fails_fast():
+    store = _store()
+
+    def crash(batch):
+        raise SystemExit  # ends the writer thread without the usual handling
+
+    store._commit_batch = crash
+    try:
+        _expect_write_failure(lambda: store.save("c1", {}))  # queued when it died
+        store._writer.join(5)
+        _expect_write_failure(lambda: store.save("c2", {}))  # submitted afterwards
+        _expect_write_failure(lambda: asyncio.run(store.asave("c3", {})))
+    finally:
+        store.close()
+
+def test_versioning_is_part_of_the_interface():
+    """A store without versioned reads / CAS can't be built (merge_entities needs them)"""
+    class PlainStore(StateStore):
+        def get(self, conversation_id): return None
+        def save(self, conversation_id, state): pass
+        def delete(self, conversation_id): pass
+        def exists(self, conversation_id): return False
+        def clear_all(self): pass
+
+    try:
+        PlainStore()
+    except TypeError as e:
+        assert "compare_and_set" in str(e) and "get_versioned" in str(e)
+    else:
+        raise AssertionError("StateStore subclass without CAS should be abstract")
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Verify the deterministic temporal expression parser"""
+import time
+from datetime import date
+
+from services.llama_service import LlamaService
+from utils.temporal_parser import extract_temporal, normalize_date, normalize_time
+
+TODAY = date(2026, 1, 7)  # Wednesday
+
+
+def test_dates():
+    cases = [
+        ("2026-03-14", "2026-03-14"),
+        ("3/14", "2026-03-14"),
+        ("1/2", "2027-01-02"),  # already past this year → next year
+        ("12/25/2026", "2026-12-25"),
+        ("March 14th", "2026-03-14"),
+        ("on mar 14, 2027", "2027-03-14"),
+        ("the 14th of March", "2026-03-14"),
+        ("14 march", "2026-03-14"),
+        ("the 20th", "2026-01-20"),
+        ("the 3rd", "2026-02-03"),  # past this month → next month
+        ("today", "2026-01-07"),
+        ("tomorrow", "2026-01-08"),
+        ("the day after tomorrow", "2026-01-09"),
+        ("in 3 days", "2026-01-10"),
+        ("in a week", "2026-01-14"),
+        ("friday", "2026-01-09"),
+        ("this friday", "2026-01-09"),
+        ("next friday", "2026-01-16"),
+        ("monday", "2026-01-12"),
+        ("wednesday", "2026-01-14"),  # said on a Wednesday → next week's
+        ("this wednesday", "2026-01-07"),
+        ("next wednesday", "2026-01-14"),
+    ]
+    for text, expected in cases:
+        assert extract_temporal(text, TODAY).date == expected, (text, extract_temporal(text, TODAY))
+
+
+def test_times():
+    cases = [
+        ("2 PM", "14:00"),
+        ("2:30pm", "14:30"),
+        ("9.15 a.m.", "09:15"),
+        ("12 am", "00:00"),
+        ("14:00", "14:00"),
+        ("at 3", "15:00"),
+        ("at 10", "10:00"),
+        ("3 o'clock", "15:00"),
+        ("noon", "12:00"),
+    ]
+    for text, expected in cases:
+        assert extract_temporal(text, TODAY).time == expected, (text, extract_temporal(text, TODAY))
+
+
+def test_part_of_day_is_a_hint_not_a_time():
+    cases = [
+        ("morning", "morning"),
+        ("I want to see a doctor in the morning", "morning"),
+        ("in the afternoon", "afternoon"),
+        ("tonight", "tonight"),
+    ]
+    for text, expected in cases:
+        match = extract_temporal(text, TODAY)
+        assert (match.time, match.part_of_day) == (None, expected), (text, match)
+
+
+def test_combined_expression_and_spans():
+    text = "Can I come next Wednesday afternoon?"
+    match = extract_temporal(text, TODAY)
+    assert (match.date, match.time, match.part_of_day) == ("2026-01-14", None, "afternoon")
+    covered = "".join(text[s:e] for s, e in match.spans).lower()
+    assert "wednesday" in covered and "afternoon" in covered
+
+    match = extract_temporal("Friday at 4:30 PM", TODAY)
+    assert (match.date, match.time) == ("2026-01-09", "16:30")
+
+
+def test_no_false_positives():
+    for text in ["My phone is 555-123-4567", "call me at 5551234567", "I may need a cleaning", "yes"]:
+        match = extract_temporal(text, TODAY)
+        assert match.date is None and match.time is None, (text, match)
+
+
+def test_normalize_model_values():
+    assert normalize_date("Next Wednesday", TODAY) == "2026-01-14"
+    assert normalize_date("2026-02-30", TODAY) is None
+    assert normalize_date("sometime soon", TODAY) is None
+    assert normalize_time("2 PM") == "14:00"
+    assert normalize_time("15") == "15:00"
+    assert normalize_time("evening") is None
+    assert normalize_time("whenever") is None
+
+
+def test_feeds_llama_response_entities():
+    """The user's own words override whatever the model made of them"""
+    output = '{"intent": "appointment", "confidence": 0.9, "entities": {"date": "soon", "time": null}}'
+    response = LlamaService._parse_model_output(output, "book me on 2030-03-14 at 2 PM")
+    assert response.entities["date"] == "2030-03-14"
+    assert response.entities["time"] == "14:00"
+
+
+def test_runs_in_microseconds():
+    start = time.perf_counter()
+    for _ in range(1000):
+        extract_temporal("I'd like to book a cleaning next Wednesday at 2:30 PM", TODAY)
+    per_call_us = (time.perf_counter() - start) * 1000
+    assert per_call_us < 200, per_call_us
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_"):
+            fn()
+            print(f"✓ {name}")
@@ -0,0 +1,56 @@
+"""
+Throwaway clinic databases (tests and benchmarks only)
+
+Builds a SQLite file from the project's create_tables.sql (sample doctors,
+services, time slots), migrates it to the latest schema and points
+utils.db_utils at it through a private connection pool.
+
+Usage:
+    with clinic_db() as pool:
+        AppointmentService.book_appointment(...)
+        print(pool.stats())
+"""
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from config.settings import BASE_DIR
+from services.availability_cache import get_availability_cache
+from utils.db_utils import ConnectionPool, get_connection_pool, set_connection_pool
+from utils.migrations import apply_migrations
+
+SCHEMA = BASE_DIR / "create_tables.sql"
+
+
+def make_clinic_db(path: Path) -> str:
+    """Create the clinic schema + sample data at `path`, return it as str"""
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.read_text())
+    conn.close()
+    apply_migrations(str(path))
+    return str(path)
+
+
+@contextmanager
+def clinic_db(**pool_kwargs):
+    """
+    Temporary clinic database installed as the global connection pool
+
+    The availability cache is cleared on entry and exit so no busy masks
+    leak between databases.
+    """
+    previous = get_connection_pool()
+    cache = get_availability_cache()
+    if cache is not None:
+        cache.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(db_path=make_clinic_db(Path(tmp) / "clinic.db"), **pool_kwargs)
+        set_connection_pool(pool)
+        try:
+            yield pool
+        finally:
+            pool.close()
+            set_connection_pool(previous)
+            if cache is not None:
+                cache.clear()
@@ -0,0 +1,236 @@
+"""
+Fake Ollama Server (tests and benchmarks only)
+
+A local stand-in for `ollama serve` / `ollama run` so the NLU transports can
+be exercised without a GPU or a downloaded model.
+
+Supports:
+  - POST /api/generate  (prompt → {"response": ...}; no prompt → preload;
+                         stream=true → NDJSON chunks, stops if the client hangs up)
+  - POST /api/chat      (messages → {"message": {"content": ...}})
+  - GET  /api/tags
+  - CLI emulation:      python -m testing.fake_ollama run <model> <prompt>
+
+Usage:
+    with FakeOllamaServer(latency=0.05) as server:
+        set_transport(OllamaHTTPTransport(base_url=server.url))
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+# Canned NLU answer used when no responder is given
+DEFAULT_NLU_OUTPUT = json.dumps({
+    "intent": "appointment",
+    "confidence": 0.9,
+    "entities": {
+        "service": "Cleaning",
+        "doctor": "Dr. Wang",
+        "date": None,
+        "time": None,
+        "customer_name": None,
+        "customer_phone": None,
+        "customer_email": None
+    }
+})
+
+
+def default_responder(prompt: str) -> str:
+    """Return the same NLU JSON for every prompt"""
+    return DEFAULT_NLU_OUTPUT
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.fake.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_generate(self, model: str, output: str) -> None:
+        """NDJSON over chunked encoding, one line per simulated token"""
+        fake = self.server.fake
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        lines = [
+            {"model": model, "response": output[i:i + fake.STREAM_CHUNK_CHARS], "done": False}
+            for i in range(0, len(output), fake.STREAM_CHUNK_CHARS)
+        ]
+        lines.append({"model": model, "response": "", "done": True})
+        try:
+            for line in lines:
+                data = (json.dumps(line) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+                with fake._lock:
+                    fake.streamed_chunks += 1
+                if fake.token_latency and not line["done"]:
+                    time.sleep(fake.token_latency)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            with fake._lock:
+                fake.cancelled_streams += 1
+            self.close_connection = True
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": self.server.fake.model}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        fake = self.server.fake
+        payload = self._read_json()
+
+        if self.path == "/api/generate":
+            prompt = payload.get("prompt")
+            if not prompt:
+                fake.preloads += 1
+                self._send_json(200, {"model": payload.get("model"), "response": "", "done": True})
+                return
+            output = fake.complete(prompt)
+            if payload.get("stream", True):  # Ollama streams unless told otherwise
+                self._stream_generate(payload.get("model"), output)
+            else:
+                # Buffered: the client still waits for every token to be generated
+                if fake.token_latency:
+                    chunks = -(-len(output) // fake.STREAM_CHUNK_CHARS)
+                    time.sleep(fake.token_latency * chunks)
+                self._send_json(200, {"model": payload.get("model"), "response": output, "done": True})
+
+        elif self.path == "/api/chat":
+            messages = payload.get("messages") or []
+            prompt = messages[-1].get("content", "") if messages else ""
+            output = fake.complete(prompt)
+            self._send_json(200, {
+                "model": payload.get("model"),
+                "message": {"role": "assistant", "content": output},
+                "done": True
+            })
+
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out close the socket mid-response - expected here
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class FakeOllamaServer:
+    """
+    In-process HTTP server speaking the subset of the Ollama API we use
+
+    Args:
+        responder: prompt → model output (defaults to a canned NLU JSON)
+        latency: Simulated generation time per request (seconds)
+        token_latency: Delay between streamed chunks (seconds)
+        port: 0 picks a free port
+    """
+
+    # Characters per streamed chunk (roughly one token)
+    STREAM_CHUNK_CHARS = 4
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str], str]] = None,
+        latency: float = 0.0,
+        token_latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        model: str = "llama3.2:3b"
+    ):
+        self.responder = responder or default_responder
+        self.latency = latency
+        self.model = model
+        self.requests = 0
+        self.connections = 0
+        self.preloads = 0
+        self.token_latency = token_latency
+        self.streamed_chunks = 0
+        self.cancelled_streams = 0
+        self.prompts = []
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def complete(self, prompt: str) -> str:
+        with self._lock:
+            self.requests += 1
+            self.prompts.append(prompt)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.responder(prompt)
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _cli(argv) -> int:
+    """
+    Emulate the `ollama` CLI:
+        python -m testing.fake_ollama run <model> <prompt>
+        python -m testing.fake_ollama serve [port]
+    """
+    if len(argv) >= 3 and argv[0] == "run":
+        print(default_responder(argv[2]))
+        return 0
+    if argv and argv[0] == "serve":
+        port = int(argv[1]) if len(argv) > 1 else 11434
+        server = FakeOllamaServer(port=port)
+        print(f"Fake Ollama listening on {server.url}")
+        try:
+            server._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    print("usage: fake_ollama run <model> <prompt> | serve [port]", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(_cli(sys.argv[1:]))
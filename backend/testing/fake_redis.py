@@ -0,0 +1,362 @@
+"""
+Fake Redis client (tests and benchmarks only)
+
+An in-process stand-in for a redis-py client, so RedisStateStore can be
+exercised without a Redis server. Implements the commands the store uses,
+with redis-py's call signatures and bytes replies:
+
+  GET, MGET, SET (ex=), SETEX, INCR, EXPIRE, DELETE, UNLINK, EXISTS,
+  SCAN (match=, count=), KEYS, pipeline() (one round trip per execute),
+  register_script() (EVALSHA)
+
+Lua can't run here: register_script() looks the source up in SCRIPTS,
+a table of Python equivalents of the store's scripts.
+
+Every client call or pipeline execute counts as one round trip and sleeps
+`latency` seconds, so benchmarks see realistic network cost.
+
+async_client() returns a redis.asyncio-style client over the same data,
+whose round trips await asyncio.sleep() instead of blocking the loop.
+
+Usage:
+    redis = FakeRedis(latency=0.0005)
+    store = RedisStateStore(redis, async_client=redis.async_client())
+    ...
+    print(redis.round_trips, redis.keys_calls)
+"""
+import asyncio
+import fnmatch
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.state_store import RedisStateStore
+
+
+def _name(key: Any) -> str:
+    """Keys may be passed as str or bytes (e.g. straight from SCAN)"""
+    return key.decode("utf-8") if isinstance(key, bytes) else key
+
+
+def _to_bytes(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class FakeRedis:
+    """Thread-safe dict-backed Redis with TTLs"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.round_trips = 0
+        self.keys_calls = 0
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.RLock()
+        self._scan_cursors: Dict[int, str] = {}
+        self._next_cursor = 0
+
+    def _round_trip(self) -> None:
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # ═══════════════════════════════════════════════════════
+    # Commands (no round trip - shared by client calls, pipelines, scripts)
+    # ═══════════════════════════════════════════════════════
+
+    def _get(self, key: str) -> Optional[bytes]:
+        key = _name(key)
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    def _set(self, key: str, value: Any, ex: Optional[float] = None) -> bool:
+        key = _name(key)
+        expires_at = time.monotonic() + float(ex) if ex is not None else None
+        self._data[key] = (_to_bytes(value), expires_at)
+        return True
+
+    def _incr(self, key: str) -> int:
+        key = _name(key)
+        value = int(self._get(key) or 0) + 1
+        expires_at = self._data[key][1] if key in self._data else None
+        self._data[key] = (_to_bytes(value), expires_at)
+        return value
+
+    def _expire(self, key: str, seconds: float) -> bool:
+        key = _name(key)
+        if self._get(key) is None:
+            return False
+        self._data[key] = (self._data[key][0], time.monotonic() + float(seconds))
+        return True
+
+    def _delete(self, *keys: str) -> int:
+        return sum(self._data.pop(_name(key), None) is not None for key in keys)
+
+    def _exists(self, *keys: str) -> int:
+        return sum(self._get(key) is not None for key in keys)
+
+    def _run(self, name: str, args: tuple, kwargs: dict) -> Any:
+        with self._lock:
+            return getattr(self, f"_{name}")(*args, **kwargs)
+
+    # ═══════════════════════════════════════════════════════
+    # Client API (one round trip each)
+    # ═══════════════════════════════════════════════════════
+
+    def get(self, key: str) -> Optional[bytes]:
+        self._round_trip()
+        return self._run("get", (key,), {})
+
+    def mget(self, *keys: str) -> List[Optional[bytes]]:
+        self._round_trip()
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None) -> bool:
+        self._round_trip()
+        return self._run("set", (key, value), {"ex": ex})
+
+    def setex(self, key: str, seconds: float, value: Any) -> bool:
+        self._round_trip()
+        return self._run("set", (key, value), {"ex": seconds})
+
+    def incr(self, key: str) -> int:
+        self._round_trip()
+        return self._run("incr", (key,), {})
+
+    def expire(self, key: str, seconds: float) -> bool:
+        self._round_trip()
+        return self._run("expire", (key, seconds), {})
+
+    def delete(self, *keys: str) -> int:
+        self._round_trip()
+        return self._run("delete", keys, {})
+
+    def unlink(self, *keys: str) -> int:
+        self._round_trip()
+        return self._run("delete", keys, {})
+
+    def exists(self, *keys: str) -> int:
+        self._round_trip()
+        return self._run("exists", keys, {})
+
+    def keys(self, pattern: str = "*") -> List[bytes]:
+        """Blocking full-keyspace walk - counted so tests can assert it's unused"""
+        self._round_trip()
+        with self._lock:
+            self.keys_calls += 1
+            return [key.encode() for key in list(self._data)
+                    if fnmatch.fnmatchcase(key, pattern) and self._get(key) is not None]
+
+    def scan(self, cursor: int = 0, match: Optional[str] = None, count: int = 10) -> Tuple[int, List[bytes]]:
+        self._round_trip()
+        with self._lock:
+            # Cursors resume after the last key returned, so keys deleted
+            # between calls don't make the walk skip anything
+            after = self._scan_cursors.pop(cursor, None) if cursor else None
+            ordered = sorted(key for key in self._data if after is None or key > after)
+            batch = ordered[:count]
+            next_cursor = 0
+            if len(ordered) > count:
+                self._next_cursor += 1
+                next_cursor = self._next_cursor
+                self._scan_cursors[next_cursor] = batch[-1]
+            keys = [key.encode() for key in batch
+                    if (match is None or fnmatch.fnmatchcase(key, match)) and self._get(key) is not None]
+            return next_cursor, keys
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def register_script(self, source: str) -> "FakeScript":
+        handler = SCRIPTS.get(source)
+        if handler is None:
+            raise ValueError("FakeRedis has no Python equivalent for this Lua script")
+        return FakeScript(self, handler)
+
+    def flushall(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def async_client(self) -> "AsyncFakeRedis":
+        return AsyncFakeRedis(self)
+
+
+class AsyncFakeRedis:
+    """redis.asyncio-style client sharing a FakeRedis's data and counters"""
+
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+
+    async def _round_trip(self) -> None:
+        with self._redis._lock:
+            self._redis.round_trips += 1
+        if self._redis.latency:
+            await asyncio.sleep(self._redis.latency)
+
+    async def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        await self._round_trip()
+        return self._redis._run(name, args, kwargs)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._call("get", key)
+
+    async def mget(self, *keys: str) -> List[Optional[bytes]]:
+        await self._round_trip()
+        with self._redis._lock:
+            return [self._redis._get(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ex: Optional[float] = None) -> bool:
+        return await self._call("set", key, value, ex=ex)
+
+    async def setex(self, key: str, seconds: float, value: Any) -> bool:
+        return await self._call("set", key, value, ex=seconds)
+
+    async def delete(self, *keys: str) -> int:
+        return await self._call("delete", *keys)
+
+    async def unlink(self, *keys: str) -> int:
+        return await self._call("delete", *keys)
+
+    async def exists(self, *keys: str) -> int:
+        return await self._call("exists", *keys)
+
+    def pipeline(self, transaction: bool = True) -> "AsyncFakePipeline":
+        return AsyncFakePipeline(self)
+
+    def register_script(self, source: str) -> "AsyncFakeScript":
+        return AsyncFakeScript(self, self._redis.register_script(source)._handler)
+
+
+class FakePipeline:
+    """Queues commands; execute() applies them atomically in one round trip"""
+
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def setex(self, key: str, seconds: float, value: Any) -> "FakePipeline":
+        self._commands.append(("set", (key, value), {"ex": seconds}))
+        return self
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None) -> "FakePipeline":
+        self._commands.append(("set", (key, value), {"ex": ex}))
+        return self
+
+    def get(self, key: str) -> "FakePipeline":
+        self._commands.append(("get", (key,), {}))
+        return self
+
+    def incr(self, key: str) -> "FakePipeline":
+        self._commands.append(("incr", (key,), {}))
+        return self
+
+    def expire(self, key: str, seconds: float) -> "FakePipeline":
+        self._commands.append(("expire", (key, seconds), {}))
+        return self
+
+    def delete(self, *keys: str) -> "FakePipeline":
+        self._commands.append(("delete", keys, {}))
+        return self
+
+    def execute(self) -> list:
+        self._redis._round_trip()
+        with self._redis._lock:
+            results = [self._redis._run(name, args, kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+class FakeScript:
+    """Registered script: one round trip, runs atomically under the store lock"""
+
+    def __init__(self, redis: FakeRedis, handler: Callable):
+        self._redis = redis
+        self._handler = handler
+
+    def __call__(self, keys: List[str] = (), args: List[Any] = (), client=None) -> Any:
+        self._redis._round_trip()
+        with self._redis._lock:
+            return self._handler(self._redis, list(keys), [_to_bytes(arg) for arg in args])
+
+
+class AsyncFakePipeline(FakePipeline):
+    """FakePipeline whose execute() is awaited"""
+
+    def __init__(self, client: AsyncFakeRedis):
+        super().__init__(client._redis)
+        self._client = client
+
+    async def execute(self) -> list:
+        await self._client._round_trip()
+        with self._redis._lock:
+            results = [self._redis._run(name, args, kwargs) for name, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+class AsyncFakeScript:
+    """FakeScript for the async client"""
+
+    def __init__(self, client: AsyncFakeRedis, handler: Callable):
+        self._client = client
+        self._handler = handler
+
+    async def __call__(self, keys: List[str] = (), args: List[Any] = (), client=None) -> Any:
+        await self._client._round_trip()
+        redis = self._client._redis
+        with redis._lock:
+            return self._handler(redis, list(keys), [_to_bytes(arg) for arg in args])
+
+
+# ═══════════════════════════════════════════════════════
+# Python equivalents of RedisStateStore's Lua scripts
+# ═══════════════════════════════════════════════════════
+
+def _cas_script(redis: FakeRedis, keys: List[str], args: List[bytes]) -> int:
+    state_key, version_key = keys
+    expected, encoded, ttl = int(args[0]), args[1], float(args[2])
+    version = int(redis._get(version_key) or 0)
+    if redis._get(state_key) is None:
+        version = 0
+    if version != expected:
+        return 0
+    redis._set(state_key, encoded, ex=ttl)
+    redis._set(version_key, version + 1, ex=ttl)
+    return 1
+
+
+def _merge_script(redis: FakeRedis, keys: List[str], args: List[bytes]) -> Optional[bytes]:
+    state_key, version_key = keys
+    updates, default_state, ttl = json.loads(args[0]), args[1], float(args[2])
+    data = redis._get(state_key)
+    if data and not data.startswith(b"{"):
+        return None  # Lua's `return false` → nil reply
+    state = json.loads(data or default_state)
+    entities = state.get("collected_entities")
+    if not isinstance(entities, dict):
+        entities = {}
+    entities.update(updates)
+    state["collected_entities"] = entities
+    redis._set(state_key, json.dumps(state), ex=ttl)
+    if data:
+        redis._incr(version_key)
+        redis._expire(version_key, ttl)
+    else:
+        redis._set(version_key, 1, ex=ttl)
+    return json.dumps(entities).encode()
+
+
+SCRIPTS: Dict[str, Callable[[FakeRedis, List[str], List[bytes]], Any]] = {
+    RedisStateStore.CAS_SCRIPT: _cas_script,
+    RedisStateStore.MERGE_SCRIPT: _merge_script,
+}
@@ -0,0 +1,90 @@
+"""
+Fuzz corpus of malformed NLU model outputs (tests and benchmarks only)
+
+Takes well-formed NLU objects and applies the damage small models actually
+produce: chatty prose around the JSON, // and /* */ comments, trailing
+commas, missing closing braces, and string values full of JSON syntax.
+Every mutation is recoverable, so each sample comes with the object a
+correct repair must yield.
+
+Usage:
+    for text, expected in malformed_outputs(count=500, seed=7):
+        assert json.loads(repair_json(text)) == expected
+"""
+import json
+import random
+from typing import Any, Dict, Iterator, Tuple
+
+PREFIXES = [
+    "", "Here is the JSON:\n", "Sure! ", "```json\n", "Output:\n\n",
+    "I parsed the request [see below]:\n",
+]
+SUFFIXES = [
+    "", "\n```", "\n\nExplanation: the user wants an appointment.",
+    "\nNote: date was resolved from 'tomorrow' {relative}.", " // done",
+]
+TRICKY_STRINGS = [
+    "Dr. Wang", "Bob {the builder}", "a//b", "see /* this */", "x, }", "[1, 2]",
+    'quote \\" inside', "http://example.com/a?b=1", "",
+]
+
+
+def _sample_object(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "intent": rng.choice(["appointment", "query", "cancel", "modify", "other"]),
+        "confidence": round(rng.random(), 2),
+        "entities": {
+            "service": rng.choice(["Cleaning", "Extraction", "Checkup", None]),
+            "doctor": rng.choice(["Dr. Wang", "Dr. Chen", "Dr. Li", None]),
+            "date": rng.choice(["2026-03-14", None]),
+            "time": rng.choice(["14:00", "09:30", None]),
+            "customer_name": json.loads(f'"{rng.choice(TRICKY_STRINGS)}"'),
+            "customer_phone": rng.choice(["5551234567", None]),
+            "customer_email": rng.choice(["a@b.com", None]),
+        },
+    }
+
+
+def _add_comments(text: str, rng: random.Random) -> str:
+    """Insert comments after commas that end a line (never inside strings)"""
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        if line.endswith(",") and rng.random() < 0.5:
+            comment = rng.choice(["// the value", "/* inline } note */", "// {bad}"])
+            lines[i] = f"{line} {comment}"
+    return "\n".join(lines)
+
+
+def _add_trailing_commas(text: str, rng: random.Random) -> str:
+    """Add a comma before some closing braces (line-start closers only)"""
+    lines = text.split("\n")
+    for i in range(1, len(lines)):
+        if lines[i].strip() == "}" and not lines[i - 1].rstrip().endswith(("{", ",")):
+            if rng.random() < 0.5:
+                lines[i - 1] += ","
+    return "\n".join(lines)
+
+
+def _truncate_closers(text: str, rng: random.Random) -> str:
+    """Drop the last one or two closing braces (output cut off)"""
+    for _ in range(rng.randint(1, 2)):
+        text = text.rstrip()
+        if text.endswith("}"):
+            text = text[:-1]
+    return text
+
+
+def malformed_outputs(count: int = 200, seed: int = 0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (damaged model output, object it must repair to)"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        obj = _sample_object(rng)
+        text = json.dumps(obj, indent=rng.choice([None, 2]))
+        if rng.random() < 0.5:
+            text = _add_comments(text, rng)
+        if rng.random() < 0.5:
+            text = _add_trailing_commas(text, rng)
+        suffix = rng.choice(SUFFIXES)
+        if not suffix and rng.random() < 0.3:
+            text = _truncate_closers(text, rng)
+        yield rng.choice(PREFIXES) + text + suffix, obj
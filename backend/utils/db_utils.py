@@ -1,10 +1,30 @@
 """
 Database utility functions and connection management
+
+Connections to the clinic database are long-lived and pooled: each is
+opened once with tuned pragmas (WAL, synchronous, page cache, mmap,
+busy timeout - see DB_* in config/settings.py) and handed out by
+get_db_connection() for one unit of work at a time.
+
+transaction() groups several statements into one commit and can return
+generated IDs (lastrowid / RETURNING):
+
+    with transaction() as tx:
+        customer_id = tx.insert("INSERT INTO customers (name) VALUES (?)", (name,))
+        tx.executemany("INSERT INTO appointments (...) VALUES (?, ?)", rows)
 """
+import queue
 import sqlite3
+import threading
+import time
 from typing import Optional, List, Dict, Any
 from contextlib import contextmanager
-from config.settings import DB_PATH
+from config.settings import (
+    DB_PATH, DB_POOL_SIZE, DB_POOL_TIMEOUT_SECONDS, DB_JOURNAL_MODE,
+    DB_SYNCHRONOUS, DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE,
+    DB_STATEMENT_CACHE_SIZE,
+)
+from utils.metrics import Counters, register_metrics
 
 
 class DatabaseError(Exception):
@@ -12,25 +32,232 @@ class DatabaseError(Exception):
     pass
 
 
+class ConnectionPool:
+    """
+    Bounded pool of persistent SQLite connections
+
+    Connections are opened lazily up to `size`; when all are busy a caller
+    waits up to `timeout` seconds for one to come back. Idle connections
+    are reused most-recently-returned first, so a quiet app keeps only a
+    few warm connections busy.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, size: int = DB_POOL_SIZE,
+                 timeout: float = DB_POOL_TIMEOUT_SECONDS):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+        self.counters = Counters(
+            "connections_opened", "connections_discarded", "checkouts",
+            "waits", "wait_seconds", "timeouts",
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # check_same_thread=False: a connection moves between threads, but
+        # the pool only ever lends it to one of them at a time
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=DB_STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+        conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+        self.counters.incr("connections_opened")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise DatabaseError("Connection pool is closed")
+        self.counters.incr("checkouts")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        self.counters.incr("waits")
+        start = time.perf_counter()
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            self.counters.incr("timeouts")
+            raise DatabaseError(
+                f"No database connection free after {self.timeout}s (pool size {self.size})"
+            )
+        finally:
+            self.counters.incr("wait_seconds", time.perf_counter() - start)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection; it must not be inside a transaction"""
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    def discard(self, conn: sqlite3.Connection) -> None:
+        """Drop a connection that can't be trusted any more (frees its slot)"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._opened -= 1
+        self.counters.incr("connections_discarded")
+
+    def close(self) -> None:
+        """Close idle connections; busy ones are closed when released"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.counters.snapshot()
+        idle = self._idle.qsize()
+        stats.update({
+            "size": self.size,
+            "open": self._opened,
+            "idle": idle,
+            "in_use": self._opened - idle,
+            "reuse_ratio": (
+                1 - stats["connections_opened"] / stats["checkouts"] if stats["checkouts"] else 0.0
+            ),
+        })
+        return stats
+
+
+# Global pool (created on first use)
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def set_connection_pool(pool: Optional[ConnectionPool]) -> None:
+    """Replace the global pool (tests, or a different database file)"""
+    global _pool
+    _pool = pool
+
+
+def close_connection_pool() -> None:
+    """Close the global pool (app shutdown); a later query opens a new one"""
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    return _pool.stats() if _pool is not None else {}
+
+
+register_metrics("db_pool", get_pool_stats)
+
+
 @contextmanager
 def get_db_connection():
     """
     Context manager for database connections
-    Ensures connections are properly closed
+    Commits on success, rolls back on any error, then returns the
+    connection to the pool
     """
-    conn = None
+    pool = get_connection_pool()
+    try:
+        conn = pool.acquire()
+    except sqlite3.Error as e:
+        raise DatabaseError(f"Database error: {str(e)}")
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
         yield conn
         conn.commit()
-    except sqlite3.Error as e:
-        if conn:
+    except BaseException as e:
+        try:
             conn.rollback()
-        raise DatabaseError(f"Database error: {str(e)}")
+        except sqlite3.Error:
+            pool.discard(conn)
+            conn = None
+        if isinstance(e, sqlite3.Error):
+            raise DatabaseError(f"Database error: {str(e)}")
+        raise
     finally:
-        if conn:
-            conn.close()
+        if conn is not None:
+            pool.release(conn)
+
+
+class Transaction:
+    """
+    Statements run on one pooled connection and committed together
+
+    Obtained from transaction(); don't keep it past the `with` block.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def query(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """SELECT (or ... RETURNING) and return all rows as dicts"""
+        return [dict(row) for row in self.conn.execute(query, params).fetchall()]
+
+    def query_one(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(query, params).fetchone()
+        return dict(row) if row is not None else None
+
+    def execute(self, query: str, params: tuple = ()) -> int:
+        """INSERT/UPDATE/DELETE, returns affected rows"""
+        return self.conn.execute(query, params).rowcount
+
+    def executemany(self, query: str, seq_of_params) -> int:
+        """One statement over many parameter tuples, returns affected rows"""
+        return self.conn.executemany(query, seq_of_params).rowcount
+
+    def insert(self, query: str, params: tuple = ()) -> int:
+        """INSERT one row, returns its id (lastrowid)"""
+        return self.conn.execute(query, params).lastrowid
+
+    def get_by_id(self, table: str, id: int) -> Optional[Dict[str, Any]]:
+        return self.query_one(f"SELECT * FROM {table} WHERE id = ?", (id,))
+
+
+@contextmanager
+def transaction(immediate: bool = False):
+    """
+    Run several statements in one transaction (one commit/fsync)
+
+    immediate=True takes the write lock up front (BEGIN IMMEDIATE), so a
+    read-then-write sequence can't fail halfway with SQLITE_BUSY when
+    another writer got in between.
+    """
+    with get_db_connection() as conn:
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        except sqlite3.Error as e:
+            raise DatabaseError(f"Database error: {str(e)}")
+        yield Transaction(conn)
 
 
 def execute_query(query: str, params: tuple = ()) -> List[Dict[str, Any]]:
@@ -0,0 +1,115 @@
+"""
+Single-pass tolerant JSON repair for model output
+
+Small models wrap their JSON in prose, add comments and trailing commas,
+or get cut off mid-object. repair_json fixes all of that in ONE linear
+scan:
+
+  - skips prose before the first object/array and after it closes
+  - drops // line and /* block */ comments (outside strings)
+  - drops trailing commas before } or ]
+  - closes an unterminated string and any still-open braces/brackets
+    (a key cut off before its value gets null)
+
+Strings are copied verbatim, so braces, slashes and commas inside values
+are never touched. The result is not guaranteed to be valid JSON (e.g.
+garbage between values) - json.loads still has the final word.
+
+Output that is already valid JSON (maybe with prose around it) takes a
+fast path through the C decoder and is returned unchanged.
+"""
+
+import json
+import re
+
+_DECODER = json.JSONDecoder()
+_CLOSER = {"{": "}", "[": "]"}
+
+# One token per match; finditer walks the text once, left to right.
+# "inert" runs (strings, literals, whitespace, commas that aren't trailing)
+# need no repair and are copied as one token. Strings may be unterminated (output cut off).
+_TOKEN_RE = re.compile(
+    r'(?P<inert>(?:[^"{}\[\],/]+|"[^"\\]*(?:\\.[^"\\]*)*"|/(?![/*])|,(?!\s*(?:[}\]]|/[/*]|\Z)))+)'
+    r'|(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))'
+    r'|(?P<punct>[{}\[\],])'
+    r'|(?P<open_string>"[^"\\]*(?:\\.[^"\\]*)*)\\?\Z',
+    re.DOTALL
+)
+
+
+def repair_json(text: str, prefer: str = "{") -> str:
+    """
+    Extract and repair the first JSON object/array in text
+
+    Args:
+        text: Raw model output
+        prefer: Opener to look for first ("{" or "["); the other is used
+                only when the preferred one doesn't occur
+
+    Returns:
+        Repaired JSON text, or the stripped input when it has no object/array
+    """
+    other = "[" if prefer == "{" else "{"
+    start = text.find(prefer)
+    if start == -1:
+        start = text.find(other)
+        if start == -1:
+            return text.strip()
+
+    # Fast path: already valid JSON (possibly followed by prose)
+    try:
+        _, end = _DECODER.raw_decode(text, start)
+        return text[start:end]
+    except ValueError:
+        pass
+
+    out = []
+    stack = []
+    pending_comma = False
+    pending_ws = ""
+
+    for match in _TOKEN_RE.finditer(text, start):
+        kind = match.lastgroup
+        token = match.group()
+
+        if kind == "comment":
+            continue
+        if token == ",":
+            if pending_comma:
+                out.append("," + pending_ws)  # ",," - keep one, let json.loads judge
+                pending_ws = ""
+            pending_comma = True
+            continue
+        if pending_comma and token.isspace():
+            pending_ws += token
+            continue
+
+        # Any other token settles a pending comma (dropped before a closer)
+        if pending_comma:
+            out.append(pending_ws if token in "}]" else "," + pending_ws)
+            pending_comma = False
+            pending_ws = ""
+
+        if kind == "punct":
+            if token in "{[":
+                stack.append(_CLOSER[token])
+                out.append(token)
+            elif token in stack:
+                # Close anything left open inside (e.g. a missing "]")
+                while stack:
+                    closer = stack.pop()
+                    out.append(closer)
+                    if closer == token:
+                        break
+                if not stack:
+                    break  # top-level value complete - ignore trailing prose
+            # Unmatched closer: ignore
+        elif kind == "open_string":
+            out.append(match.group("open_string") + '"')  # cut off inside a string
+        else:
+            out.append(token)
+
+    if stack and "".join(out).rstrip().endswith(":"):
+        out.append(" null")  # cut off right after a key
+    out.extend(reversed(stack))
+    return "".join(out).strip()
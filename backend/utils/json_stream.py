@@ -0,0 +1,109 @@
+"""
+Incremental JSON object detector for streamed model output
+
+Fed token chunks as they arrive, it tracks brace depth, string/escape
+state and comments, and reports the moment the FIRST top-level object
+closes - so generation can be cancelled instead of waiting for the
+explanation the model tends to append.
+
+Usage:
+    parser = IncrementalJSONObjectParser()
+    for chunk in stream:
+        if parser.feed(chunk):
+            break
+    text = parser.object_text or parser.buffer
+"""
+import json
+from typing import Any, Dict, Optional
+
+
+class IncrementalJSONObjectParser:
+    """
+    Streaming scanner for the first top-level JSON object
+
+    Prose before the opening brace is skipped. Braces inside strings and
+    // or /* */ comments are ignored. Scanning is resumable: each feed()
+    only looks at the new characters, so a whole stream costs O(n).
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.object_text: Optional[str] = None
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._comment: Optional[str] = None  # None, "line" or "block"
+
+    @property
+    def complete(self) -> bool:
+        return self.object_text is not None
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Consume one chunk
+
+        Returns:
+            True once the top-level object has closed (further chunks are ignored)
+        """
+        if self.complete:
+            return True
+        self.buffer += chunk
+        text = self.buffer
+        i = self._pos
+        n = len(text)
+
+        while i < n:
+            ch = text[i]
+            if self._comment == "line":
+                if ch == "\n":
+                    self._comment = None
+            elif self._comment == "block":
+                if ch == "*" and i + 1 < n and text[i + 1] == "/":
+                    self._comment = None
+                    i += 1
+                elif ch == "*" and i + 1 == n:
+                    break  # wait for the next chunk to see if "/" follows
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == "/" and self._start != -1:
+                if i + 1 == n:
+                    break  # "/" may start a comment - wait for the next chunk
+                if text[i + 1] == "/":
+                    self._comment = "line"
+                    i += 1
+                elif text[i + 1] == "*":
+                    self._comment = "block"
+                    i += 1
+            elif ch == '"':
+                if self._start != -1:
+                    self._in_string = True
+            elif ch == "{":
+                if self._start == -1:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._start != -1:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.object_text = text[self._start:i + 1]
+                    self._pos = i + 1
+                    return True
+            i += 1
+
+        self._pos = i
+        return False
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """The closed object decoded, or None if incomplete or not strict JSON"""
+        if self.object_text is None:
+            return None
+        try:
+            return json.loads(self.object_text)
+        except json.JSONDecodeError:
+            return None
@@ -0,0 +1,51 @@
+"""
+Lightweight in-process metrics
+
+Components keep their own Counters and register a provider so
+GET /api/chat/metrics can report everything in one place.
+
+Usage:
+    _counters = Counters("hits", "misses")
+    register_metrics("nlu_fast_path", _counters.snapshot)
+    _counters.incr("hits")
+"""
+import threading
+from typing import Callable, Dict, Any
+
+
+class Counters:
+    """Thread-safe named counters (ints or floats)"""
+
+    def __init__(self, *names: str):
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = dict.fromkeys(names, 0)
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name: str) -> float:
+        return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            for name in self._values:
+                self._values[name] = 0
+
+
+# name → callable returning a JSON-serializable dict
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Register (or replace) a metrics provider"""
+    _providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot all registered providers"""
+    return {name: provider() for name, provider in _providers.items()}
@@ -0,0 +1,228 @@
+"""
+Versioned schema migrations for the clinic database
+
+Migrations are numbered SQL files in backend/migrations
+(NNNN_description.sql). apply_migrations() runs the ones a database
+hasn't seen yet, in order, each in its own transaction, and records them in
+schema_migrations. Applied files must never be edited - add a new one.
+
+Migrations must be re-runnable (CREATE ... IF NOT EXISTS, DROP ... IF
+EXISTS): if tables or indexes a recorded migration created have gone
+missing (e.g. the tables were dropped and recreated by hand), that
+migration and every later one are applied again.
+
+check_query_plans() runs EXPLAIN QUERY PLAN on every hot query (HOT_QUERIES)
+and reports any that would scan a whole table instead of using an index.
+
+Usage (from backend/):
+    python -m utils.migrations                 # migrate DB_PATH
+    python -m utils.migrations --check         # migrate, then verify query plans
+    python -m utils.migrations --db other.db --check
+"""
+import argparse
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import DB_PATH, MIGRATIONS_DIR
+
+_FILE_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+_CREATE_RE = re.compile(
+    r"\bCREATE\s+(?:UNIQUE\s+)?(TABLE|INDEX)\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE
+)
+_DROP_RE = re.compile(r"\bDROP\s+(TABLE|INDEX)\s+(?:IF\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+
+# Queries on the request path, with sample parameters. Each entry is the
+# exact SQL a service runs (noted after the name) - keep them in sync, the
+# plan check is only as good as this list. Whole-table reads (listing every
+# doctor/service) and `name LIKE '%x%'` fallbacks scan by design and are
+# left out; the fallbacks only run after the indexed lookup missed.
+HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    # SlotIndex.load(doctor_id=...)
+    "booked_range_for_doctor": (
+        """SELECT DISTINCT a.date, a.time, s.duration_minutes
+           FROM appointments a LEFT JOIN services s ON s.id = a.service_id
+           WHERE a.doctor_id = ? AND a.date BETWEEN ? AND ? AND a.status != 'cancelled'""",
+        (1, "2026-01-05", "2026-01-19"),
+    ),
+    # SlotIndex.load(doctor_id=None): clinic-wide view, earliest-available search
+    "booked_range_any_doctor": (
+        """SELECT DISTINCT a.doctor_id, a.date, a.time, s.duration_minutes
+           FROM appointments a LEFT JOIN services s ON s.id = a.service_id
+           WHERE a.date BETWEEN ? AND ? AND a.status != 'cancelled'""",
+        ("2026-01-05", "2026-01-19"),
+    ),
+    # AppointmentService.find_customer_by_phone
+    "customer_by_phone": (
+        "SELECT * FROM customers WHERE phone = ?",
+        ("1234567890",),
+    ),
+    # AppointmentService.find_or_create_customer
+    "customer_id_by_phone": (
+        "SELECT id FROM customers WHERE phone = ?",
+        ("1234567890",),
+    ),
+    "customer_id_by_name": (
+        "SELECT id FROM customers WHERE name = ? LIMIT 1",
+        ("Alice Zhang",),
+    ),
+    # AppointmentService.find_doctor_by_name
+    "doctor_by_normalized_name": (
+        """SELECT * FROM doctors
+           WHERE LOWER(TRIM(REPLACE(REPLACE(REPLACE(name, 'Dr.', ''), 'Dr ', ''), 'Doctor ', ''))) = LOWER(TRIM(?))""",
+        ("wang",),
+    ),
+    # AppointmentService.find_service_by_name
+    "service_by_name": (
+        "SELECT * FROM services WHERE LOWER(name) = LOWER(?)",
+        ("cleaning",),
+    ),
+    # get_by_id(): booking/cancel/modify and service durations
+    "appointment_by_id": (
+        "SELECT * FROM appointments WHERE id = ?",
+        (1,),
+    ),
+}
+
+
+class MigrationError(Exception):
+    """A migration file is invalid or failed to apply"""
+    pass
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> List[Tuple[int, str, Path]]:
+    """(version, name, path) for every migration file, ordered by version"""
+    migrations = []
+    for path in sorted(Path(directory).glob("*.sql")):
+        match = _FILE_RE.match(path.name)
+        if not match:
+            raise MigrationError(f"Migration file name must look like 0001_name.sql: {path.name}")
+        migrations.append((int(match.group(1)), match.group(2), path))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError(f"Duplicate migration version in {directory}")
+    return migrations
+
+
+def _ensure_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(conn: sqlite3.Connection) -> List[int]:
+    _ensure_version_table(conn)
+    return [row[0] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+
+
+def expected_objects(migrations: List[Tuple[int, str, Path]]) -> Dict[str, int]:
+    """Table/index name → version that created it, after every migration ran"""
+    objects: Dict[str, int] = {}
+    for version, _, path in migrations:
+        sql = path.read_text()
+        statements = [(m.start(), m.group(2).lower(), version) for m in _CREATE_RE.finditer(sql)]
+        statements += [(m.start(), m.group(2).lower(), None) for m in _DROP_RE.finditer(sql)]
+        for _, name, created_by in sorted(statements):
+            if created_by is None:
+                objects.pop(name, None)
+            else:
+                objects[name] = created_by
+    return objects
+
+
+def _first_broken_version(conn: sqlite3.Connection, migrations, done) -> Optional[int]:
+    """Earliest recorded migration whose tables/indexes no longer exist"""
+    present = {row[0].lower() for row in conn.execute("SELECT name FROM sqlite_master")}
+    broken = [
+        version for name, version in expected_objects(migrations).items()
+        if version in done and name not in present
+    ]
+    return min(broken) if broken else None
+
+
+def apply_migrations(db_path: str = DB_PATH, directory: Path = MIGRATIONS_DIR) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied now"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        migrations = discover_migrations(directory)
+        done = set(applied_versions(conn))
+        broken = _first_broken_version(conn, migrations, done)
+        if broken is not None:
+            # Schema objects vanished under the recorded history: redo from there
+            conn.execute("DELETE FROM schema_migrations WHERE version >= ?", (broken,))
+            done = {version for version in done if version < broken}
+        applied = []
+        for version, name, path in migrations:
+            if version in done:
+                continue
+            # executescript() can't take parameters; version is an int and
+            # name matched \w+, so inlining them is safe
+            script = (
+                f"BEGIN IMMEDIATE;\n{path.read_text()}\n;"
+                f"INSERT INTO schema_migrations (version, name) VALUES ({version}, '{name}');\n"
+                "COMMIT;"
+            )
+            try:
+                conn.executescript(script)
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise MigrationError(f"Migration {path.name} failed: {e}")
+            applied.append(version)
+        return applied
+    finally:
+        conn.close()
+
+
+def explain(conn: sqlite3.Connection, query: str, params: tuple = ()) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines for a query"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def check_query_plans(db_path: str = DB_PATH) -> Dict[str, List[str]]:
+    """
+    Hot queries whose plan scans a table, mapped to their plan
+
+    Empty result = every hot query is an index SEARCH.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        problems = {}
+        for name, (query, params) in HOT_QUERIES.items():
+            plan = explain(conn, query, params)
+            if any(detail.startswith("SCAN ") and detail != "SCAN CONSTANT ROW" for detail in plan):
+                problems[name] = plan
+        return problems
+    finally:
+        conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Apply clinic database migrations")
+    parser.add_argument("--db", default=DB_PATH, help="Database file (default: DB_PATH)")
+    parser.add_argument("--check", action="store_true", help="Fail if a hot query would scan a table")
+    args = parser.parse_args()
+
+    applied = apply_migrations(args.db)
+    print(f"Applied migrations: {applied or 'none (up to date)'}")
+    if not args.check:
+        return 0
+
+    problems = check_query_plans(args.db)
+    for name, plan in problems.items():
+        print(f"❌ {name}: {' | '.join(plan)}")
+    if problems:
+        return 1
+    print(f"✅ {len(HOT_QUERIES)} hot queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Dialogue state codecs (how a state dict becomes bytes in a store)
+
+  📝 JSONCodec:    readable JSON text (the original format)
+  📦 CompactCodec: fixed field order packed with struct, ~3x smaller
+
+Compact layout (all integers big-endian):
+
+  magic 0xD5 | format version (u8)
+  created_at (f64, epoch seconds) | user_message_count (u32)
+  entity presence bitmap (u16, bit i = ENTITY_FIELDS[i])
+  one u16 length per string field, then the UTF-8 bytes of all of them:
+    conversation_id, intent, slot_to_fill, <present entities...>,
+    extras (JSON of anything that doesn't fit the fixed fields)
+
+A length of 0xFFFF means None. All lengths are read with a single
+struct call, so decoding is a handful of slices. Field names are
+never written - the order IS the schema - so ENTITY_FIELDS may only grow at
+the end, and any other layout change needs a new FORMAT_VERSION.
+
+decode_state() sniffs the first byte, so a store can switch codecs without
+migrating rows already written in the other format.
+"""
+import json
+import struct
+from typing import Any, Dict, Union
+
+# Append only - bit positions are part of the format
+ENTITY_FIELDS = (
+    "service", "doctor", "date", "time",
+    "customer_name", "customer_phone", "customer_email",
+    "part_of_day",
+)
+_ENTITY_BITS = {name: 1 << i for i, name in enumerate(ENTITY_FIELDS)}
+_FIXED_KEYS = frozenset((
+    "conversation_id", "intent", "slot_to_fill",
+    "user_message_count", "created_at", "collected_entities",
+))
+
+MAGIC = 0xD5
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct(">BBdIH")
+_NONE = 0xFFFF
+_MAX_STR = _NONE - 1
+
+
+class StateCodec:
+    """Encode/decode a DialogueState dict"""
+
+    name = "base"
+
+    def encode(self, state: Dict[str, Any]) -> Union[str, bytes]:
+        raise NotImplementedError
+
+    def decode(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class JSONCodec(StateCodec):
+    name = "json"
+
+    def encode(self, state: Dict[str, Any]) -> str:
+        return json.dumps(state)
+
+    def decode(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        return json.loads(data)
+
+
+class CompactCodec(StateCodec):
+    name = "compact"
+
+    def encode(self, state: Dict[str, Any]) -> bytes:
+        entities = state.get("collected_entities") or {}
+        created_at = state.get("created_at")
+        extras = {key: state[key] for key in state.keys() - _FIXED_KEYS}
+        if not isinstance(created_at, (int, float)):
+            extras["created_at"] = created_at
+            created_at = 0.0
+
+        bitmap = 0
+        for name, value in entities.items():
+            bit = _ENTITY_BITS.get(name)
+            if bit is not None and value.__class__ is str:
+                bitmap |= bit
+            else:
+                extras.setdefault("collected_entities", {})[name] = value
+
+        strings = [state.get("conversation_id"), state.get("intent"), state.get("slot_to_fill")]
+        strings += [entities[name] for name in ENTITY_FIELDS if bitmap & _ENTITY_BITS[name]]
+        strings.append(json.dumps(extras) if extras else None)
+        raw = [None if value is None else value.encode("utf-8") for value in strings]
+        if max(map(len, filter(None, raw)), default=0) > _MAX_STR:
+            raise ValueError("String field too long for compact state")
+        return b"".join((
+            _HEADER.pack(MAGIC, FORMAT_VERSION, created_at,
+                         state.get("user_message_count") or 0, bitmap),
+            _lengths(len(raw)).pack(*[_NONE if value is None else len(value) for value in raw]),
+            *filter(None, raw),
+        ))
+
+    def decode(self, data: Union[str, bytes]) -> Dict[str, Any]:
+        magic, version, created_at, count, bitmap = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a compact dialogue state")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact state format version {version}")
+
+        names = [name for name in ENTITY_FIELDS if bitmap & _ENTITY_BITS[name]]
+        lengths_struct = _lengths(len(names) + 4)
+        pos = _HEADER.size + lengths_struct.size
+        values = []
+        for length in lengths_struct.unpack_from(data, _HEADER.size):
+            if length == _NONE:
+                values.append(None)
+            else:
+                end = pos + length
+                values.append(str(data[pos:end], "utf-8"))
+                pos = end
+        conversation_id, intent, slot_to_fill = values[:3]
+        entities = dict(zip(names, values[3:-1]))
+        extras_text = values[-1]
+
+        state = {
+            "conversation_id": conversation_id,
+            "intent": intent,
+            "collected_entities": entities,
+            "user_message_count": count,
+            "slot_to_fill": slot_to_fill,
+            "created_at": created_at,
+        }
+        if extras_text is not None:
+            extras = json.loads(extras_text)
+            entities.update(extras.pop("collected_entities", {}))
+            state.update(extras)
+        return state
+
+
+_length_structs: Dict[int, struct.Struct] = {}
+
+
+def _lengths(count: int) -> struct.Struct:
+    """Cached struct for `count` u16 string lengths"""
+    packer = _length_structs.get(count)
+    if packer is None:
+        packer = _length_structs[count] = struct.Struct(f">{count}H")
+    return packer
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec(), CompactCodec())}
+
+
+def get_codec(name: str) -> StateCodec:
+    """Codec by name ("json" or "compact")"""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown state codec '{name}' (expected one of {', '.join(CODECS)})")
+
+
+def decode_state(data: Union[str, bytes]) -> Dict[str, Any]:
+    """Decode either format (compact data starts with the magic byte)"""
+    if isinstance(data, (bytes, bytearray, memoryview)) and data[:1] == bytes((MAGIC,)):
+        return CODECS["compact"].decode(data)
+    return CODECS["json"].decode(data)
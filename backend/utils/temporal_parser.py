@@ -0,0 +1,272 @@
+"""
+Deterministic temporal expression parser
+
+Resolves the date/time phrases patients use into the formats the booking
+flow needs (YYYY-MM-DD, HH:MM), relative to a given "today":
+
+  Dates: 2026-03-14, 3/14, 3/14/2026, March 14(th), 14 March, the 14th,
+         today, tonight, tomorrow, day after tomorrow, in 3 days,
+         (this|next) wednesday, wed
+  Times: 2 PM, 2:30pm, 14:00, at 3 (clinic hours → 15:00), 3 o'clock,
+         noon, midnight
+  Parts of day: morning, afternoon, evening, tonight → part_of_day hint
+                (never a time: "in the morning" is not 09:00, so the
+                booking flow still asks for one)
+
+Weekday rules:
+  - "wednesday" / "this wednesday": the next Wednesday on or after today
+    ("wednesday" said ON a Wednesday means next week's)
+  - "next wednesday": the Wednesday of the following calendar week
+
+Pure regex + arithmetic, no model call: a parse takes microseconds.
+"""
+import re
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tue": 1, "tues": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thur": 3, "thurs": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3,
+    "april": 4, "apr": 4, "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7,
+    "august": 8, "aug": 8, "september": 9, "sep": 9, "sept": 9,
+    "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12,
+}
+
+RELATIVE_DAYS = {
+    "today": 0, "tonight": 0, "tomorrow": 1, "tmrw": 1, "tmr": 1,
+    "day after tomorrow": 2, "the day after tomorrow": 2,
+}
+
+_WEEKDAY_ALT = "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+_MONTH_ALT = "|".join(sorted(MONTHS, key=len, reverse=True))
+_ORDINAL = r"(\d{1,2})(?:st|nd|rd|th)?"
+
+ISO_DATE_RE = re.compile(r"\b(\d{4})[-/](\d{1,2})[-/](\d{1,2})\b")
+NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{4}|\d{2}))?\b")
+MONTH_DAY_RE = re.compile(
+    rf"\b({_MONTH_ALT})\.?\s+{_ORDINAL}\b(?:,?\s*(\d{{4}})\b)?"
+)
+DAY_MONTH_RE = re.compile(
+    rf"\b(?:the\s+)?{_ORDINAL}\s+(?:of\s+)?({_MONTH_ALT})\b\.?(?:,?\s*(\d{{4}})\b)?"
+)
+RELATIVE_DATE_RE = re.compile(
+    r"\b(the day after tomorrow|day after tomorrow|today|tonight|tomorrow|tmrw|tmr)\b"
+)
+IN_DAYS_RE = re.compile(r"\bin\s+(\d{1,2}|a|one|two|three)\s+(days?|weeks?)\b")
+WEEKDAY_RE = re.compile(rf"\b(?:(this|next|on)\s+)?({_WEEKDAY_ALT})\b")
+ORDINAL_DAY_RE = re.compile(r"\bthe\s+(\d{1,2})(?:st|nd|rd|th)\b")
+
+TIME_12H_RE = re.compile(r"\b(\d{1,2})(?:[:.]([0-5]\d))?\s*(a\.?m\.?|p\.?m\.?)(?![a-z])")
+TIME_24H_RE = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+AT_HOUR_RE = re.compile(r"\b(?:at\s+(\d{1,2})(?!\s*[:/\d])(?:\s*o'?clock)?|(\d{1,2})\s*o'?clock)\b")
+NOON_RE = re.compile(r"\b(noon|midday|midnight)\b")
+PART_OF_DAY_RE = re.compile(r"\b(?:in\s+the\s+|this\s+)?(morning|afternoon|evening)\b")
+
+_SMALL_NUMBERS = {"a": 1, "one": 1, "two": 2, "three": 3}
+
+# Bare hours ("at 3") below this are read as PM - the clinic is closed at 3 AM
+_PM_BEFORE_HOUR = 8
+
+
+class TemporalMatch:
+    """
+    Result of extract_temporal
+
+    Attributes:
+        date: YYYY-MM-DD or None
+        time: HH:MM or None (only ever a time the user actually said)
+        part_of_day: morning|afternoon|evening|tonight or None - a hint,
+            never turned into a time
+        spans: (start, end) of every consumed expression, for masking
+    """
+
+    __slots__ = ("date", "time", "part_of_day", "spans")
+
+    def __init__(self):
+        self.date: Optional[str] = None
+        self.time: Optional[str] = None
+        self.part_of_day: Optional[str] = None
+        self.spans: List[Tuple[int, int]] = []
+
+    def __repr__(self) -> str:
+        return f"TemporalMatch(date={self.date!r}, time={self.time!r}, part_of_day={self.part_of_day!r})"
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _upcoming(today: date, month: int, day: int, year: Optional[int]) -> Optional[date]:
+    """month/day in the given year, or the next occurrence on/after today"""
+    if year is not None:
+        return _safe_date(year, month, day)
+    candidate = _safe_date(today.year, month, day)
+    if candidate is not None and candidate < today:
+        candidate = _safe_date(today.year + 1, month, day)
+    return candidate
+
+
+def _weekday_date(today: date, weekday: int, modifier: Optional[str]) -> date:
+    if modifier == "next":
+        start_of_next_week = today + timedelta(days=7 - today.weekday())
+        return start_of_next_week + timedelta(days=weekday)
+    ahead = (weekday - today.weekday()) % 7
+    if ahead == 0 and modifier != "this":
+        ahead = 7
+    return today + timedelta(days=ahead)
+
+
+def _find_date(text: str, today: date) -> Optional[Tuple[date, int, int]]:
+    """First date expression → (date, start, end)"""
+    match = ISO_DATE_RE.search(text)
+    if match:
+        value = _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if value:
+            return value, match.start(), match.end()
+
+    match = MONTH_DAY_RE.search(text)
+    if match:
+        year = int(match.group(3)) if match.group(3) else None
+        value = _upcoming(today, MONTHS[match.group(1)], int(match.group(2)), year)
+        if value:
+            return value, match.start(), match.end()
+
+    match = DAY_MONTH_RE.search(text)
+    if match:
+        year = int(match.group(3)) if match.group(3) else None
+        value = _upcoming(today, MONTHS[match.group(2)], int(match.group(1)), year)
+        if value:
+            return value, match.start(), match.end()
+
+    match = NUMERIC_DATE_RE.search(text)
+    if match:
+        year = match.group(3)
+        if year is not None:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+        value = _upcoming(today, int(match.group(1)), int(match.group(2)), year)
+        if value:
+            return value, match.start(), match.end()
+
+    match = RELATIVE_DATE_RE.search(text)
+    if match:
+        return today + timedelta(days=RELATIVE_DAYS[match.group(1)]), match.start(), match.end()
+
+    match = IN_DAYS_RE.search(text)
+    if match:
+        count = _SMALL_NUMBERS.get(match.group(1)) or int(match.group(1))
+        days = count * (7 if match.group(2).startswith("week") else 1)
+        return today + timedelta(days=days), match.start(), match.end()
+
+    match = WEEKDAY_RE.search(text)
+    if match:
+        value = _weekday_date(today, WEEKDAYS[match.group(2)], match.group(1))
+        return value, match.start(), match.end()
+
+    match = ORDINAL_DAY_RE.search(text)
+    if match:
+        day = int(match.group(1))
+        value = _safe_date(today.year, today.month, day)
+        if value is not None and value < today:
+            next_month = (today.replace(day=1) + timedelta(days=32)).replace(day=1)
+            value = _safe_date(next_month.year, next_month.month, day)
+        if value:
+            return value, match.start(), match.end()
+
+    return None
+
+
+def _find_time(text: str) -> Optional[Tuple[str, int, int]]:
+    """First clock-time expression → (HH:MM, start, end)"""
+    match = TIME_12H_RE.search(text)
+    if match:
+        hour = int(match.group(1))
+        minute = int(match.group(2) or 0)
+        if 1 <= hour <= 12:
+            hour = hour % 12 + (12 if match.group(3).startswith("p") else 0)
+            return f"{hour:02d}:{minute:02d}", match.start(), match.end()
+
+    match = TIME_24H_RE.search(text)
+    if match:
+        return f"{int(match.group(1)):02d}:{match.group(2)}", match.start(), match.end()
+
+    match = NOON_RE.search(text)
+    if match:
+        return ("00:00" if match.group(1) == "midnight" else "12:00"), match.start(), match.end()
+
+    match = AT_HOUR_RE.search(text)
+    if match:
+        hour = int(match.group(1) or match.group(2))
+        if 1 <= hour <= 12:
+            if hour < _PM_BEFORE_HOUR:
+                hour += 12
+            return f"{hour:02d}:00", match.start(), match.end()
+
+    return None
+
+
+def extract_temporal(text: str, today: date) -> TemporalMatch:
+    """
+    Extract the first date, time and part of day from free text
+
+    Args:
+        text: User message (any case)
+        today: Reference date for relative expressions
+    """
+    text = text.lower()
+    result = TemporalMatch()
+
+    found = _find_date(text, today)
+    if found:
+        value, start, end = found
+        result.date = value.isoformat()
+        result.spans.append((start, end))
+        if "tonight" in text[start:end]:
+            result.part_of_day = "tonight"
+
+    found = _find_time(text)
+    if found:
+        result.time, start, end = found
+        result.spans.append((start, end))
+
+    match = PART_OF_DAY_RE.search(text)
+    if match:
+        result.part_of_day = match.group(1)
+        result.spans.append((match.start(), match.end()))
+
+    return result
+
+
+def normalize_date(value: Optional[str], today: date) -> Optional[str]:
+    """Any supported date expression → YYYY-MM-DD (None if unrecognized)"""
+    if not value:
+        return None
+    found = _find_date(value.lower(), today)
+    return found[0].isoformat() if found else None
+
+
+def normalize_time(value: Optional[str]) -> Optional[str]:
+    """Any supported time expression → HH:MM (None if unrecognized, incl. parts of day)"""
+    if not value:
+        return None
+    text = value.lower()
+    found = _find_time(text)
+    if found:
+        return found[0]
+    if text.strip().isdigit():
+        hour = int(text)
+        if 1 <= hour < _PM_BEFORE_HOUR:
+            hour += 12
+        return f"{hour:02d}:00" if hour <= 23 else None
+    return None
@@ -1,3 +1,7 @@
+-- Development reset: drops everything, recreates the baseline schema and loads
+-- sample data. Schema changes go in backend/migrations (applied on startup,
+-- or: cd backend && python -m utils.migrations --check).
+
 -- ===========================
 -- CLEANUP: Drop all tables if they exist
 -- ===========================
@@ -6,6 +10,8 @@ DROP TABLE IF EXISTS time_slots;
 DROP TABLE IF EXISTS services;
 DROP TABLE IF EXISTS doctors;
 DROP TABLE IF EXISTS customers;
+-- Migration history goes too, so the next migrate re-creates 0002+ indexes
+DROP TABLE IF EXISTS schema_migrations;
 
 -- ===========================
 -- 1. Customers Table